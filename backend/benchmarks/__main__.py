@@ -0,0 +1,74 @@
+"""Run the hot-path benchmarks and print a JSON report.
+
+    python -m backend.benchmarks --suite memory --memory-sizes 10,1000,100000
+    python -m backend.benchmarks --suite chat,api --clients 1,8,32 --output bench.json
+    python -m backend.benchmarks --suite startup,alloc
+    python -m backend.benchmarks --suite ann --memory-sizes 20000,100000,300000
+"""
+
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+
+
+def _ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(prog="python -m backend.benchmarks")
+    parser.add_argument("--suite", default="memory,chat,workflow,api", help="comma-separated suites to run")
+    parser.add_argument("--memory-sizes", type=_ints, default=[10, 1000, 10000, 100000])
+    parser.add_argument("--npcs", type=_ints, default=[1, 10, 30])
+    parser.add_argument("--clients", type=_ints, default=[1, 8, 32])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=10.0)
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    llm, embed = args.llm_latency_ms / 1000, args.embed_latency_ms / 1000
+    suites = set(args.suite.split(","))
+    report: dict = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": vars(args),
+        "results": {},
+    }
+
+    if "memory" in suites:
+        from backend.benchmarks import bench_memory
+        report["results"]["memory"] = bench_memory.run(args.memory_sizes, args.iterations)
+    if "chat" in suites:
+        from backend.benchmarks import bench_chat
+        report["results"]["chat"] = bench_chat.run(args.clients, llm_latency=llm, embed_latency=embed)
+        report["results"]["chat_stream"] = bench_chat.run(args.clients, llm_latency=llm, embed_latency=embed, stream=True)
+    if "workflow" in suites:
+        from backend.benchmarks import bench_workflow
+        report["results"]["workflow"] = bench_workflow.run(args.npcs, llm_latency=llm, embed_latency=embed)
+    if "ann" in suites:
+        from backend.benchmarks import bench_ann
+        report["results"]["ann"] = bench_ann.run(args.memory_sizes)
+    if "alloc" in suites:
+        from backend.benchmarks import bench_alloc
+        report["results"]["alloc"] = bench_alloc.run()
+    if "startup" in suites:
+        from backend.benchmarks import bench_startup
+        report["results"]["startup"] = bench_startup.run()
+    if "api" in suites:
+        from backend.benchmarks import bench_api
+        report["results"]["api"] = bench_api.run(args.clients, llm_latency=llm, embed_latency=embed)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,82 @@
+"""Allocation cost of the hot-path records, measured with tracemalloc.
+
+``per_call`` is the peak memory a single call allocates (transient garbage
+included); ``resident_bytes`` is what each record costs while it is kept.
+"""
+
+import json
+import tempfile
+import tracemalloc
+from typing import Any, Callable
+
+from backend.core.config import Settings
+from backend.core.database import ConnectionPool, get_npc, get_npcs, init_db
+from backend.core.models import SimulationResult, WorldEvent
+from backend.services.npc_service import world_event_memory
+
+
+def _peak(fn: Callable[[], Any], iterations: int) -> float:
+    """Mean peak bytes allocated by one call of ``fn``."""
+    fn()  # warm statement and type caches
+    total = 0
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        total += tracemalloc.get_traced_memory()[1] - base
+    return total / iterations
+
+
+def _resident(make: Callable[[int], Any], count: int) -> float:
+    """Bytes per record retained when ``count`` records are kept alive."""
+    base = tracemalloc.get_traced_memory()[0]
+    kept = [make(i) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0] - base
+    del kept
+    return size / count
+
+
+def _seed(pool: ConnectionPool, npc_count: int) -> None:
+    with pool.connection() as conn:
+        init_db(conn)
+        conn.execute("INSERT INTO world_state (id, description) VALUES (1, 'A trading post')")
+        conn.executemany(
+            "INSERT INTO npcs (id, name, role, backstory, goals) VALUES (?, ?, ?, ?, ?)",
+            [
+                (f"npc{i}", f"Npc {i}", "merchant", "Sold wares on the old road for twenty years.",
+                 json.dumps(["trade", "survive", "gossip"]))
+                for i in range(npc_count)
+            ],
+        )
+        conn.commit()
+
+
+def run(npc_count: int = 30, iterations: int = 200, resident_count: int = 10_000) -> list[dict[str, Any]]:
+    event = WorldEvent(description="A caravan arrived from the north", affected_npc_ids=["npc0", "npc1"])
+    result_json = SimulationResult(event=event, npc_reactions={"npc0": "curious", "npc1": "wary"}).model_dump_json()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = Settings(gemini_api_key="bench", data_dir=tmp, db_path=f"{tmp}/bench.db")
+        pool = ConnectionPool(settings.db_path, size=1)
+        _seed(pool, npc_count)
+        tracemalloc.start()
+        try:
+            with pool.connection() as conn:
+                per_call = {
+                    f"get_npcs[{npc_count}]": _peak(lambda: get_npcs(conn), iterations),
+                    "get_npc": _peak(lambda: get_npc(conn, "npc0"), iterations),
+                    "world_event_memory": _peak(lambda: world_event_memory(event), iterations),
+                    "load_simulation_result": _peak(lambda: SimulationResult.model_validate_json(result_json), iterations),
+                }
+                resident = {
+                    "npc": _resident(lambda _: get_npcs(conn), resident_count // npc_count) / npc_count,
+                    "memory": _resident(lambda _: world_event_memory(event), resident_count),
+                }
+        finally:
+            tracemalloc.stop()
+            pool.close()
+
+    return [
+        *({"record": name, "per_call_bytes": round(size)} for name, size in per_call.items()),
+        *({"record": name, "resident_bytes": round(size)} for name, size in resident.items()),
+    ]
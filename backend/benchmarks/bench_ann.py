@@ -0,0 +1,67 @@
+"""Recall@k and latency of approximate memory search against exact search.
+
+Memories are drawn around a few hundred topic centres, standing in for the
+clustered structure of real embeddings (uniform random vectors have no
+neighbours worth finding). Recall is the share of the exact top-k that the
+approximate search also returns, with plain cosine ranking.
+"""
+
+import time
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+
+from backend.benchmarks.harness import percentiles, time_sync
+from backend.services.ann_index import ANNOptions
+from backend.services.memory_store import MemoryStore
+
+
+def _embeddings(rng: np.random.Generator, count: int, dim: int, topics: int) -> np.ndarray:
+    centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    noise = rng.standard_normal((count, dim)).astype(np.float32)
+    return centres[rng.integers(0, topics, count)] + 0.5 * noise
+
+
+def run(
+    sizes: list[int],
+    nprobes: tuple[int, ...] = (1, 4, 8, 16, 32, 64),
+    queries: int = 50,
+    top_k: int = 10,
+    embed_dim: int = 768,
+    topics: int = 500,
+) -> list[dict[str, Any]]:
+    results = []
+    for size in sizes:
+        rng = np.random.default_rng(0)
+        rows = _embeddings(rng, size, embed_dim, topics)
+        exact, approximate = MemoryStore(), MemoryStore(ANNOptions(min_memories=0))
+        now = datetime.utcnow()
+        for i, row in enumerate(rows):
+            exact.add(str(i), str(i), now, "world_event", row)
+            approximate.add(str(i), str(i), now, "world_event", row)
+        start = time.perf_counter()
+        approximate.build_index()
+        train_seconds = time.perf_counter() - start
+
+        probe = _embeddings(rng, queries, embed_dim, topics)
+        truth = [{text for text, _ in exact.search(q, top_k)} for q in probe]
+        i = iter(range(10**9))
+        exact_latency = time_sync(lambda: exact.search(probe[next(i) % queries], top_k), queries)
+
+        sweep = []
+        for nprobe in nprobes:
+            approximate._index.nprobe = nprobe
+            found = sum(len(t & {text for text, _ in approximate.search(q, top_k)}) for q, t in zip(probe, truth))
+            latency = time_sync(lambda: approximate.search(probe[next(i) % queries], top_k), queries)
+            sweep.append({"nprobe": nprobe, "recall_at_k": round(found / (queries * top_k), 4), "search": percentiles(latency)})
+
+        results.append({
+            "memories": size,
+            "top_k": top_k,
+            "nlist": len(approximate._index.centroids),
+            "train_seconds": round(train_seconds, 3),
+            "exact": percentiles(exact_latency),
+            "approximate": sweep,
+        })
+    return results
@@ -0,0 +1,59 @@
+"""FastAPI endpoint latency and throughput through the ASGI stack."""
+
+import asyncio
+import os
+import tempfile
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+from backend.benchmarks.fakes import fake_gemini
+from backend.benchmarks.harness import peak_rss_mb, run_clients
+
+READ_ENDPOINTS = ["/world", "/npcs", "/npc/aldric", "/world/events", "/scenarios/active/starters"]
+
+
+async def _run(clients: list[int], requests_per_client: int) -> list[dict[str, Any]]:
+    import backend.main as main
+
+    results = []
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for n_clients in clients:
+                for path in READ_ENDPOINTS:
+                    async def get(n: int, path: str = path) -> None:
+                        (await http.get(path)).raise_for_status()
+
+                    results.append({"endpoint": f"GET {path}", **await run_clients(get, n_clients, requests_per_client)})
+
+                async def chat(n: int) -> None:
+                    resp = await http.post("/npc/aldric/chat", json={"player_message": f"Any news? ({n})"})
+                    resp.raise_for_status()
+
+                results.append({"endpoint": "POST /npc/aldric/chat", **await run_clients(chat, n_clients, requests_per_client)})
+    return results
+
+
+def run(
+    clients: list[int],
+    requests_per_client: int = 20,
+    llm_latency: float = 0.05,
+    embed_latency: float = 0.01,
+) -> list[dict[str, Any]]:
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    from backend.core.config import Settings
+
+    with tempfile.TemporaryDirectory() as tmp, fake_gemini(llm_latency, embed_latency):
+        bench_settings = Settings(gemini_api_key="bench", data_dir=tmp)
+        from backend.core.seed import seed_scenario
+
+        seed_scenario(bench_settings, "ashwood")
+        with patch("backend.main.settings", bench_settings), \
+             patch("temporalio.client.Client") as client_cls, \
+             patch("temporalio.worker.Worker") as worker_cls:
+            client_cls.connect = AsyncMock()
+            worker_cls.return_value.run = AsyncMock()
+            results = asyncio.run(_run(clients, requests_per_client))
+    return [{**r, "peak_rss_mb": peak_rss_mb()} for r in results]
@@ -0,0 +1,76 @@
+"""End-to-end NPCService.chat latency and throughput under concurrent players."""
+
+import asyncio
+import tempfile
+from typing import Any
+
+from backend.benchmarks.bench_memory import _seed_memories
+from backend.benchmarks.fakes import fake_gemini
+from backend.benchmarks.harness import peak_rss_mb, run_clients
+from backend.core.config import Settings
+from backend.core.models import ChatRequest, NPC, NPCPersonality, WorldState
+
+
+def _npcs(count: int) -> list[NPC]:
+    return [
+        NPC(
+            id=f"npc{i}",
+            personality=NPCPersonality(
+                name=f"Keeper {i}",
+                role="tavern keeper",
+                backstory="Has poured ale for every traveler on the north road for thirty years.",
+                goals=["keep the tavern open", "hear every rumor"],
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def run(
+    clients: list[int],
+    npc_count: int = 4,
+    memories_per_npc: int = 1000,
+    requests_per_client: int = 10,
+    llm_latency: float = 0.05,
+    embed_latency: float = 0.01,
+    embed_dim: int = 768,
+    stream: bool = False,
+) -> list[dict[str, Any]]:
+    from backend.services.npc_service import NPCService
+
+    results = []
+    world = WorldState(description="A trading post at the edge of the Ashwood", recent_events=["A storm hit"])
+    npcs = _npcs(npc_count)
+
+    for n_clients in clients:
+        with tempfile.TemporaryDirectory() as tmp, fake_gemini(llm_latency, embed_latency, embed_dim):
+            settings = Settings(
+                gemini_api_key="bench",
+                db_path=f"{tmp}/bench.db",
+                index_dir=f"{tmp}/indexes",
+                data_dir=tmp,
+                memory_journal_fsync=False,
+            )
+            service = NPCService(settings)
+            for npc in npcs:
+                _seed_memories(service, npc.id, memories_per_npc, embed_dim)
+
+            async def request(n: int) -> None:
+                chat = ChatRequest(player_message=f"Have you seen the dragon? ({n})")
+                npc = npcs[n % len(npcs)]
+                if stream:
+                    async for _ in service.chat_stream(npc, world, chat):
+                        pass
+                else:
+                    await service.chat(npc, world, chat)
+
+            stats = asyncio.run(run_clients(request, n_clients, requests_per_client))
+            results.append({
+                "npcs": npc_count,
+                "memories_per_npc": memories_per_npc,
+                "stream": stream,
+                **stats,
+                "peak_rss_mb": peak_rss_mb(),
+            })
+            service.close()
+    return results
@@ -0,0 +1,84 @@
+"""Store and retrieval latency for one NPC as its memory grows."""
+
+import asyncio
+import tempfile
+import time
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+
+from backend.benchmarks.fakes import fake_gemini
+from backend.benchmarks.harness import peak_rss_mb, percentiles, time_sync
+from backend.core.config import Settings
+from backend.core.records import Memory
+from backend.services.npc_service import NPCService
+
+QUERIES = ["Do you remember the dragon?", "What happened at the market?", "Any news from the north?"]
+
+
+def _seed_memories(service: NPCService, npc_id: str, count: int, dim: int) -> None:
+    # Bulk-fill with random vectors; embedding 100k texts is not what we measure.
+    # Every other memory is private to "ana", so anonymous retrieval goes through
+    # the player filter with half the rows visible.
+    rng = np.random.default_rng(0)
+    now = datetime.utcnow()
+    batch = 1000
+    for start in range(0, count, batch):
+        n = min(batch, count - start)
+        memories = [
+            Memory(content=f"memory {start + i}", memory_type="world_event", timestamp=now, player_id="ana" if i % 2 else "")
+            for i in range(n)
+        ]
+        service._append_memories(npc_id, memories, rng.standard_normal((n, dim)).astype(np.float32).tolist())
+
+
+def run(sizes: list[int], iterations: int = 50, embed_dim: int = 768, embed_latency: float = 0.0) -> list[dict[str, Any]]:
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp, fake_gemini(embed_latency=embed_latency, embed_dim=embed_dim):
+            settings = Settings(
+                gemini_api_key="bench",
+                db_path=f"{tmp}/bench.db",
+                index_dir=f"{tmp}/indexes",
+                data_dir=tmp,
+                memory_journal_fsync=False,
+                memory_journal_compact_threshold=10**9,
+            )
+            service = NPCService(settings)
+            _seed_memories(service, "npc", size, embed_dim)
+
+            i = iter(range(10**9))
+            retrieve = time_sync(lambda: service._retrieve_memories("npc", _query(next(i))), iterations)
+            retrieve_owner = time_sync(lambda: service._retrieve_memories("npc", _query(next(i)), player_id="ana"), iterations)
+            store = time_sync(
+                lambda: service._store_memory("npc", Memory(content=f"new {next(i)}", memory_type="player_interaction")),
+                iterations,
+            )
+            aretrieve = asyncio.run(_time_async(service, iterations))
+
+            results.append({
+                "memories": size,
+                "retrieve": percentiles(retrieve),
+                "retrieve_owner": percentiles(retrieve_owner),
+                "retrieve_async": percentiles(aretrieve),
+                "store": percentiles(store),
+                "store_resident_mb": round(service._get_index("npc").nbytes / 2**20, 2),
+                "peak_rss_mb": peak_rss_mb(),
+            })
+            service.close()
+    return results
+
+
+def _query(n: int) -> str:
+    # Distinct text per call so the embedding cache doesn't hide query cost.
+    return f"{QUERIES[n % len(QUERIES)]} ({n})"
+
+
+async def _time_async(service: NPCService, iterations: int) -> list[float]:
+    samples = []
+    for n in range(iterations):
+        start = time.perf_counter()
+        await service._aretrieve_memories("npc", _query(n))
+        samples.append(time.perf_counter() - start)
+    return samples
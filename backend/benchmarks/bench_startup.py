@@ -0,0 +1,69 @@
+"""Cold-start cost of the API server: importing ``backend.main``, running its
+startup, and serving the first world request. Each sample is a fresh
+interpreter so no module is already imported."""
+
+import asyncio
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+from backend.benchmarks.harness import percentiles
+
+
+def _child(mode: str) -> dict[str, float]:
+    start = time.perf_counter()
+    import backend.main as main
+    imported = time.perf_counter()
+
+    import httpx
+
+    async def connect() -> None:
+        # The SDK import is part of startup; the network round trip to Temporal is not.
+        await asyncio.to_thread(importlib.import_module, "temporalio.client")
+        main.app.state.temporal_client = object()
+
+    main._connect_temporal = connect
+    main.settings = main.settings.model_copy(update={"preload": mode == "preload"})
+
+    async def serve() -> tuple[float, float]:
+        async with main.app.router.lifespan_context(main.app):
+            started = time.perf_counter()
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+                (await http.get("/world")).raise_for_status()
+            return started, time.perf_counter()
+
+    started, first_world = asyncio.run(serve())
+    return {"import": imported - start, "startup": started - imported, "first_world": first_world - imported}
+
+
+def run(modes: tuple[str, ...] = ("lazy", "preload"), repeats: int = 5) -> list[dict[str, Any]]:
+    results = []
+    for mode in modes:
+        samples: dict[str, list[float]] = {"import": [], "startup": [], "first_world": []}
+        for _ in range(repeats):
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {
+                    **os.environ,
+                    "GEMINI_API_KEY": "bench",
+                    "DATA_DIR": tmp,
+                    "DB_PATH": os.path.join(tmp, "game.db"),
+                    "INDEX_DIR": os.path.join(tmp, "indexes"),
+                }
+                out = subprocess.run(
+                    [sys.executable, "-m", "backend.benchmarks.bench_startup", mode],
+                    env=env, capture_output=True, text=True, check=True,
+                ).stdout
+            for key, value in json.loads(out.splitlines()[-1]).items():
+                samples[key].append(value)
+        results.append({"mode": mode, **{key: percentiles(values) for key, values in samples.items()}})
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(_child(sys.argv[1])))
@@ -0,0 +1,88 @@
+"""WorldSimulationWorkflow wall-clock time per tick under Temporal's test environment."""
+
+import asyncio
+import json
+import tempfile
+import time
+import uuid
+from typing import Any
+
+from backend.benchmarks.bench_chat import _npcs
+from backend.benchmarks.fakes import fake_gemini
+from backend.benchmarks.harness import peak_rss_mb, percentiles
+from backend.core.config import Settings
+from backend.core.database import get_db, init_db
+from backend.services.registry import NPCServiceRegistry
+
+
+def _seed_world(settings: Settings, world_id: str, npc_count: int) -> None:
+    conn = get_db(settings.for_scenario("ashwood", world_id))
+    init_db(conn)
+    conn.execute("INSERT INTO world_state (id, description) VALUES (1, 'A trading post at the edge of the Ashwood')")
+    conn.executemany(
+        "INSERT INTO npcs (id, name, role, backstory, goals) VALUES (?, ?, ?, ?, ?)",
+        [
+            (n.id, n.personality.name, n.personality.role, n.personality.backstory, json.dumps(n.personality.goals))
+            for n in _npcs(npc_count)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+async def _run(npc_counts: list[int], ticks: int, fanout_limit: int) -> list[dict[str, Any]]:
+    from temporalio.testing import WorkflowEnvironment
+    from temporalio.worker import Worker
+
+    from backend.temporal import workflows
+
+    env = await WorkflowEnvironment.start_time_skipping()
+    results = []
+    async with env:
+        async with Worker(
+            env.client,
+            task_queue="bench",
+            workflows=[workflows.WorldSimulationWorkflow],
+            activities=[
+                workflows.generate_world_event_activity,
+                workflows.update_npc_memories_activity,
+                workflows.consolidate_npc_memories_activity,
+            ],
+        ):
+            for npc_count in npc_counts:
+                with tempfile.TemporaryDirectory() as tmp:
+                    settings = Settings(gemini_api_key="bench", data_dir=tmp, memory_journal_fsync=False)
+                    services = NPCServiceRegistry()
+                    workflows.configure(settings, npc_services=services)
+                    world_id = f"bench-{npc_count}"
+                    _seed_world(settings, world_id, npc_count)
+                    samples = []
+                    for _ in range(ticks):
+                        start = time.perf_counter()
+                        # Results are not applied, so every tick reuses the version-0 snapshot.
+                        await env.client.execute_workflow(
+                            workflows.WorldSimulationWorkflow.run,
+                            workflows.SimulateInput("ashwood", world_id, world_version=0, fanout_limit=fanout_limit),
+                            id=f"bench-{uuid.uuid4()}",
+                            task_queue="bench",
+                        )
+                        samples.append(time.perf_counter() - start)
+                    results.append({"npcs": npc_count, "fanout_limit": fanout_limit, "tick": percentiles(samples)})
+                    workflows.configure(None)
+                    services.clear()
+    return results
+
+
+def run(
+    npc_counts: list[int],
+    ticks: int = 5,
+    fanout_limit: int = 8,
+    llm_latency: float = 0.2,
+    embed_latency: float = 0.05,
+) -> list[dict[str, Any]]:
+    with fake_gemini(llm_latency, embed_latency):
+        try:
+            results = asyncio.run(_run(npc_counts, ticks, fanout_limit))
+        except RuntimeError as e:
+            return [{"skipped": f"Temporal test server unavailable: {e}"}]
+    return [{**r, "peak_rss_mb": peak_rss_mb()} for r in results]
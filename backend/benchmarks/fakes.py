@@ -0,0 +1,175 @@
+"""Deterministic local stand-ins for Gemini generation and embedding."""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator
+from unittest.mock import patch
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import PrivateAttr
+
+_NPC_IDS = re.compile(r"Only use these NPC IDs: \[(.*?)\]")
+_EVENT_COUNT = re.compile(r"Generate exactly (\d+) event")
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+
+
+class FakeEmbedding(BaseEmbedding):
+    """Hash-seeded unit vectors: identical text always gets the identical vector."""
+
+    embed_dim: int = 768
+    latency: float = 0.0
+    _calls: int = PrivateAttr(default=0)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FakeEmbedding"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    def vector(self, text: str) -> list[float]:
+        v = np.random.default_rng(_seed(text)).standard_normal(self.embed_dim).astype(np.float32)
+        return (v / np.linalg.norm(v)).tolist()
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        return self._get_text_embeddings([query])[0]
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        self._calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self.vector(t) for t in texts]
+
+    async def _aget_query_embedding(self, query: str) -> list[float]:
+        return (await self._aget_text_embeddings([query]))[0]
+
+    async def _aget_text_embedding(self, text: str) -> list[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    async def _aget_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        self._calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self.vector(t) for t in texts]
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def fake_reply(prompt: str) -> str:
+    """The JSON envelope each prompt in the backend asks Gemini for."""
+    if "game world simulator" in prompt:
+        match = _NPC_IDS.search(prompt)
+        ids = [i.strip(" '\"") for i in match.group(1).split(",")] if match else []
+        affected = ids[: max(1, len(ids) // 2)]
+        count = _EVENT_COUNT.search(prompt)
+        return json.dumps({"events": [
+            {
+                "event_description": f"A storm rolls in over the valley (#{(_seed(prompt) + n) % 1000}).",
+                "affected_npc_ids": affected,
+                "npc_reactions": {i: "Braces against the weather." for i in affected},
+                "gossip": [{"from_npc": ids[0], "to_npc": ids[-1], "content": "Did you hear the thunder?"}] if len(ids) > 1 else [],
+            }
+            for n in range(int(count.group(1)) if count else 1)
+        ]})
+    if "narrator" in prompt:
+        return json.dumps({"summary": "Much has happened while you were away.", "key_moments": ["A storm came."]})
+    return json.dumps({
+        "dialogue": f"Ah, traveler. I remember you well ({_seed(prompt) % 1000}).",
+        "choices": ["Tell me more", "Goodbye", "What news?"],
+    })
+
+
+class _FakeCaches:
+    """Context caching stand-in: remembers each registered prefix by name."""
+
+    def __init__(self) -> None:
+        self.prefixes: dict[str, str] = {}
+
+    async def create(self, model: str, config: Any) -> Any:
+        name = f"cachedContents/{len(self.prefixes)}"
+        self.prefixes[name] = "".join(config.contents)
+        return type("CachedContent", (), {"name": name})()
+
+    async def delete(self, name: str, **kwargs: Any) -> None:
+        self.prefixes.pop(name, None)
+
+
+class _FakeModels:
+    def __init__(self, latency: float, chunk_size: int, caches: _FakeCaches):
+        self._latency = latency
+        self._chunk_size = chunk_size
+        self._caches = caches
+        self.calls = 0
+
+    def _prompt(self, contents: str, config: Any) -> str:
+        cached = getattr(config, "cached_content", None)
+        return self._caches.prefixes[cached] + contents if cached else contents
+
+    def generate_content(self, model: str, contents: str, config: Any = None, **kwargs: Any) -> FakeResponse:
+        self.calls += 1
+        if self._latency:
+            time.sleep(self._latency)
+        return FakeResponse(fake_reply(self._prompt(contents, config)))
+
+
+class _FakeAsyncModels(_FakeModels):
+    async def generate_content(self, model: str, contents: str, config: Any = None, **kwargs: Any) -> FakeResponse:
+        self.calls += 1
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return FakeResponse(fake_reply(self._prompt(contents, config)))
+
+    async def generate_content_stream(
+        self, model: str, contents: str, config: Any = None, **kwargs: Any
+    ) -> AsyncIterator[FakeResponse]:
+        self.calls += 1
+        reply = fake_reply(self._prompt(contents, config))
+        chunks = [reply[i:i + self._chunk_size] for i in range(0, len(reply), self._chunk_size)]
+        per_chunk = self._latency / max(1, len(chunks))
+
+        async def stream() -> AsyncIterator[FakeResponse]:
+            for chunk in chunks:
+                if per_chunk:
+                    await asyncio.sleep(per_chunk)
+                yield FakeResponse(chunk)
+
+        return stream()
+
+
+class FakeGenAIClient:
+    """Mirrors the parts of ``google.genai.Client`` the backend uses."""
+
+    def __init__(self, latency: float = 0.0, chunk_size: int = 16, **kwargs: Any):
+        caches = _FakeCaches()
+        self.models = _FakeModels(latency, chunk_size, caches)
+        self.aio = type("aio", (), {})()
+        self.aio.models = _FakeAsyncModels(latency, chunk_size, caches)
+        self.aio.caches = caches
+
+
+@contextmanager
+def fake_gemini(llm_latency: float = 0.0, embed_latency: float = 0.0, embed_dim: int = 768) -> Iterator[FakeEmbedding]:
+    """Route every Gemini client and the default embedding model in the backend to the fakes."""
+    embedding = FakeEmbedding(embed_dim=embed_dim, latency=embed_latency)
+
+    def client(**kwargs: Any) -> FakeGenAIClient:
+        return FakeGenAIClient(latency=llm_latency)
+
+    with patch("google.genai.Client", side_effect=client), \
+         patch("llama_index.embeddings.gemini.GeminiEmbedding", return_value=embedding):
+        yield embedding
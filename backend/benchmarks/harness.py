@@ -0,0 +1,56 @@
+import asyncio
+import resource
+import sys
+import time
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """Latency summary in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ms = np.asarray(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def time_sync(fn: Callable[[], Any], iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def run_clients(request: Callable[[int], Awaitable[Any]], clients: int, requests_per_client: int) -> dict[str, Any]:
+    """Drive ``clients`` concurrent callers and report latency and throughput."""
+    samples: list[float] = []
+
+    async def client(c: int) -> None:
+        for i in range(requests_per_client):
+            start = time.perf_counter()
+            await request(c * requests_per_client + i)
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    elapsed = time.perf_counter() - start
+    return {
+        "clients": clients,
+        **percentiles(samples),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+    }
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -9,17 +10,84 @@ _DATA = os.path.join(_BACKEND, "data")
 
 class Settings(BaseSettings):
     gemini_api_key: str
+    data_dir: str = _DATA
     temporal_host: str = "localhost:7233"
     db_path: str = os.path.join(_DATA, "game.db")
     index_dir: str = os.path.join(_DATA, "indexes")
     active_scenario: str = "ashwood"
+    world_id: str = "default"
     simulation_interval_seconds: int = 1200  # Change to 7200 for 2 hours
+    simulation_fanout_limit: int = 8
+    simulation_enabled: bool = False
+    simulation_hours_per_tick: int = 6
+    simulation_concurrency: int = 4
+    simulation_jitter: float = 0.1  # fraction of the interval
+    simulation_player_idle_seconds: int = 1800
+    simulation_max_backoff_seconds: int = 6 * 3600
+    simulation_max_catchup_ticks: int = 12
+    db_pool_size: int = 8
+    db_cached_statements: int = 256
+    db_acquire_timeout_seconds: float = 10.0  # then the request fails with 503
+    index_cache_max_bytes: int = 256 * 1024 * 1024
+    memory_store_mmap: bool = False
+    memory_journal_fsync: bool = True
+    memory_journal_compact_threshold: int = 256
+    # Approximate search for NPCs with very many memories: "ivf", or empty to
+    # always search exactly. Smaller stores are searched exactly either way.
+    memory_ann_backend: str = ""
+    memory_ann_min_memories: int = 20_000
+    memory_ann_nlist: int = 0  # index cells; 0 picks about sqrt(memories)
+    memory_ann_nprobe: int = 16  # cells scanned per search: recall vs latency
+    embedding_cache_max_entries: int = 100_000
+    embedding_batch_window_ms: float = 5.0
+    io_max_workers: int = 8
+    max_concurrent_chats: int = 32
+    hot_memory_limit: int = 2000
+    consolidation_min_age_hours: float = 24.0
+    consolidation_group_size: int = 20
+    consolidation_max_groups: int = 25
+    cold_search_threshold: float = 0.5
+    retrieval_top_k: int = 5
+    retrieval_memory_types: list[str] = []
+    retrieval_max_age_hours: Optional[float] = None
+    retrieval_recency_weight: float = 0.2
+    retrieval_half_life_hours: float = 72.0
+    retrieval_mmr_lambda: float = 0.7
+    prompt_cache_ttl_seconds: int = 3600
+    prompt_cache_min_chars: int = 4000  # roughly Gemini's 1024-token caching minimum
+    # Shared by every world the process serves; empty is data_dir/embedding_cache.db,
+    # or one file per shard (embedding_cache-<shard>.db) when sharded.
+    embedding_cache_path: str = ""
+    read_cache_max_bytes: int = 32 * 1024 * 1024
+    world_idle_seconds: int = 900
+    max_worlds: int = 5000  # lowered to what the open-file limit (ulimit -n) allows
+    preload: bool = False  # seed every scenario and connect to Temporal before serving
+    shard_index: int = 0
+    shard_count: int = 1
+    trace_file: str = ""  # JSON-lines span export; empty disables it
+    worker_metrics_port: int = 0  # Prometheus endpoint for the Temporal worker; 0 disables it
 
     model_config = SettingsConfigDict(env_file=os.path.join(_BACKEND, ".env"))
 
-    def for_scenario(self, scenario_id: str) -> "Settings":
+    def for_scenario(self, scenario_id: str, world_id: str = "default") -> "Settings":
+        """Settings for one world instance of a scenario. The default world keeps
+        the original per-scenario paths; others live under data_dir/worlds."""
+        from backend.core.scenarios import SCENARIOS
+
+        scenario = next((s for s in SCENARIOS if s["id"] == scenario_id), {})
+        # Scenarios may tune retrieval, e.g. {"retrieval": {"half_life_hours": 24}}.
+        retrieval = {f"retrieval_{k}": v for k, v in scenario.get("retrieval", {}).items()}
+        if world_id == "default":
+            db_path = os.path.join(self.data_dir, f"{scenario_id}.db")
+            index_dir = os.path.join(self.data_dir, "indexes", scenario_id)
+        else:
+            world_dir = os.path.join(self.data_dir, "worlds", scenario_id, world_id)
+            db_path = os.path.join(world_dir, "game.db")
+            index_dir = os.path.join(world_dir, "indexes")
         return self.model_copy(update={
-            "db_path": os.path.join(_DATA, f"{scenario_id}.db"),
-            "index_dir": os.path.join(_DATA, "indexes", scenario_id),
+            **retrieval,
+            "db_path": db_path,
+            "index_dir": index_dir,
             "active_scenario": scenario_id,
+            "world_id": world_id,
         })
@@ -1,9 +1,160 @@
+import bisect
+import itertools
 import json
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Iterator
 
 from backend.core.config import Settings
-from backend.core.models import NPC, NPCPersonality, WorldEvent, WorldState
+from backend.core.feed import WorldFeed
+from backend.core.metrics import cache_result, span, timed
+from backend.core.models import NarrativeRecap, SimulationResult, WorldEvent, WorldState
+from backend.core.records import NPCRecord, PersonalityRecord
+
+_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+RECENT_EVENTS_LIMIT = 10
+
+# Applied in order by init_db; PRAGMA user_version records how many have run.
+_MIGRATIONS = (
+    """
+    CREATE INDEX IF NOT EXISTS idx_world_events_timestamp ON world_events (timestamp);
+
+    CREATE TABLE IF NOT EXISTS event_npcs (
+        event_id TEXT NOT NULL REFERENCES world_events (id),
+        npc_id TEXT NOT NULL,
+        PRIMARY KEY (event_id, npc_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_event_npcs_npc ON event_npcs (npc_id);
+
+    INSERT OR IGNORE INTO event_npcs (event_id, npc_id)
+        SELECT e.id, j.value FROM world_events e, json_each(e.affected_npc_ids) j;
+    """,
+    # Bumped whenever an event or NPC mood changes what prompts are built from.
+    """
+    ALTER TABLE world_state ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recap (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        summary TEXT NOT NULL,
+        key_moments TEXT NOT NULL
+    );
+    """,
+    # Simulation output, handed between the Temporal worker and the API by id.
+    """
+    CREATE TABLE IF NOT EXISTS simulation_results (
+        id TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        result TEXT NOT NULL
+    );
+    """,
+    # Commit order of events, for cursor pagination. Existing events are
+    # numbered by timestamp.
+    """
+    ALTER TABLE world_events ADD COLUMN seq INTEGER;
+    CREATE TEMP TABLE event_seq (id TEXT PRIMARY KEY, seq INTEGER NOT NULL);
+    INSERT INTO temp.event_seq SELECT id, ROW_NUMBER() OVER (ORDER BY timestamp, rowid) FROM world_events;
+    UPDATE world_events SET seq = (SELECT seq FROM temp.event_seq s WHERE s.id = world_events.id);
+    DROP TABLE temp.event_seq;
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_world_events_seq ON world_events (seq);
+    """,
+)
+
+SIMULATION_RESULTS_KEPT = 50
+
+# Shared by every WorldStateCache, so a generation is never reused, even by a
+# world whose pool was closed and reopened.
+_generations = itertools.count(1)
+
+
+class WorldStateCache:
+    """In-memory WorldState for one scenario database.
+
+    Loaded once from SQLite and then kept current by the event write paths,
+    so reading the world state never touches the events table. Every write
+    through this process advances ``generation``.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._state: WorldState | None = None
+        self._recent: list[tuple[str, str]] = []  # (timestamp, description), oldest first
+        self._generation = next(_generations)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, conn: sqlite3.Connection) -> WorldState:
+        with self._lock:
+            state, generation = self._state, self._generation
+            if state is not None:
+                cache_result("world_state", True)
+                return state.model_copy(update={"recent_events": [d for _, d in reversed(self._recent)]})
+        cache_result("world_state", False)
+
+        row = conn.execute("SELECT * FROM world_state WHERE id = 1").fetchone()
+        if not row:
+            return WorldState(description="Unknown world", hours_passed=0)
+        recent = [
+            (e["timestamp"], e["description"])
+            for e in conn.execute(
+                "SELECT timestamp, description FROM world_events ORDER BY timestamp DESC LIMIT ?",
+                (RECENT_EVENTS_LIMIT,),
+            ).fetchall()
+        ]
+        recent.reverse()
+        state = WorldState(description=row["description"], hours_passed=row["hours_passed"], version=row["version"])
+
+        with self._lock:
+            # A write that landed while we were reading makes this load stale.
+            if self._generation == generation:
+                self._state, self._recent = state, recent
+        return state.model_copy(update={"recent_events": [d for _, d in reversed(recent)]})
+
+    def record_event(self, event: WorldEvent, hours: int) -> None:
+        with self._lock:
+            self._generation = next(_generations)
+            if self._state is None:
+                return
+            bisect.insort(self._recent, (event.timestamp.isoformat(), event.description))
+            del self._recent[:-RECENT_EVENTS_LIMIT]
+            self._state = self._state.model_copy(update={
+                "hours_passed": self._state.hours_passed + hours,
+                "version": self._state.version + 1,
+            })
+
+    def bump_version(self) -> None:
+        with self._lock:
+            self._generation = next(_generations)
+            if self._state is not None:
+                self._state = self._state.model_copy(update={"version": self._state.version + 1})
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation = next(_generations)
+            self._state = None
+            self._recent = []
+
+
+class PooledConnection(sqlite3.Connection):
+    world_cache: WorldStateCache | None = None
+    feed: WorldFeed | None = None
 
 
 def get_db(settings: Settings) -> sqlite3.Connection:
@@ -13,6 +164,153 @@ def get_db(settings: Settings) -> sqlite3.Connection:
     return conn
 
 
+class PoolTimeoutError(Exception):
+    """Every connection in a pool stayed busy for the whole acquire timeout."""
+
+
+class ConnectionPool:
+    """A fixed-size pool of WAL-mode connections to one scenario database.
+
+    Connections stay open for the life of the pool, so each keeps its page
+    cache and its compiled-statement cache across requests. WAL lets readers
+    run alongside a simulation's write transaction. Acquiring blocks the
+    calling thread until a connection is free, so async code must use the
+    pool from a worker thread.
+    """
+
+    def __init__(self, db_path: str, size: int = 8, cached_statements: int = 256, acquire_timeout: float = 10.0):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db_path = db_path
+        self._size = size
+        self._cached_statements = cached_statements
+        self._acquire_timeout = acquire_timeout
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._all: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._last_release = time.monotonic()
+        self.world_cache = WorldStateCache()
+        self.feed = WorldFeed()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._db_path,
+            check_same_thread=False,
+            cached_statements=self._cached_statements,
+            factory=PooledConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.world_cache = self.world_cache
+        conn.feed = self.feed
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self._size:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=self._acquire_timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(f"No free connection to {self._db_path} after {self._acquire_timeout:.0f}s")
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        with span("db.acquire"):
+            conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                self._last_release = time.monotonic()
+                if self._closed:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+
+    def shrink(self, idle_since: float) -> None:
+        """Close all but one idle connection if none was released since
+        ``idle_since`` (a ``time.monotonic`` value). The pool regrows on demand."""
+        with self._lock:
+            if self._closed or self._last_release >= idle_since:
+                return
+            keep = None
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if keep is None:
+                    keep = conn
+                else:
+                    conn.close()
+                    self._all.remove(conn)
+            if keep is not None:
+                self._idle.put(keep)
+
+    def close(self) -> None:
+        """Close the idle connections now; ones still in use close as they are released."""
+        self.feed.close()
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._all.clear()
+
+
+class DatabasePools:
+    """One ConnectionPool per scenario database, opened on first use."""
+
+    def __init__(self, size: int = 8, cached_statements: int = 256, acquire_timeout: float = 10.0):
+        self._size = size
+        self._cached_statements = cached_statements
+        self._acquire_timeout = acquire_timeout
+        self._pools: dict[str, ConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def get(self, settings: Settings) -> ConnectionPool:
+        pool = self._pools.get(settings.db_path)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(settings.db_path)
+                if pool is None:
+                    pool = ConnectionPool(settings.db_path, self._size, self._cached_statements, self._acquire_timeout)
+                    self._pools[settings.db_path] = pool
+        return pool
+
+    def shrink(self, idle_since: float) -> None:
+        """Cut pools unused since ``idle_since`` down to one connection each."""
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.shrink(idle_since)
+
+    def evict(self, settings: Settings) -> None:
+        with self._lock:
+            pool = self._pools.pop(settings.db_path, None)
+        if pool is not None:
+            pool.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+
+
+@timed("db.init_db")
 def init_db(conn: sqlite3.Connection) -> None:
     conn.executescript("""
         CREATE TABLE IF NOT EXISTS world_state (
@@ -38,66 +336,217 @@ def init_db(conn: sqlite3.Connection) -> None:
         );
     """)
     conn.commit()
+    _migrate(conn)
+
 
+def _migrate(conn: sqlite3.Connection) -> None:
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, script in enumerate(_MIGRATIONS[version:], start=version + 1):
+        conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {target};\nCOMMIT;")
 
+
+@timed("db.get_world_state")
 def get_world_state(conn: sqlite3.Connection) -> WorldState:
+    cache = getattr(conn, "world_cache", None)
+    if cache is not None:
+        return cache.get(conn)
+    return read_world_state(conn)
+
+
+@timed("db.read_world_state")
+def read_world_state(conn: sqlite3.Connection) -> WorldState:
+    """The world state straight from the database, bypassing any WorldStateCache.
+    For processes that read a world another process writes to."""
     row = conn.execute("SELECT * FROM world_state WHERE id = 1").fetchone()
     if not row:
         return WorldState(description="Unknown world", hours_passed=0)
     events = conn.execute(
-        "SELECT description FROM world_events ORDER BY timestamp DESC LIMIT 10"
+        "SELECT description FROM world_events ORDER BY timestamp DESC LIMIT ?", (RECENT_EVENTS_LIMIT,)
     ).fetchall()
     return WorldState(
         description=row["description"],
         hours_passed=row["hours_passed"],
         recent_events=[e["description"] for e in events],
+        version=row["version"],
     )
 
 
-def save_world_event(conn: sqlite3.Connection, event: WorldEvent) -> None:
+def _insert_world_event(conn: sqlite3.Connection, event: WorldEvent, hours: int = 6) -> None:
     conn.execute(
-        "INSERT INTO world_events (id, description, timestamp, affected_npc_ids) VALUES (?, ?, ?, ?)",
+        """INSERT INTO world_events (id, description, timestamp, affected_npc_ids, seq)
+           VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM world_events))""",
         (event.id, event.description, event.timestamp.isoformat(), json.dumps(event.affected_npc_ids)),
     )
+    conn.executemany(
+        "INSERT OR IGNORE INTO event_npcs (event_id, npc_id) VALUES (?, ?)",
+        [(event.id, npc_id) for npc_id in event.affected_npc_ids],
+    )
     conn.execute(
-        "UPDATE world_state SET hours_passed = hours_passed + 6 WHERE id = 1"
+        "UPDATE world_state SET hours_passed = hours_passed + ?, version = version + 1 WHERE id = 1",
+        (hours,),
     )
+
+
+def _record_event(conn: sqlite3.Connection, event: WorldEvent, hours: int = 6) -> None:
+    cache = getattr(conn, "world_cache", None)
+    if cache is not None:
+        cache.record_event(event, hours=hours)
+
+
+def _publish(conn: sqlite3.Connection, result: SimulationResult) -> None:
+    feed = getattr(conn, "feed", None)
+    if feed is not None:
+        feed.publish(result)
+
+
+@timed("db.save_world_event")
+def save_world_event(conn: sqlite3.Connection, event: WorldEvent) -> None:
+    _insert_world_event(conn, event)
     conn.commit()
+    _record_event(conn, event)
+    _publish(conn, SimulationResult(event=event, npc_reactions={}))
 
 
-def get_npcs(conn: sqlite3.Connection) -> list[NPC]:
-    rows = conn.execute("SELECT * FROM npcs").fetchall()
-    return [
-        NPC(
-            id=row["id"],
-            personality=NPCPersonality(
-                name=row["name"],
-                role=row["role"],
-                backstory=row["backstory"],
-                goals=json.loads(row["goals"]),
-            ),
-            current_mood=row["current_mood"],
+@timed("db.apply_simulation_result")
+def apply_simulation_result(conn: sqlite3.Connection, result: SimulationResult, mood: str = "affected") -> None:
+    """Save every tick's event and every reacting NPC's mood in a single transaction."""
+    ticks = result.ticks
+    reacting = {npc_id for tick in ticks for npc_id in tick.npc_reactions}
+    with conn:
+        for tick in ticks:
+            _insert_world_event(conn, tick.event, tick.hours)
+        conn.executemany(
+            "UPDATE npcs SET current_mood = ? WHERE id = ?",
+            [(mood, npc_id) for npc_id in reacting],
         )
-        for row in rows
-    ]
+    for tick in ticks:
+        _record_event(conn, tick.event, tick.hours)
+    _publish(conn, result)
+
+
+@timed("db.get_world_version")
+def get_world_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT version FROM world_state WHERE id = 1").fetchone()
+    return row["version"] if row else 0
+
+
+@timed("db.save_simulation_result")
+def save_simulation_result(conn: sqlite3.Connection, result_id: str, version: int, result: SimulationResult) -> None:
+    """Store a simulation's output under ``result_id``, keeping only the most recent few."""
+    with conn:
+        conn.execute(
+            "INSERT INTO simulation_results (id, version, result) VALUES (?, ?, ?)",
+            (result_id, version, result.model_dump_json()),
+        )
+        conn.execute(
+            """DELETE FROM simulation_results WHERE rowid NOT IN
+               (SELECT rowid FROM simulation_results ORDER BY rowid DESC LIMIT ?)""",
+            (SIMULATION_RESULTS_KEPT,),
+        )
+
+
+@timed("db.get_simulation_result")
+def get_simulation_result(conn: sqlite3.Connection, result_id: str) -> SimulationResult | None:
+    row = conn.execute("SELECT result FROM simulation_results WHERE id = ?", (result_id,)).fetchone()
+    return SimulationResult.model_validate_json(row["result"]) if row else None
+
+
+@timed("db.get_last_event_time")
+def get_last_event_time(conn: sqlite3.Connection) -> datetime | None:
+    row = conn.execute("SELECT MAX(timestamp) AS ts FROM world_events").fetchone()
+    return datetime.fromisoformat(row["ts"]) if row and row["ts"] else None
 
 
-def get_npc(conn: sqlite3.Connection, npc_id: str) -> NPC | None:
-    row = conn.execute("SELECT * FROM npcs WHERE id = ?", (npc_id,)).fetchone()
+@timed("db.get_cached_recap")
+def get_cached_recap(conn: sqlite3.Connection, version: int) -> NarrativeRecap | None:
+    row = conn.execute("SELECT * FROM recap WHERE id = 1 AND version = ?", (version,)).fetchone()
     if not row:
         return None
-    return NPC(
-        id=row["id"],
-        personality=NPCPersonality(
-            name=row["name"],
-            role=row["role"],
-            backstory=row["backstory"],
-            goals=json.loads(row["goals"]),
-        ),
-        current_mood=row["current_mood"],
-    )
+    return NarrativeRecap(summary=row["summary"], key_moments=json.loads(row["key_moments"]))
+
+
+@timed("db.save_recap")
+def save_recap(conn: sqlite3.Connection, version: int, recap: NarrativeRecap) -> None:
+    # A slow generation for an older version never overwrites a newer recap.
+    with conn:
+        conn.execute(
+            """INSERT INTO recap (id, version, summary, key_moments) VALUES (1, ?, ?, ?)
+               ON CONFLICT (id) DO UPDATE SET version = excluded.version, summary = excluded.summary,
+                   key_moments = excluded.key_moments
+               WHERE excluded.version >= recap.version""",
+            (version, recap.summary, json.dumps(recap.key_moments)),
+        )
+
 
+@timed("db.get_world_events")
+def get_world_events(
+    conn: sqlite3.Connection, after: str | None = None, before: str | None = None, limit: int = 20
+) -> list[WorldEvent] | None:
+    """A page of events in commit order. ``after`` an event id pages forward,
+    oldest first; ``before`` an event id, or no cursor, pages back from it or
+    from the latest event, newest first. None if the cursor event does not exist."""
+    cursor = after or before
+    if cursor is None:
+        rows = conn.execute("SELECT * FROM world_events ORDER BY seq DESC LIMIT ?", (limit,)).fetchall()
+    else:
+        row = conn.execute("SELECT seq FROM world_events WHERE id = ?", (cursor,)).fetchone()
+        if row is None:
+            return None
+        if after is not None:
+            sql = "SELECT * FROM world_events WHERE seq > ? ORDER BY seq LIMIT ?"
+        else:
+            sql = "SELECT * FROM world_events WHERE seq < ? ORDER BY seq DESC LIMIT ?"
+        rows = conn.execute(sql, (row["seq"], limit)).fetchall()
+    return [
+        WorldEvent(
+            id=r["id"],
+            description=r["description"],
+            timestamp=r["timestamp"],
+            affected_npc_ids=json.loads(r["affected_npc_ids"]),
+        )
+        for r in rows
+    ]
+
+
+@timed("db.get_npc_event_ids")
+def get_npc_event_ids(conn: sqlite3.Connection, npc_id: str, limit: int = 20) -> list[str]:
+    rows = conn.execute(
+        """SELECT e.id FROM event_npcs en JOIN world_events e ON e.id = en.event_id
+           WHERE en.npc_id = ? ORDER BY e.timestamp DESC LIMIT ?""",
+        (npc_id, limit),
+    ).fetchall()
+    return [r["id"] for r in rows]
 
+
+_NPC_COLUMNS = "id, name, role, backstory, goals, current_mood"
+
+
+def _npc(row: tuple) -> NPCRecord:
+    npc_id, name, role, backstory, goals, mood = row
+    return NPCRecord(npc_id, PersonalityRecord(name, role, backstory, json.loads(goals)), mood)
+
+
+@timed("db.get_npcs")
+def get_npcs(conn: sqlite3.Connection) -> list[NPCRecord]:
+    cursor = conn.cursor()
+    # Plain tuples: no sqlite3.Row per NPC.
+    cursor.row_factory = None
+    return [_npc(row) for row in cursor.execute(f"SELECT {_NPC_COLUMNS} FROM npcs")]
+
+
+@timed("db.get_npc")
+def get_npc(conn: sqlite3.Connection, npc_id: str) -> NPCRecord | None:
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    row = cursor.execute(f"SELECT {_NPC_COLUMNS} FROM npcs WHERE id = ?", (npc_id,)).fetchone()
+    return _npc(row) if row else None
+
+
+@timed("db.update_npc_mood")
 def update_npc_mood(conn: sqlite3.Connection, npc_id: str, mood: str) -> None:
-    conn.execute("UPDATE npcs SET current_mood = ? WHERE id = ?", (mood, npc_id))
-    conn.commit()
+    with conn:
+        conn.execute("UPDATE npcs SET current_mood = ? WHERE id = ?", (mood, npc_id))
+        conn.execute("UPDATE world_state SET version = version + 1 WHERE id = 1")
+    cache = getattr(conn, "world_cache", None)
+    if cache is not None:
+        cache.bump_version()
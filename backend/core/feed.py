@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from typing import Optional
+
+from backend.core.models import SimulationResult
+
+
+class WorldFeed:
+    """Fans out every simulation result committed to one world to its live subscribers.
+
+    Results are published from the write paths right after they commit, on
+    whatever thread did the write; each subscriber receives them on its own
+    event loop. A subscriber that falls ``max_pending`` results behind, or
+    is still subscribed when the feed closes, receives ``None`` and should
+    catch up from the database.
+    """
+
+    def __init__(self, max_pending: int = 64):
+        self._max_pending = max_pending
+        self._subscribers: dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> "asyncio.Queue[Optional[SimulationResult]]":
+        queue: asyncio.Queue[Optional[SimulationResult]] = asyncio.Queue(self._max_pending + 1)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def publish(self, result: SimulationResult) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, result)
+            except RuntimeError:  # the subscriber's loop has closed
+                self.unsubscribe(queue)
+
+    def close(self) -> None:
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, {}
+        for queue, loop in subscribers.items():
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+            except RuntimeError:
+                pass
+
+    def _offer(self, queue: asyncio.Queue, result: SimulationResult) -> None:
+        if queue not in self._subscribers:
+            return
+        if queue.qsize() >= self._max_pending:
+            # Too far behind to keep up; the last slot is reserved for this.
+            self.unsubscribe(queue)
+            queue.put_nowait(None)
+            return
+        queue.put_nowait(result)
@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Iterator, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Least-recently-used cache bounded by an estimated byte budget.
+
+    Values may grow after insertion (an index gaining memories), so callers
+    re-measure them with ``touch`` after mutating. Safe to share between threads.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[V], int]):
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries: OrderedDict[K, V] = OrderedDict()
+        self._sizes: dict[K, int] = {}
+        self._nbytes = 0
+        self._lock = threading.RLock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[K]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: K, value: V) -> None:
+        with self._lock:
+            self.pop(key)
+            self._entries[key] = value
+            self._sizes[key] = self._sizeof(value)
+            self._nbytes += self._sizes[key]
+            self._evict()
+
+    def touch(self, key: K) -> None:
+        with self._lock:
+            if key not in self._entries:
+                return
+            self._entries.move_to_end(key)
+            size = self._sizeof(self._entries[key])
+            self._nbytes += size - self._sizes[key]
+            self._sizes[key] = size
+            self._evict()
+
+    def pop(self, key: K) -> Optional[V]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._nbytes -= self._sizes.pop(key)
+            return self._entries.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._nbytes = 0
+
+    def _evict(self) -> None:
+        # The most recent entry always stays, even if it alone exceeds the budget.
+        while self._nbytes > self._max_bytes and len(self._entries) > 1:
+            key, _ = self._entries.popitem(last=False)
+            self._nbytes -= self._sizes.pop(key)
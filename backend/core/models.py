@@ -1,5 +1,4 @@
 from datetime import datetime
-from typing import Literal
 from uuid import uuid4
 
 from pydantic import BaseModel, Field
@@ -18,16 +17,11 @@ class NPC(BaseModel):
     current_mood: str = "neutral"
 
 
-class Memory(BaseModel):
-    content: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-    memory_type: Literal["player_interaction", "world_event", "npc_gossip"]
-
-
 class WorldState(BaseModel):
     description: str
     recent_events: list[str] = []
     hours_passed: int = 0
+    version: int = 0
 
 
 class WorldEvent(BaseModel):
@@ -54,10 +48,22 @@ class GossipItem(BaseModel):
     content: str
 
 
-class SimulationResult(BaseModel):
+class SimulationTick(BaseModel):
     event: WorldEvent
     npc_reactions: dict[str, str]
     gossip: list[GossipItem] = []
+    hours: int = 6
+
+
+class SimulationResult(SimulationTick):
+    """The latest tick of a simulation. A multi-tick run lists the ticks before it in ``earlier``."""
+
+    earlier: list[SimulationTick] = []
+
+    @property
+    def ticks(self) -> list[SimulationTick]:
+        """Every tick of the run, oldest first."""
+        return [*self.earlier, self]
 
 
 class NarrativeRecap(BaseModel):
@@ -0,0 +1,45 @@
+"""Slotted records for the objects the hot paths create per row and per memory.
+
+The Pydantic models in ``backend.core.models`` validate what crosses the HTTP
+and Temporal boundaries. Data read back from our own database, or built by
+our own code, is already valid, so inside the process it travels in these
+instead: no validation on construction, no per-instance ``__dict__``.
+Responses serialize them directly (``pydantic_core.to_json`` handles
+dataclasses) in the same JSON shape as the matching model.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Literal, get_args
+
+MemoryType = Literal["player_interaction", "world_event", "npc_gossip", "summary"]
+MEMORY_TYPES: tuple[str, ...] = get_args(MemoryType)
+
+
+@dataclass(slots=True, frozen=True)
+class PersonalityRecord:
+    name: str
+    role: str
+    backstory: str
+    goals: list[str]
+
+
+@dataclass(slots=True, frozen=True)
+class NPCRecord:
+    """An NPC row; serializes like ``models.NPC``."""
+
+    id: str
+    personality: PersonalityRecord
+    current_mood: str = "neutral"
+
+
+@dataclass(slots=True, kw_only=True)
+class Memory:
+    content: str
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+    memory_type: MemoryType
+    player_id: str = ""  # empty for memories every player may see
+
+    def __post_init__(self) -> None:
+        if self.memory_type not in MEMORY_TYPES:
+            raise ValueError(f"Unknown memory type '{self.memory_type}'")
@@ -185,6 +185,8 @@ SCENARIOS = [
         "name": "Byte & Brew",
         "genre": "Modern",
         "tagline": "Demo day is tomorrow. Nothing works.",
+        # Everything happens within a day, so memories go stale fast.
+        "retrieval": {"half_life_hours": 12, "recency_weight": 0.3},
         "description": (
             "A cramped startup office above a coffee shop. Your AI startup 'Byte & Brew' "
             "has a demo for investors tomorrow morning, but the product crashed last night "
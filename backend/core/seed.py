@@ -3,14 +3,19 @@ import json
 from backend.core.config import Settings
 from backend.core.database import get_db, init_db
 from backend.core.scenarios import SCENARIOS
+from backend.core.sharding import owns
 
 
-def seed_scenario(settings: Settings, scenario_id: str) -> None:
-    scenario = next((s for s in SCENARIOS if s["id"] == scenario_id), None)
+def seed_scenario(settings: Settings, scenario_id: str, world_id: str = "default") -> None:
+    seed_world(settings.for_scenario(scenario_id, world_id))
+
+
+def seed_world(scoped: Settings) -> None:
+    """Create the world's database and seed it from its scenario, unless already seeded."""
+    scenario = next((s for s in SCENARIOS if s["id"] == scoped.active_scenario), None)
     if not scenario:
         return
 
-    scoped = settings.for_scenario(scenario_id)
     conn = get_db(scoped)
     init_db(conn)
 
@@ -44,4 +49,5 @@ def seed_scenario(settings: Settings, scenario_id: str) -> None:
 
 def seed_all(settings: Settings) -> None:
     for scenario in SCENARIOS:
-        seed_scenario(settings, scenario["id"])
+        if owns(settings, scenario["id"]):
+            seed_scenario(settings, scenario["id"])
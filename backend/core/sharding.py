@@ -0,0 +1,22 @@
+import zlib
+
+from backend.core.config import Settings
+
+
+def shard_for(scenario_id: str, world_id: str, shard_count: int) -> int:
+    """The worker that owns a world. Stable across restarts, so a world's
+    SQLite file and index directory are only ever opened by one process:
+    the router sends it the world's requests, and its simulation activities
+    arrive on the worker's own ``shard_queue``."""
+    return zlib.crc32(f"{scenario_id}/{world_id}".encode()) % shard_count
+
+
+def shard_queue(prefix: str, shard_index: int) -> str:
+    """The Temporal task queue only the given worker polls."""
+    return f"{prefix}-{shard_index}"
+
+
+def owns(settings: Settings, scenario_id: str, world_id: str = "default") -> bool:
+    if settings.shard_count <= 1:
+        return True
+    return shard_for(scenario_id, world_id, settings.shard_count) == settings.shard_index
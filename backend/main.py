@@ -1,25 +1,48 @@
 import asyncio
+import importlib
 import json
 import logging
+from datetime import timezone
 from contextlib import asynccontextmanager
 from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from temporalio.client import Client
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
 from backend.core.config import Settings
-from backend.core.database import get_db, get_npc, get_npcs, get_world_state, init_db, save_world_event, update_npc_mood
+from backend.core.metrics import REGISTRY, configure_tracing, span
+from backend.core.database import (
+    DatabasePools,
+    PoolTimeoutError,
+    apply_simulation_result,
+    get_last_event_time,
+    get_npc,
+    get_npcs,
+    get_simulation_result,
+    get_world_events,
+    get_world_state,
+    init_db,
+)
 from backend.core.models import ChatRequest, ChatResponse, NarrativeRecap, NPC, ScenarioSummary, SimulationResult, WorldEvent, WorldState
+from backend.core.records import NPCRecord
 from backend.core.scenarios import SCENARIOS
-from backend.core.seed import seed_all
+from backend.core.seed import seed_all, seed_scenario
+from backend.core.sharding import owns, shard_for, shard_queue
 from backend.services.npc_service import NPCService
-from backend.services.world_service import WorldService
-from backend.temporal.workflows import SimulateInput, WorldSimulationWorkflow
+from backend.services.read_cache import CachedResponse, ReadCache
+from backend.services.recap_service import RecapService
+from backend.services.registry import NPCServiceRegistry
+from backend.services.scheduler import SimulationScheduler
+from backend.services.worlds import WorldManager
 
 logger = logging.getLogger("lorekeeper")
 
 TASK_QUEUE = "lorekeeper"
+ACTIVITY_QUEUE = "lorekeeper-worlds"
+STREAM_BACKLOG_PAGE = 200
+STREAM_KEEPALIVE_SECONDS = 15
 
 settings = Settings()
 active_scenario_id: str = "ashwood"
@@ -29,74 +52,291 @@ def _scoped() -> Settings:
     return settings.for_scenario(active_scenario_id)
 
 
-def _npc_service() -> NPCService:
-    return NPCService(_scoped())
+def _world(
+    x_scenario_id: str | None = Header(None),
+    x_world_id: str | None = Header(None),
+) -> Settings:
+    """The world a request targets: X-Scenario-Id / X-World-Id headers (or a
+    /worlds/{scenario}/{world} path prefix), else the active scenario's default world."""
+    scenario_id = x_scenario_id or active_scenario_id
+    world_id = x_world_id or "default"
+    if not owns(settings, scenario_id, world_id):
+        # Sharded deployments route by world; this one belongs to another worker.
+        raise HTTPException(status_code=421, detail=f"World '{scenario_id}/{world_id}' is not served by this shard")
+    if x_scenario_id is None and x_world_id is None:
+        scoped = _scoped()
+        app.state.worlds.open_default(scoped)
+    else:
+        try:
+            scoped = app.state.worlds.get(scenario_id, world_id)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Scenario '{scenario_id}' not found")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    app.state.scheduler.touch(scoped)
+    return scoped
+
+
+def _player(x_player_id: str = Header("")) -> str:
+    if x_player_id.startswith("~"):
+        raise HTTPException(status_code=400, detail="Player ids may not start with '~'")
+    return x_player_id
+
+
+def _npc_service(scoped: Settings | None = None) -> NPCService:
+    return app.state.npc_services.get(scoped or _scoped())
+
+
+def _db(scoped: Settings | None = None):
+    return app.state.db_pools.get(scoped or _scoped()).connection()
+
+
+def _cached_json(cached: CachedResponse, if_none_match: str | None) -> Response:
+    """Serve pre-serialized JSON, or 304 if the client already has this version."""
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or cached.etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+class WorldPathMiddleware:
+    """Serves /worlds/{scenario}/{world}/<path> as /<path> with the world in headers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/worlds/"):
+            parts = scope["path"].split("/", 4)
+            if len(parts) >= 4 and parts[2] and parts[3]:
+                path = "/" + (parts[4] if len(parts) > 4 else "")
+                headers = [h for h in scope["headers"] if h[0] not in (b"x-scenario-id", b"x-world-id")]
+                headers += [(b"x-scenario-id", parts[2].encode()), (b"x-world-id", parts[3].encode())]
+                scope = dict(scope, path=path, raw_path=path.encode(), headers=headers)
+        await self.app(scope, receive, send)
+
 
+class TracingMiddleware:
+    """Opens the root span for each HTTP request; service stages nest under it.
+    Streaming responses are timed until their last byte is sent."""
 
-async def _run_auto_simulation(app: FastAPI):
-    """Background loop that simulates the world automatically."""
-    await asyncio.sleep(settings.simulation_interval_seconds)
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        with span("http.request", **{"http.method": scope["method"], "http.target": scope["path"]}) as request_span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    request_span.set("http.status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
+
+
+async def _release_idle_worlds():
     while True:
+        await asyncio.sleep(60)
         try:
-            scoped = _scoped()
-            conn = get_db(scoped)
-            try:
-                world_state = get_world_state(conn)
-                npcs = get_npcs(conn)
-            finally:
-                conn.close()
-
-            if not npcs:
-                await asyncio.sleep(settings.simulation_interval_seconds)
-                continue
-
-            client: Client = app.state.temporal_client
-            result_json = await client.execute_workflow(
-                WorldSimulationWorkflow.run,
-                SimulateInput(
-                    world_state_json=world_state.model_dump_json(),
-                    npcs_json=json.dumps([n.model_dump() for n in npcs]),
-                    settings_json=scoped.model_dump_json(),
-                ),
-                id=f"auto-simulate-{uuid4()}",
-                task_queue=TASK_QUEUE,
-            )
-
-            result = SimulationResult.model_validate_json(result_json)
-            conn = get_db(scoped)
-            try:
-                save_world_event(conn, result.event)
-                for npc_id in result.npc_reactions:
-                    update_npc_mood(conn, npc_id, "affected")
-            finally:
-                conn.close()
-
-            logger.info(f"Auto-simulation completed for {active_scenario_id}: {result.event.description[:80]}")
+            await asyncio.to_thread(app.state.worlds.evict_idle)
         except Exception as e:
-            logger.warning(f"Auto-simulation failed: {e}")
+            logger.warning(f"Idle world eviction failed: {e}")
+
+
+async def _connect_temporal(max_delay: float = 30.0):
+    """Connect to Temporal in the background, retrying until it is reachable.
+    Until then /ready reports 503 and simulations are refused."""
+    # The SDK takes a fraction of a second to import; keep that off the event loop too.
+    temporal = await asyncio.to_thread(importlib.import_module, "temporalio.client")
+
+    delay = 1.0
+    while True:
+        try:
+            app.state.temporal_client = await temporal.Client.connect(settings.temporal_host)
+            return
+        except Exception as e:
+            logger.warning(f"Temporal at {settings.temporal_host} unavailable, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+
+async def _serve_world_activities(connecting: asyncio.Task):
+    """Run simulation activities for the worlds this process serves, so their
+    memory writes and consolidation go through the same NPC services as chats."""
+    worker = await asyncio.to_thread(importlib.import_module, "temporalio.worker")
+    workflows = await asyncio.to_thread(importlib.import_module, "backend.temporal.workflows")
+    await connecting
+    workflows.configure(settings, app.state.db_pools, app.state.npc_services)
+    try:
+        await worker.Worker(
+            app.state.temporal_client,
+            task_queue=shard_queue(ACTIVITY_QUEUE, settings.shard_index),
+            activities=[
+                workflows.generate_world_event_activity,
+                workflows.update_npc_memories_activity,
+                workflows.consolidate_npc_memories_activity,
+            ],
+        ).run()
+    except Exception as e:
+        logger.warning(f"World activity worker stopped: {e}")
+    finally:
+        workflows.configure(None)
+
+
+def _preload() -> None:
+    """Pay every cold-start cost up front: seed all scenarios and import the
+    Gemini, LlamaIndex and Temporal SDKs."""
+    seed_all(settings)
+    import google.genai  # noqa: F401
+    import llama_index.embeddings.gemini  # noqa: F401
+    import backend.temporal.workflows  # noqa: F401
+
+
+async def _simulate_world(scoped: Settings, hours: int) -> SimulationResult:
+    from temporalio.client import WorkflowFailureError
+    from temporalio.exceptions import ActivityError
+
+    from backend.temporal.workflows import SimulateInput, WorldSimulationWorkflow
 
-        await asyncio.sleep(settings.simulation_interval_seconds)
+    client = app.state.temporal_client
+    if client is None:
+        raise HTTPException(status_code=503, detail="Not connected to Temporal yet")
+
+    version = (await asyncio.to_thread(_world_state, scoped)).version
+
+    try:
+        result_id = await client.execute_workflow(
+            WorldSimulationWorkflow.run,
+            SimulateInput(
+                scenario_id=scoped.active_scenario,
+                world_id=scoped.world_id,
+                world_version=version,
+                fanout_limit=settings.simulation_fanout_limit,
+                hours=hours,
+                activity_queue=shard_queue(
+                    ACTIVITY_QUEUE, shard_for(scoped.active_scenario, scoped.world_id, settings.shard_count)
+                ),
+            ),
+            id=f"simulate-{uuid4()}",
+            task_queue=TASK_QUEUE,
+        )
+    except WorkflowFailureError as e:
+        if isinstance(e.cause, ActivityError) and getattr(e.cause.cause, "type", None) == "StaleWorld":
+            raise HTTPException(status_code=409, detail="The world changed while it was being simulated")
+        raise
+
+    result = await asyncio.to_thread(_apply_result, scoped, result_id)
+    # Returning players read the recap next; have it ready before they ask.
+    app.state.recaps.refresh(scoped)
+    return result
+
+
+def _world_state(scoped: Settings) -> WorldState:
+    with _db(scoped) as conn:
+        return get_world_state(conn)
+
+
+def _apply_result(scoped: Settings, result_id: str) -> SimulationResult:
+    with _db(scoped) as conn:
+        result = get_simulation_result(conn, result_id)
+        apply_simulation_result(conn, result)
+    return result
+
+
+def _chat_context(scoped: Settings, npc_id: str) -> tuple[NPCService, NPCRecord, WorldState]:
+    # Run on a thread: the first NPC service in the process imports the SDKs.
+    with _db(scoped) as conn:
+        npc = get_npc(conn, npc_id)
+        if not npc:
+            raise HTTPException(status_code=404, detail=f"NPC '{npc_id}' not found")
+        world_state = get_world_state(conn)
+    return _npc_service(scoped), npc, world_state
+
+
+def _last_tick(scoped: Settings) -> float | None:
+    with _db(scoped) as conn:
+        last = get_last_event_time(conn)
+    return None if last is None else last.replace(tzinfo=timezone.utc).timestamp()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    seed_all(settings)
-    app.state.temporal_client = await Client.connect(settings.temporal_host)
-    # Auto-simulation disabled for now. Uncomment to enable:
-    # task = asyncio.create_task(_run_auto_simulation(app))
+    configure_tracing(settings.trace_file)
+    if settings.preload:
+        await asyncio.to_thread(_preload)
+    app.state.db_pools = DatabasePools(
+        settings.db_pool_size, settings.db_cached_statements, settings.db_acquire_timeout_seconds
+    )
+    app.state.npc_services = NPCServiceRegistry()
+    app.state.recaps = RecapService(app.state.db_pools)
+    app.state.reads = ReadCache(app.state.db_pools, settings.read_cache_max_bytes)
+    app.state.scheduler = SimulationScheduler(settings, _simulate_world, _last_tick)
+
+    def on_evict(scoped: Settings) -> None:
+        app.state.recaps.evict(scoped)
+        app.state.reads.evict(scoped)
+        app.state.scheduler.forget(scoped)
+
+    app.state.worlds = WorldManager(settings, app.state.db_pools, app.state.npc_services, on_evict)
+    app.state.temporal_client = None
+    connecting = asyncio.create_task(_connect_temporal())
+    if settings.preload:
+        await connecting
+    tasks = [
+        connecting,
+        asyncio.create_task(_serve_world_activities(connecting)),
+        asyncio.create_task(_release_idle_worlds()),
+    ]
+    if settings.simulation_enabled:
+        tasks.append(asyncio.create_task(app.state.scheduler.run()))
     yield
-    # task.cancel()
+    for task in tasks:
+        task.cancel()
+    await app.state.scheduler.close()
+    await app.state.recaps.close()
+    app.state.worlds.close()
+    app.state.npc_services.clear()
+    app.state.db_pools.close()
+    configure_tracing("")
 
 
 app = FastAPI(title="Lorekeeper", lifespan=lifespan)
+app.add_middleware(WorldPathMiddleware)
+app.add_middleware(TracingMiddleware)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout(request, exc: PoolTimeoutError):
+    return JSONResponse({"detail": "The world's database is busy; try again"}, status_code=503)
+
+
 @app.get("/")
 def health():
     return {"status": "healthy", "service": "Lorekeeper", "active_scenario": active_scenario_id}
 
 
+@app.get("/ready")
+def ready():
+    """Readiness: 503 until the Temporal connection is up. ``/`` stays a liveness check."""
+    temporal = app.state.temporal_client is not None
+    return JSONResponse(
+        {"status": "ready" if temporal else "starting", "temporal": temporal},
+        status_code=200 if temporal else 503,
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/scenarios", response_model=list[ScenarioSummary])
 def list_scenarios():
     return [
@@ -105,9 +345,8 @@ def list_scenarios():
     ]
 
 
-@app.get("/scenarios/active/starters")
-def get_starters():
-    scenario = next((s for s in SCENARIOS if s["id"] == active_scenario_id), None)
+def _starters(scenario_id: str) -> dict[str, list[str]]:
+    scenario = next((s for s in SCENARIOS if s["id"] == scenario_id), None)
     if not scenario:
         return {}
     return {
@@ -116,6 +355,12 @@ def get_starters():
     }
 
 
+@app.get("/scenarios/active/starters")
+async def get_starters(scoped: Settings = Depends(_world), if_none_match: str | None = Header(None)):
+    cached = await app.state.reads.get(scoped, "starters", lambda _: _starters(scoped.active_scenario))
+    return _cached_json(cached, if_none_match)
+
+
 @app.post("/scenarios/{scenario_id}/activate")
 def activate_scenario(scenario_id: str):
     global active_scenario_id
@@ -123,128 +368,168 @@ def activate_scenario(scenario_id: str):
     if not scenario:
         raise HTTPException(status_code=404, detail=f"Scenario '{scenario_id}' not found")
 
+    if scenario_id != active_scenario_id:
+        app.state.npc_services.invalidate(_scoped())
+
     active_scenario_id = scenario_id
-    scoped = _scoped()
-    conn = get_db(scoped)
-    init_db(conn)
+    with _db() as conn:
+        init_db(conn)
+        seeded = conn.execute("SELECT COUNT(*) FROM npcs").fetchone()[0] > 0
 
-    if conn.execute("SELECT COUNT(*) FROM npcs").fetchone()[0] == 0:
-        from backend.core.seed import seed_scenario
+    if not seeded:
         seed_scenario(settings, scenario_id)
-
-    conn.close()
+        app.state.db_pools.get(_scoped()).world_cache.invalidate()
     return {"status": "activated", "scenario": scenario_id}
 
 
 @app.get("/world", response_model=WorldState)
-def get_world():
-    conn = get_db(_scoped())
-    try:
-        return get_world_state(conn)
-    finally:
-        conn.close()
+async def get_world(scoped: Settings = Depends(_world), if_none_match: str | None = Header(None)):
+    return _cached_json(await app.state.reads.get(scoped, "world", get_world_state), if_none_match)
 
 
 @app.get("/npcs", response_model=list[NPC])
-def list_npcs():
-    conn = get_db(_scoped())
-    try:
-        return get_npcs(conn)
-    finally:
-        conn.close()
+async def list_npcs(scoped: Settings = Depends(_world), if_none_match: str | None = Header(None)):
+    return _cached_json(await app.state.reads.get(scoped, "npcs", get_npcs), if_none_match)
 
 
 @app.get("/npc/{npc_id}", response_model=NPC)
-def get_single_npc(npc_id: str):
-    conn = get_db(_scoped())
-    try:
-        npc = get_npc(conn, npc_id)
-        if not npc:
-            raise HTTPException(status_code=404, detail=f"NPC '{npc_id}' not found")
-        return npc
-    finally:
-        conn.close()
+async def get_single_npc(npc_id: str, scoped: Settings = Depends(_world), if_none_match: str | None = Header(None)):
+    cached = await app.state.reads.get(scoped, ("npc", npc_id), lambda conn: get_npc(conn, npc_id))
+    if cached is None:
+        raise HTTPException(status_code=404, detail=f"NPC '{npc_id}' not found")
+    return _cached_json(cached, if_none_match)
 
 
 @app.post("/npc/{npc_id}/chat", response_model=ChatResponse)
-async def chat_with_npc(npc_id: str, request: ChatRequest):
-    scoped = _scoped()
-    conn = get_db(scoped)
-    try:
-        npc = get_npc(conn, npc_id)
-        if not npc:
-            raise HTTPException(status_code=404, detail=f"NPC '{npc_id}' not found")
-        world_state = get_world_state(conn)
-    finally:
-        conn.close()
-
-    return await _npc_service().chat(npc, world_state, request)
-
-
-@app.post("/world/simulate", response_model=SimulationResult)
-async def simulate_world():
-    scoped = _scoped()
-    conn = get_db(scoped)
-    try:
-        world_state = get_world_state(conn)
-        npcs = get_npcs(conn)
-    finally:
-        conn.close()
-
-    client: Client = app.state.temporal_client
-    result_json = await client.execute_workflow(
-        WorldSimulationWorkflow.run,
-        SimulateInput(
-            world_state_json=world_state.model_dump_json(),
-            npcs_json=json.dumps([n.model_dump() for n in npcs]),
-            settings_json=scoped.model_dump_json(),
-        ),
-        id=f"simulate-{uuid4()}",
-        task_queue=TASK_QUEUE,
+async def chat_with_npc(
+    npc_id: str,
+    request: ChatRequest,
+    scoped: Settings = Depends(_world),
+    player_id: str = Depends(_player),
+):
+    service, npc, world_state = await asyncio.to_thread(_chat_context, scoped, npc_id)
+    return await service.chat(npc, world_state, request, player_id)
+
+
+@app.post("/npc/{npc_id}/chat/stream")
+async def chat_with_npc_stream(
+    npc_id: str,
+    request: ChatRequest,
+    scoped: Settings = Depends(_world),
+    player_id: str = Depends(_player),
+):
+    service, npc, world_state = await asyncio.to_thread(_chat_context, scoped, npc_id)
+    reply: list[ChatResponse] = []
+
+    async def events():
+        async for event, data in service.chat_stream(npc, world_state, request, player_id):
+            if event == "done":
+                reply.append(data)
+                data = data.model_dump()
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    async def remember():
+        # Only runs once the stream has been fully sent; a dropped client leaves no memory.
+        if reply:
+            await service.remember_chat(npc.id, request, reply[0].npc_dialogue, player_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(remember),
     )
 
-    result = SimulationResult.model_validate_json(result_json)
-
-    conn = get_db(scoped)
-    try:
-        save_world_event(conn, result.event)
-        for npc_id in result.npc_reactions:
-            update_npc_mood(conn, npc_id, "affected")
-    finally:
-        conn.close()
 
+@app.post("/world/simulate", response_model=SimulationResult)
+async def simulate_world(
+    scoped: Settings = Depends(_world),
+    hours: int | None = Query(None, ge=1, le=24 * 30),
+):
+    """Advance the world by ``hours`` (one tick by default). Longer spans are
+    simulated as several events in a single generation."""
+    result = await _simulate_world(scoped, hours or settings.simulation_hours_per_tick)
+    app.state.scheduler.ticked(scoped)
     return result
 
 
 @app.get("/world/events", response_model=list[WorldEvent])
-def get_events():
-    conn = get_db(_scoped())
-    try:
-        rows = conn.execute(
-            "SELECT * FROM world_events ORDER BY timestamp DESC LIMIT 20"
-        ).fetchall()
-        return [
-            WorldEvent(
-                id=r["id"],
-                description=r["description"],
-                timestamp=r["timestamp"],
-                affected_npc_ids=json.loads(r["affected_npc_ids"]),
-            )
-            for r in rows
-        ]
-    finally:
-        conn.close()
+async def get_events(
+    scoped: Settings = Depends(_world),
+    after: str | None = None,
+    before: str | None = None,
+    limit: int = Query(20, ge=1, le=200),
+    if_none_match: str | None = Header(None),
+):
+    """The latest events, newest first. Page back with ``before=<event id>``;
+    fetch what came after an event, oldest first, with ``after=<event id>``."""
+    if after and before:
+        raise HTTPException(status_code=400, detail="Pass either 'after' or 'before', not both")
+    cached = await app.state.reads.get(
+        scoped, ("events", after, before, limit), lambda conn: get_world_events(conn, after, before, limit)
+    )
+    if cached is None:
+        raise HTTPException(status_code=404, detail=f"Event '{after or before}' not found")
+    return _cached_json(cached, if_none_match)
+
+
+def _sse(event: str, data: str, id: str | None = None) -> str:
+    return (f"id: {id}\n" if id else "") + f"event: {event}\ndata: {data}\n\n"
+
+
+@app.get("/world/events/stream")
+async def stream_events(
+    scoped: Settings = Depends(_world),
+    after: str | None = None,
+    last_event_id: str | None = Header(None),
+):
+    """Server-sent events: each simulation result as it commits. A client that
+    reconnects with Last-Event-ID (or passes ``after``) first gets the events it
+    missed, as ``world_event`` messages."""
+    feed = app.state.db_pools.get(scoped).feed
+    # Subscribe before reading the backlog, so nothing commits unseen in between.
+    subscription = feed.subscribe()
+    cursor = last_event_id or after
+    backlog: list[WorldEvent] = []
+    while cursor:
+        page = await asyncio.to_thread(_read_events, scoped, cursor)
+        if page is None:
+            feed.unsubscribe(subscription)
+            raise HTTPException(status_code=404, detail=f"Event '{cursor}' not found")
+        backlog += page
+        cursor = page[-1].id if len(page) == STREAM_BACKLOG_PAGE else None
+
+    async def events():
+        try:
+            for event in backlog:
+                yield _sse("world_event", event.model_dump_json(), event.id)
+            replayed = {event.id for event in backlog}
+            while True:
+                try:
+                    result = await asyncio.wait_for(subscription.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if result is None:
+                    # Fell behind or the world closed; the client reconnects with Last-Event-ID.
+                    return
+                if result.event.id not in replayed:
+                    yield _sse("simulation", result.model_dump_json(), result.event.id)
+        finally:
+            feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
-@app.get("/world/recap", response_model=NarrativeRecap)
-def get_recap():
-    scoped = _scoped()
-    conn = get_db(scoped)
-    try:
-        world_state = get_world_state(conn)
-        npcs = get_npcs(conn)
-    finally:
-        conn.close()
+def _read_events(scoped: Settings, after: str) -> list[WorldEvent] | None:
+    with _db(scoped) as conn:
+        return get_world_events(conn, after=after, limit=STREAM_BACKLOG_PAGE)
+
 
-    ws = WorldService(scoped)
-    return ws.generate_recap(world_state, npcs)
+@app.get("/world/recap", response_model=NarrativeRecap)
+async def get_recap(scoped: Settings = Depends(_world)):
+    return await app.state.recaps.get(scoped)
@@ -0,0 +1,88 @@
+import logging
+from typing import Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from backend.core.sharding import shard_for
+
+logger = logging.getLogger("lorekeeper")
+
+# Hop-by-hop headers plus the ones httpx recomputes for the upstream request.
+_DROP_HEADERS = {"host", "connection", "keep-alive", "transfer-encoding", "content-length", "upgrade"}
+
+
+def _world_key(request: Request, active_scenario: str) -> tuple[str, str, str]:
+    """(scenario, world, upstream path) for a request, read the same way the
+    workers do: /worlds/{scenario}/{world} prefix, then headers, then the
+    active scenario's default world."""
+    path = request.url.path
+    if path.startswith("/worlds/"):
+        parts = path.split("/", 4)
+        if len(parts) >= 4 and parts[2] and parts[3]:
+            return parts[2], parts[3], "/" + (parts[4] if len(parts) > 4 else "")
+    scenario = request.headers.get("x-scenario-id") or active_scenario
+    world = request.headers.get("x-world-id") or "default"
+    return scenario, world, path
+
+
+def create_router(
+    shard_urls: list[str],
+    active_scenario: str = "ashwood",
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> FastAPI:
+    """A thin front end that forwards each request to the worker owning its world.
+
+    Every world is pinned to one shard by ``shard_for``, so its database writes
+    and warm memory indexes stay in a single process. Requests are forwarded
+    with explicit X-Scenario-Id / X-World-Id headers; the router tracks the
+    active scenario itself, since each worker only sees activations for the
+    scenarios it owns.
+    """
+    state = {"active": active_scenario}
+    client = httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(None, connect=5.0))
+
+    async def lifespan(app: FastAPI):
+        yield
+        await client.aclose()
+
+    router = FastAPI(title="Lorekeeper router", lifespan=lifespan)
+    router.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+    @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+    async def forward(request: Request, path: str):
+        scenario, world, upstream_path = _world_key(request, state["active"])
+        activate = upstream_path.startswith("/scenarios/") and upstream_path.endswith("/activate")
+        if activate:
+            scenario, world = upstream_path.split("/")[2], "default"
+        shard = shard_for(scenario, world, len(shard_urls))
+
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in _DROP_HEADERS]
+        headers = [(k, v) for k, v in headers if k.lower() not in ("x-scenario-id", "x-world-id")]
+        headers += [("x-scenario-id", scenario), ("x-world-id", world)]
+        upstream = client.build_request(
+            request.method,
+            shard_urls[shard] + upstream_path,
+            params=request.query_params,
+            headers=headers,
+            content=await request.body(),
+        )
+        try:
+            response = await client.send(upstream, stream=True)
+        except httpx.TransportError as e:
+            logger.warning(f"Shard {shard} unreachable for {scenario}/{world}: {e}")
+            return JSONResponse({"detail": f"Shard {shard} unavailable"}, status_code=503)
+
+        if activate and response.status_code == 200:
+            state["active"] = scenario
+        return StreamingResponse(
+            response.aiter_raw(),
+            status_code=response.status_code,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS},
+            background=BackgroundTask(response.aclose),
+        )
+
+    return router
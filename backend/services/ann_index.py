@@ -0,0 +1,144 @@
+"""Approximate nearest-neighbour indexes for very large memory stores.
+
+An index only narrows a search to candidate rows; ``MemoryStore`` then scores
+those rows exactly, so type/age/player filters, recency and MMR behave as in
+an exact search. Backends are registered by name in ``ANN_BACKENDS`` and
+provide ``train``, ``from_arrays``, ``arrays``, ``add``, ``remap`` and
+``probe``.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Mapping
+
+import numpy as np
+
+_KMEANS_ITERATIONS = 10
+_ASSIGN_BATCH = 8192
+
+
+@dataclass(frozen=True)
+class ANNOptions:
+    """When a store builds an approximate index, and its recall/latency knobs."""
+
+    backend: str = "ivf"
+    min_memories: int = 20_000  # smaller stores are always searched exactly
+    nlist: int = 0  # cells; 0 picks about sqrt(memories)
+    nprobe: int = 16  # cells scanned per search: higher means better recall, slower
+    retrain_growth: float = 2.0  # retrain once the store has grown by this factor
+    train_sample: int = 64  # training rows per cell
+
+    def __post_init__(self) -> None:
+        if self.backend not in ANN_BACKENDS:
+            raise ValueError(f"Unknown ANN backend '{self.backend}'")
+
+
+def _nearest(rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for each row, in batches to bound memory."""
+    cells = np.empty(len(rows), dtype=np.int32)
+    for start in range(0, len(rows), _ASSIGN_BATCH):
+        batch = np.asarray(rows[start : start + _ASSIGN_BATCH], dtype=np.float32)
+        cells[start : start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+    return cells
+
+
+class IVFIndex:
+    """Inverted-file index: spherical k-means cells over the unit-normalized rows.
+
+    A search scores the centroids and returns the rows of the ``nprobe`` most
+    similar cells. New rows are assigned to their nearest centroid as they
+    are added; only retraining moves the centroids.
+    """
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray, nprobe: int, trained_size: int):
+        self.centroids = centroids
+        self.nprobe = nprobe
+        self.trained_size = trained_size
+        self._assignments = assignments  # row -> cell; grows by doubling
+        self._size = len(assignments)
+        self._build_lists()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dim(self) -> int:
+        return self.centroids.shape[1]
+
+    @classmethod
+    def train(cls, rows: np.ndarray, options: ANNOptions, seed: int = 0) -> "IVFIndex":
+        n = len(rows)
+        nlist = min(options.nlist or max(1, round(math.sqrt(n))), n)
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(rows[np.sort(rng.choice(n, min(n, nlist * options.train_sample), replace=False))])
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+        for _ in range(_KMEANS_ITERATIONS):
+            labels = _nearest(sample, centroids)
+            counts = np.bincount(labels, minlength=nlist)
+            filled = counts > 0
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.add.reduceat(sample[np.argsort(labels, kind="stable")], starts[filled])
+            centroids[filled] = sums
+            # Cells that lost every row restart from a random training row.
+            centroids[~filled] = sample[rng.choice(len(sample), int((~filled).sum()))]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        return cls(centroids, _nearest(rows, centroids), options.nprobe, n)
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray], options: ANNOptions) -> "IVFIndex":
+        return cls(
+            arrays["centroids"].astype(np.float32),
+            arrays["assignments"].astype(np.int32),
+            options.nprobe,
+            int(arrays["trained_size"]),
+        )
+
+    def arrays(self, size: int) -> dict[str, np.ndarray]:
+        """The persisted form, covering the first ``size`` rows."""
+        return {
+            "centroids": self.centroids,
+            "assignments": self._assignments[:size].copy(),
+            "trained_size": np.array(self.trained_size),
+        }
+
+    def matches(self, options: ANNOptions) -> bool:
+        """Whether this index was built with ``options``' cell count."""
+        return not options.nlist or len(self.centroids) == min(options.nlist, self.trained_size)
+
+    def _build_lists(self) -> None:
+        assignments = self._assignments[: self._size]
+        self._counts = np.bincount(assignments, minlength=len(self.centroids))
+        order = np.argsort(assignments, kind="stable")
+        # Views into ``order``; a list is copied out only when it outgrows its slot.
+        self._lists = np.split(order, np.cumsum(self._counts)[:-1])
+
+    def add(self, rows: np.ndarray) -> None:
+        """Append ``rows``, which take the next row positions in order."""
+        cells = _nearest(rows, self.centroids)
+        if self._size + len(cells) > len(self._assignments):
+            self._assignments = np.resize(self._assignments, max(64, (self._size + len(cells)) * 2))
+        self._assignments[self._size : self._size + len(cells)] = cells
+        for row, cell in enumerate(cells, start=self._size):
+            members, count = self._lists[cell], self._counts[cell]
+            if count == len(members):
+                members = self._lists[cell] = np.resize(members, max(8, count * 2))
+            members[count] = row
+            self._counts[cell] += 1
+        self._size += len(cells)
+
+    def remap(self, keep: np.ndarray) -> None:
+        """Drop the rows not in the boolean mask ``keep``, renumbering the rest."""
+        self._assignments = self._assignments[: self._size][keep]
+        self._size = len(self._assignments)
+        self._build_lists()
+
+    def probe(self, query: np.ndarray) -> np.ndarray:
+        """Sorted positions of the rows in the cells most similar to ``query``."""
+        nprobe = min(self.nprobe, len(self.centroids))
+        cells = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.sort(np.concatenate([self._lists[c][: self._counts[c]] for c in cells]))
+
+
+ANN_BACKENDS: dict[str, type[IVFIndex]] = {"ivf": IVFIndex}
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import numpy as np
+
+
+def select_for_consolidation(
+    ids: list[str],
+    timestamps: np.ndarray,
+    hits: np.ndarray,
+    owners: np.ndarray,
+    hot_limit: int,
+    min_age_seconds: float,
+    group_size: int,
+    max_groups: int,
+    now: datetime,
+) -> list[list[str]]:
+    """Pick old, rarely retrieved memories to fold into summaries.
+
+    Nothing happens until the hot tier exceeds ``hot_limit``; then enough
+    memories are taken to bring it back to three quarters of the limit, so
+    consolidation doesn't run again on the very next tick. The least
+    retrieved memories go first (oldest on ties). Groups never mix players'
+    memories, and each is ordered by time so a summary covers one stretch of
+    the NPC's history with one player.
+    """
+    n = len(ids)
+    if n <= hot_limit or group_size < 2:
+        return []
+
+    eligible = np.flatnonzero(timestamps <= now.timestamp() - min_age_seconds)
+    excess = min(n - hot_limit * 3 // 4, max_groups * group_size)
+    order = eligible[np.lexsort((timestamps[eligible], hits[eligible]))]
+    chosen = order[: excess + (-excess) % group_size]
+    chosen = chosen[np.lexsort((timestamps[chosen], owners[chosen]))]
+
+    groups = []
+    for owner in np.unique(owners[chosen]):
+        mine = chosen[owners[chosen] == owner]
+        groups.extend([ids[i] for i in mine[g : g + group_size]] for g in range(0, len(mine), group_size))
+    return [g for g in groups if len(g) > 1]
+
+
+def summary_prompt(memories: list[str]) -> str:
+    listed = "\n".join(f"- {m}" for m in memories)
+    return f"""You are maintaining the long-term memory of a character in a fantasy game.
+
+Condense these older memories into one short paragraph written from the character's point of view. Keep names, promises, debts, grudges and anything the player asked for; drop small talk.
+
+MEMORIES:
+{listed}
+
+Respond with the summary paragraph only."""
@@ -0,0 +1,97 @@
+import json
+import re
+
+_DIALOGUE_KEY = re.compile(r'"dialogue"\s*:\s*"')
+_HEX = re.compile(r"[0-9a-fA-F]{4}")
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class DialogueStreamParser:
+    """Incrementally extracts the ``dialogue`` string from a streamed
+    ``{"dialogue": ..., "choices": [...]}`` reply.
+
+    ``feed`` returns only the newly decoded dialogue text, holding back any
+    escape sequence split across chunks. If the model answers in plain text
+    instead of JSON the raw text is passed through, matching the fallback in
+    ``NPCService.chat``.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self._pos = 0
+        self._mode = "detect"  # detect -> json | plain; json -> value -> done
+
+    def feed(self, chunk: str) -> str:
+        self.text += chunk
+        if self._mode == "detect":
+            self._detect()
+        if self._mode == "plain":
+            delta = self.text[self._pos:]
+            self._pos = len(self.text)
+            return delta
+        if self._mode == "json":
+            match = _DIALOGUE_KEY.search(self.text, self._pos)
+            if not match:
+                return ""
+            self._pos = match.end()
+            self._mode = "value"
+        if self._mode == "value":
+            return self._decode()
+        return ""
+
+    def _detect(self) -> None:
+        stripped = self.text.lstrip()
+        if stripped.startswith("```"):
+            newline = self.text.find("\n", self.text.index("```"))
+            if newline == -1:
+                return
+            stripped = self.text[newline + 1:].lstrip()
+        if not stripped:
+            return
+        self._pos = len(self.text) - len(stripped)
+        self._mode = "json" if stripped.startswith("{") else "plain"
+
+    def _decode(self) -> str:
+        out = []
+        text, i = self.text, self._pos
+        while i < len(text):
+            ch = text[i]
+            if ch == '"':
+                self._mode = "done"
+                i += 1
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            if i + 1 >= len(text):
+                break
+            esc = text[i + 1]
+            if esc in _SIMPLE_ESCAPES:
+                out.append(_SIMPLE_ESCAPES[esc])
+                i += 2
+                continue
+            if esc != "u":
+                # Invalid escape; keep it verbatim rather than stalling the stream.
+                out.append(text[i:i + 2])
+                i += 2
+                continue
+            end = i + 6
+            if end > len(text):
+                break
+            if not _HEX.fullmatch(text, i + 2, end):
+                out.append(text[i:end])
+                i = end
+                continue
+            if 0xD800 <= int(text[i + 2:end], 16) <= 0xDBFF:
+                # High surrogate: wait for its low half so the pair decodes together.
+                end = i + 12
+                if end > len(text):
+                    break
+            try:
+                out.append(json.loads(f'"{text[i:end]}"'))
+            except json.JSONDecodeError:
+                out.append(text[i:end])
+            i = end
+        self._pos = i
+        return "".join(out)
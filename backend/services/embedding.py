@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+import numpy as np
+
+from backend.core.metrics import CACHE_REQUESTS
+
+if TYPE_CHECKING:
+    from llama_index.core.base.embeddings.base import BaseEmbedding
+
+Vector = list[float]
+
+_TOUCH_FLUSH = 256  # pending recency updates written in one transaction
+
+
+class EmbeddingCache:
+    """Persistent content-hash -> vector cache with LRU eviction.
+
+    Backed by a small SQLite file so cached vectors survive restarts; entries
+    past ``max_entries`` are evicted least-recently-used first. Lookups are
+    read-only: hits are timestamped in memory and written in batches, before
+    any eviction so the order it sees is current.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 100_000):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self._touched: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get_many(self, keys: list[str]) -> dict[str, Vector]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+            ).fetchall()
+            now = time.time_ns()
+            self._touched.update((k, now) for k, _ in rows)
+            if len(self._touched) >= _TOUCH_FLUSH:
+                self._flush_touched()
+                self._conn.commit()
+        return {k: np.frombuffer(v, dtype=np.float32).tolist() for k, v in rows}
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def put_many(self, items: dict[str, Vector]) -> None:
+        if not items:
+            return
+        now = time.time_ns()
+        with self._lock:
+            self._flush_touched()
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(k, np.asarray(v, dtype=np.float32).tobytes(), now) for k, v in items.items()],
+            )
+            self._count += self._conn.total_changes - before
+            if self._count > self._max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (self._count - self._max_entries,),
+                )
+                self._count = self._max_entries
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+class _Coalescer:
+    """Gathers concurrent requests for a short window and issues them as one batch call."""
+
+    def __init__(self, fn: Callable[[list[str]], Awaitable[list[Vector]]], window: float, max_batch: int):
+        self._fn = fn
+        self._window = window
+        self._max_batch = max_batch
+        self._pending: dict[str, list[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, text: str) -> Vector:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(text, []).append(future)
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[str, list[asyncio.Future]]) -> None:
+        texts = list(batch)
+        try:
+            vectors = await self._fn(texts)
+        except Exception as e:
+            for futures in batch.values():
+                for f in futures:
+                    if not f.done():
+                        f.set_exception(e)
+            return
+        for text, vector in zip(texts, vectors):
+            for f in batch[text]:
+                if not f.done():
+                    f.set_result(vector)
+
+
+class EmbeddingService:
+    """Cached, batched front end to a LlamaIndex embedding model.
+
+    Identical texts are embedded once and then served from the cache.
+    Concurrent async misses within ``batch_window`` seconds are sent to the
+    model as a single batch call. Async callers reach the cache on
+    ``executor`` (the loop's default if None), never on the event loop.
+    """
+
+    def __init__(
+        self,
+        embed_model: "BaseEmbedding",
+        cache: Optional[EmbeddingCache] = None,
+        batch_window: float = 0.005,
+        max_batch: int = 100,
+        batch_queries: bool = False,
+        executor: Optional[Executor] = None,
+    ):
+        self._model = embed_model
+        self._cache = cache
+        self._executor = executor
+        self._model_name = getattr(embed_model, "model_name", None) or embed_model.class_name()
+        self._texts = _Coalescer(embed_model.aget_text_embedding_batch, batch_window, max_batch)
+        # Queries can only share the document batch call when the model embeds
+        # both the same way; otherwise each distinct query is its own call.
+        query_batch = embed_model.aget_text_embedding_batch if batch_queries else self._aget_query_embeddings
+        self._queries = _Coalescer(query_batch, batch_window, max_batch)
+        self.hits = 0
+        self.misses = 0
+
+    async def _aget_query_embeddings(self, queries: list[str]) -> list[Vector]:
+        return list(await asyncio.gather(*(self._model.aget_query_embedding(q) for q in queries)))
+
+    def _key(self, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{self._model_name}\0{kind}\0{text}".encode()).hexdigest()
+
+    def _lookup(self, kind: str, texts: list[str]) -> tuple[list[str], dict[str, Vector]]:
+        keys = [self._key(kind, t) for t in texts]
+        found = self._cache.get_many(list(set(keys))) if self._cache is not None else {}
+        hits = sum(k in found for k in keys)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        if hits:
+            CACHE_REQUESTS.inc("embedding", "hit", amount=hits)
+        if len(keys) > hits:
+            CACHE_REQUESTS.inc("embedding", "miss", amount=len(keys) - hits)
+        return keys, found
+
+    def _store(self, kind: str, vectors: dict[str, Vector]) -> None:
+        if self._cache is not None:
+            self._cache.put_many({self._key(kind, t): v for t, v in vectors.items()})
+
+    def embed_texts(self, texts: list[str]) -> list[Vector]:
+        return self._embed_sync("text", texts, self._model.get_text_embedding_batch)
+
+    def embed_query(self, query: str) -> Vector:
+        return self._embed_sync("query", [query], lambda qs: [self._model.get_query_embedding(q) for q in qs])[0]
+
+    async def aembed_texts(self, texts: list[str]) -> list[Vector]:
+        return await self._embed_async("text", texts, self._texts)
+
+    async def aembed_query(self, query: str) -> Vector:
+        return (await self._embed_async("query", [query], self._queries))[0]
+
+    def _embed_sync(self, kind: str, texts: list[str], fn: Callable[[list[str]], list[Vector]]) -> list[Vector]:
+        keys, found = self._lookup(kind, texts)
+        missing = list(dict.fromkeys(t for t, k in zip(texts, keys) if k not in found))
+        if missing:
+            fresh = dict(zip(missing, fn(missing)))
+            self._store(kind, fresh)
+            found.update({self._key(kind, t): v for t, v in fresh.items()})
+        return [found[k] for k in keys]
+
+    async def _embed_async(self, kind: str, texts: list[str], coalescer: _Coalescer) -> list[Vector]:
+        loop = asyncio.get_running_loop()
+        keys, found = await loop.run_in_executor(self._executor, self._lookup, kind, texts)
+        missing = list(dict.fromkeys(t for t, k in zip(texts, keys) if k not in found))
+        if missing:
+            vectors = await asyncio.gather(*(coalescer.submit(t) for t in missing))
+            fresh = dict(zip(missing, vectors))
+            await loop.run_in_executor(self._executor, self._store, kind, fresh)
+            found.update({self._key(kind, t): v for t, v in fresh.items()})
+        return [found[k] for k in keys]
+
+    def close(self) -> None:
+        if self._cache is not None:
+            self._cache.close()
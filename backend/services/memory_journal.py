@@ -0,0 +1,181 @@
+import fcntl
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+
+def _inode(path: Path) -> int:
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return 0
+
+
+def _read(path: Path, offset: int = 0) -> tuple[list[dict[str, Any]], int]:
+    """Complete records from ``offset`` on, and the offset just past the last one."""
+    records = []
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return records, offset
+    with f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # still being written, or torn by a crash mid-append
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn line from a crash mid-append; everything before it is intact.
+                break
+            offset += len(line)
+    return records, offset
+
+
+class MemoryJournal:
+    """Append-only JSONL log of memory records for one NPC.
+
+    Each append is a single write (optionally fsynced), so storing a memory
+    costs O(1) disk I/O regardless of how many memories the NPC already has.
+    The journal is folded into the NPC's persisted store by compaction and
+    replayed on load for anything written since. Compaction first rotates the
+    journal aside so appends can continue while the store is being written.
+
+    Other processes may append to the same journal. The journal remembers how
+    far into its current file the caller's in-memory copy has got (``replay``
+    and ``read_new`` move that position), so the copy can pick up records it
+    did not write itself. Appends, rotation and replay hold an ``flock`` on a
+    sidecar lock file, so no process appends to a segment another is rotating.
+    """
+
+    def __init__(self, path: Path, fsync: bool = True):
+        self._path = path
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._entries: int | None = None
+        # (inode, offset) of the current file up to which the caller has
+        # applied every record; inode 0 means there was no file. None until
+        # the first replay.
+        self._position: Optional[tuple[int, int]] = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def rotated_path(self) -> Path:
+        return self._path.with_name(self._path.name + ".compacting")
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        with self._lock:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._path.with_name(self._path.name + ".lock"), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                yield
+
+    def __len__(self) -> int:
+        if self._entries is None:
+            self._entries = len(_read(self.rotated_path)[0]) + len(_read(self._path)[0])
+        return self._entries
+
+    def append(self, records: list[dict[str, Any]]) -> None:
+        if not records:
+            return
+        payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records).encode()
+        with self._exclusive():
+            with open(self._path, "ab") as f:
+                start = f.tell()
+                inode = os.fstat(f.fileno()).st_ino
+                f.write(payload)
+                f.flush()
+                if self._fsync:
+                    os.fsync(f.fileno())
+            # Only move past our own records if nothing unread precedes them;
+            # otherwise ``read_new`` returns them again along with the rest.
+            if self._position == (inode, start) or (self._position == (0, 0) and start == 0):
+                self._position = (inode, start + len(payload))
+                if self._entries is not None:
+                    self._entries += len(records)
+
+    def replay(self) -> list[dict[str, Any]]:
+        """Every record, rotated segment first. The caller's copy is then up to date."""
+        with self._exclusive():
+            rotated, _ = _read(self.rotated_path)
+            inode = _inode(self._path)
+            current, offset = _read(self._path)
+            self._position = (inode, offset)
+            self._entries = len(rotated) + len(current)
+            return rotated + current
+
+    def read_new(self) -> Optional[list[dict[str, Any]]]:
+        """Records appended since the caller's copy last caught up, by any
+        process; None if the journal was rotated away under it, in which case
+        the copy has to be reloaded."""
+        with self._lock:
+            if self._position is None:
+                return None
+            # Checked without the file lock first: nothing new is the common case.
+            inode, offset = self._position
+            try:
+                stat = os.stat(self._path)
+            except FileNotFoundError:
+                return [] if inode == 0 else None
+            if stat.st_ino == inode and stat.st_size == offset:
+                return []
+        with self._exclusive():
+            return self._read_new()
+
+    def _read_new(self) -> Optional[list[dict[str, Any]]]:
+        if self._position is None:
+            return None
+        inode, offset = self._position
+        current = _inode(self._path)
+        if current != inode:
+            if inode != 0:
+                return None
+            offset = 0
+        records, offset = _read(self._path, offset)
+        self._position = (current, offset)
+        if self._entries is not None:
+            self._entries += len(records)
+        return records
+
+    def rotate(self) -> Optional[list[dict[str, Any]]]:
+        """Move current entries aside; they stay replayable until ``discard_rotated``.
+
+        Returns the records in them the caller's copy has not read yet, which
+        it must apply before saving, or None (rotating nothing) if another
+        process rotated the journal first."""
+        with self._exclusive():
+            unread = self._read_new()
+            if unread is None:
+                return None
+            if self._path.exists():
+                if self.rotated_path.exists():
+                    with open(self.rotated_path, "a", encoding="utf-8") as dst, open(self._path, encoding="utf-8") as src:
+                        shutil.copyfileobj(src, dst)
+                    self._path.unlink()
+                else:
+                    self._path.rename(self.rotated_path)
+            self._position = (0, 0)
+            self._entries = 0
+            return unread
+
+    def discard_rotated(self) -> None:
+        with self._exclusive():
+            if self.rotated_path.exists():
+                self.rotated_path.unlink()
+
+    def truncate(self) -> None:
+        with self._exclusive():
+            for path in (self.rotated_path, self._path):
+                if path.exists():
+                    path.unlink()
+            self._entries = 0
+            if self._position is not None:
+                self._position = (0, 0)
@@ -0,0 +1,440 @@
+import json
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from backend.core.records import MEMORY_TYPES
+from backend.services.ann_index import ANN_BACKENDS, ANNOptions, IVFIndex
+
+
+_INITIAL_CAPACITY = 64
+# Below this share of rows passing the filters, gathering them beats scoring all.
+_GATHER_FRACTION = 0.125
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector, axis=-1, keepdims=True)
+    return vector / np.where(norm == 0, 1, norm)
+
+
+def _type_code(memory_type: str) -> int:
+    return MEMORY_TYPES.index(memory_type) if memory_type in MEMORY_TYPES else -1
+
+
+@dataclass(frozen=True)
+class RetrievalOptions:
+    """How a search filters and ranks memories. The defaults are plain cosine top-k."""
+
+    memory_types: tuple[str, ...] = ()  # empty means every type
+    max_age_hours: Optional[float] = None
+    recency_weight: float = 0.0
+    half_life_hours: float = 72.0
+    mmr_lambda: float = 1.0  # 1.0 disables diversity re-ranking
+    mmr_pool: int = 4  # candidates considered by MMR, as a multiple of top_k
+    player: Optional[str] = None  # only this player's memories plus shared ones
+
+
+class MemoryStore:
+    """Per-NPC episodic memory held as a contiguous float32 matrix.
+
+    Rows are unit-normalized so a single matrix-vector product gives cosine
+    scores for every memory. Metadata lives in parallel columnar arrays,
+    including a retrieval hit count used as salience by consolidation and an
+    owner code naming the player a memory belongs to (0 for memories shared
+    by everyone, such as world events). The persisted base segment can be
+    memory-mapped; memories added afterwards go to an in-RAM tail segment
+    that grows by doubling.
+
+    Given ``ann`` options, a store with at least ``ann.min_memories`` keeps an
+    approximate index (see ``backend.services.ann_index``) that limits each
+    search to a candidate set; smaller stores are searched exactly.
+    """
+
+    def __init__(self, ann: Optional[ANNOptions] = None) -> None:
+        self.lock = threading.RLock()
+        self._base = np.zeros((0, 0), dtype=np.float32)
+        self._tail = np.zeros((0, 0), dtype=np.float32)
+        self._tail_size = 0
+        self._timestamps = np.zeros(0, dtype=np.float64)
+        self._types = np.zeros(0, dtype=np.int8)
+        self._hits = np.zeros(0, dtype=np.int32)
+        self._owners = np.zeros(0, dtype=np.int32)
+        self._players = [""]  # owner code -> player id; 0 is shared
+        self._player_codes = {"": 0}
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._id_set: set[str] = set()
+        # Summary memory id -> ids of the originals it replaced (now in the cold tier).
+        self.sources: dict[str, list[str]] = {}
+        self._ann = ann
+        self._index: Optional[IVFIndex] = None
+        self._renumbered = 0  # bumped whenever removal renumbers rows
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._id_set
+
+    @property
+    def dim(self) -> int:
+        return self._base.shape[1] or self._tail.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        base = 0 if isinstance(self._base, np.memmap) else self._base.nbytes
+        return (
+            base
+            + self._tail.nbytes
+            + self._timestamps.nbytes
+            + self._types.nbytes
+            + self._hits.nbytes
+            + self._owners.nbytes
+            + sum(len(t) for t in self._texts)
+        )
+
+    def add(
+        self,
+        memory_id: str,
+        text: str,
+        timestamp: datetime,
+        memory_type: str,
+        embedding: list[float],
+        sources: Optional[list[str]] = None,
+        player: str = "",
+    ) -> None:
+        with self.lock:
+            if memory_id in self._id_set:
+                return
+            row = _normalize(np.asarray(embedding, dtype=np.float32))
+            if self._tail_size == self._tail.shape[0]:
+                self._grow_tail(len(row))
+            self._tail[self._tail_size] = row
+            self._tail_size += 1
+            if self._index is not None:
+                self._index.add(row[None])
+
+            n = len(self._ids)
+            if n == self._timestamps.shape[0]:
+                capacity = max(_INITIAL_CAPACITY, n * 2)
+                self._timestamps = np.resize(self._timestamps, capacity)
+                self._types = np.resize(self._types, capacity)
+                self._hits = np.resize(self._hits, capacity)
+                self._owners = np.resize(self._owners, capacity)
+            self._timestamps[n] = timestamp.timestamp()
+            self._types[n] = _type_code(memory_type)
+            self._hits[n] = 0
+            self._owners[n] = self._player_code(player)
+            self._ids.append(memory_id)
+            self._texts.append(text)
+            self._id_set.add(memory_id)
+            if sources:
+                self.sources[memory_id] = list(sources)
+
+    def _player_code(self, player: str) -> int:
+        code = self._player_codes.get(player)
+        if code is None:
+            code = self._player_codes[player] = len(self._players)
+            self._players.append(player)
+        return code
+
+    def columns(self) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Snapshot of (ids, timestamps, types, hits, owner codes) for every memory."""
+        with self.lock:
+            n = len(self._ids)
+            return (
+                list(self._ids),
+                self._timestamps[:n].copy(),
+                self._types[:n].copy(),
+                self._hits[:n].copy(),
+                self._owners[:n].copy(),
+            )
+
+    def export(self, memory_ids: list[str]) -> list[tuple[str, str, datetime, str, np.ndarray, str]]:
+        """(id, text, timestamp, memory_type, embedding, player) for each given memory that is present."""
+        with self.lock:
+            wanted = set(memory_ids)
+            rows = []
+            for i, memory_id in enumerate(self._ids):
+                if memory_id in wanted:
+                    memory_type = MEMORY_TYPES[self._types[i]] if self._types[i] >= 0 else ""
+                    timestamp = datetime.fromtimestamp(self._timestamps[i])
+                    player = self._players[self._owners[i]]
+                    rows.append((memory_id, self._texts[i], timestamp, memory_type, self._row(i), player))
+            return rows
+
+    def _row(self, i: int) -> np.ndarray:
+        base = len(self._base)
+        return np.array(self._base[i] if i < base else self._tail[i - base])
+
+    def remove(self, memory_ids: set[str]) -> None:
+        """Drop memories, rebuilding the arrays; the old arrays are left untouched for any in-flight save."""
+        with self.lock:
+            keep = np.array([memory_id not in memory_ids for memory_id in self._ids], dtype=bool)
+            if keep.all():
+                return
+            n = len(self._ids)
+            self._tail = np.ascontiguousarray(self._embeddings()[keep])
+            self._tail_size = len(self._tail)
+            self._base = np.zeros((0, self._tail.shape[1]), dtype=np.float32)
+            self._timestamps = self._timestamps[:n][keep]
+            self._types = self._types[:n][keep]
+            self._hits = self._hits[:n][keep]
+            self._owners = self._owners[:n][keep]
+            self._ids = [m for m, k in zip(self._ids, keep) if k]
+            self._texts = [t for t, k in zip(self._texts, keep) if k]
+            self._id_set = set(self._ids)
+            self.sources = {m: s for m, s in self.sources.items() if m in self._id_set}
+            self._renumbered += 1
+            if self._index is not None:
+                if len(self._ids) < self._ann.min_memories:
+                    self._index = None
+                else:
+                    self._index.remap(keep)
+
+    def _grow_tail(self, dim: int) -> None:
+        capacity = max(_INITIAL_CAPACITY, self._tail.shape[0] * 2)
+        grown = np.zeros((capacity, dim), dtype=np.float32)
+        if self._tail_size:
+            grown[: self._tail_size] = self._tail[: self._tail_size]
+        self._tail = grown
+
+    def scores(self, query: list[float]) -> np.ndarray:
+        q = _normalize(np.asarray(query, dtype=np.float32))
+        with self.lock:
+            tail = self._tail[: self._tail_size]
+            if not len(self):
+                return np.zeros(0, dtype=np.float32)
+            if not len(self._base):
+                return tail @ q
+            if not len(tail):
+                return self._base @ q
+            return np.concatenate([self._base @ q, tail @ q])
+
+    def _rows(self, indices: np.ndarray) -> np.ndarray:
+        base = len(self._base)
+        if not base:
+            return self._tail[indices]
+        if not self._tail_size or (indices.size and indices.max() < base):
+            return self._base[indices]
+        if indices.min() >= base:
+            return self._tail[indices - base]
+        in_base = indices < base
+        rows = np.empty((len(indices), self.dim), dtype=np.float32)
+        rows[in_base] = self._base[indices[in_base]]
+        rows[~in_base] = self._tail[indices[~in_base] - base]
+        return rows
+
+    def _embeddings(self) -> np.ndarray:
+        return _join(self._base, self._tail[: self._tail_size])
+
+    def _filter(self, options: RetrievalOptions, now: datetime) -> Optional[np.ndarray]:
+        """Mask of memories passing the type, age and player filters, or None when nothing is filtered."""
+        n = len(self._ids)
+        mask = None
+        if options.memory_types:
+            codes = [_type_code(t) for t in options.memory_types]
+            mask = np.isin(self._types[:n], codes)
+        if options.max_age_hours is not None:
+            recent = self._timestamps[:n] >= now.timestamp() - options.max_age_hours * 3600
+            mask = recent if mask is None else mask & recent
+        if options.player is not None:
+            owners = self._owners[:n]
+            visible = owners == 0
+            if options.player in self._player_codes:
+                visible |= owners == self._player_codes[options.player]
+            mask = visible if mask is None else mask & visible
+        return mask
+
+    def build_index(self) -> None:
+        """Train (or retrain) the approximate index once the store is big enough
+        to need one, or has grown ``retrain_growth`` times since it was trained.
+        Training runs outside the lock on a snapshot of the rows."""
+        with self.lock:
+            n = len(self)
+            if self._ann is None or n < self._ann.min_memories:
+                return
+            if self._index is not None and n < self._index.trained_size * self._ann.retrain_growth:
+                return
+            renumbered, base, tail = self._renumbered, self._base, self._tail[: self._tail_size]
+        index = ANN_BACKENDS[self._ann.backend].train(_join(base, tail), self._ann)
+        with self.lock:
+            if self._renumbered != renumbered:
+                return  # rows moved under us; the next save trains again
+            if len(self) > n:
+                index.add(self._rows(np.arange(n, len(self))))
+            self._index = index
+
+    def search(
+        self,
+        query: list[float],
+        top_k: int = 5,
+        options: Optional[RetrievalOptions] = None,
+        now: Optional[datetime] = None,
+    ) -> list[tuple[str, float]]:
+        options = options or RetrievalOptions()
+        now = now or datetime.utcnow()
+        diverse = options.mmr_lambda < 1.0 and top_k > 1
+        pool = top_k * options.mmr_pool if diverse else top_k
+        q = _normalize(np.asarray(query, dtype=np.float32))
+        with self.lock:
+            if not len(self) or top_k <= 0:
+                return []
+            # Filter before scoring, so excluded memories cost nothing.
+            mask = self._filter(options, now)
+            indices = None
+            if self._index is not None:
+                indices = self._index.probe(q)
+                if mask is not None:
+                    indices = indices[mask[indices]]
+                if indices.size < pool:
+                    indices = None  # too few candidates in the probed cells; search exactly
+            if indices is None and mask is not None:
+                indices = np.flatnonzero(mask)
+                if not indices.size:
+                    return []
+                if indices.size == len(mask):
+                    indices = None  # the filters exclude nothing
+            if indices is None:
+                scores = self.scores(q)
+                indices = np.arange(len(scores))
+            elif indices.size < len(self) * _GATHER_FRACTION:
+                scores = self._rows(indices) @ q
+            else:
+                # One pass over the contiguous rows is cheaper than copying
+                # most of them out first.
+                scores = self.scores(q)[indices]
+
+            if options.recency_weight:
+                age_hours = np.maximum(now.timestamp() - self._timestamps[indices], 0) / 3600
+                recency = 0.5 ** (age_hours / options.half_life_hours)
+                scores = (1 - options.recency_weight) * scores + options.recency_weight * recency
+
+            k = min(pool, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            if diverse:
+                top = top[self._mmr(indices[top], scores[top], top_k, options.mmr_lambda)]
+            chosen = indices[top]
+            self._hits[chosen] += 1
+            return [(self._texts[i], float(scores[j])) for i, j in zip(chosen, top)]
+
+    def _mmr(self, pool: np.ndarray, relevance: np.ndarray, top_k: int, lam: float) -> np.ndarray:
+        """Maximal marginal relevance over ``pool``; returns positions within it."""
+        embeddings = self._rows(pool)
+        similarity = embeddings @ embeddings.T
+        selected = [0]
+        redundancy = similarity[0].copy()
+        while len(selected) < min(top_k, len(pool)):
+            gain = lam * relevance - (1 - lam) * redundancy
+            gain[selected] = -np.inf
+            best = int(np.argmax(gain))
+            selected.append(best)
+            redundancy = np.maximum(redundancy, similarity[best])
+        return np.array(selected)
+
+    def save(self, directory: Path) -> None:
+        """Atomically replace the persisted store under ``directory``."""
+        self.build_index()
+        with self.lock:
+            n = len(self._ids)
+            base, tail = self._base, self._tail[: self._tail_size]
+            ids, texts = self._ids[:n], self._texts[:n]
+            timestamps, types, hits = self._timestamps[:n], self._types[:n], self._hits[:n].copy()
+            owners, players = self._owners[:n], list(self._players)
+            sources = dict(self.sources)
+            index = self._index.arrays(n) if self._index is not None else None
+        # Rows are append-only and removal builds new arrays, so the views
+        # above stay valid while memories change during the write.
+        embeddings = _join(base, tail)
+
+        tmp = directory.with_name(directory.name + ".tmp")
+        old = directory.with_name(directory.name + ".old")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "embeddings.npy", np.ascontiguousarray(embeddings, dtype=np.float32))
+        np.savez(tmp / "columns.npz", timestamps=timestamps, types=types, hits=hits, owners=owners)
+        with open(tmp / "texts.json", "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "texts": texts, "sources": sources, "players": players}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        if index is not None:
+            np.savez(tmp / "ann.npz", backend=np.array(self._ann.backend), **index)
+
+        shutil.rmtree(old, ignore_errors=True)
+        if directory.exists():
+            directory.rename(old)
+        tmp.rename(directory)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = False, ann: Optional[ANNOptions] = None) -> Optional["MemoryStore"]:
+        if not directory.exists():
+            old = directory.with_name(directory.name + ".old")
+            if not old.exists():
+                return None
+            directory = old
+
+        store = cls(ann)
+        store._base = np.load(directory / "embeddings.npy", mmap_mode="r" if mmap else None)
+        columns = np.load(directory / "columns.npz")
+        store._timestamps = columns["timestamps"].copy()
+        store._types = columns["types"].copy()
+        n = len(store._types)
+        store._hits = columns["hits"].copy() if "hits" in columns else np.zeros(n, dtype=np.int32)
+        store._owners = columns["owners"].copy() if "owners" in columns else np.zeros(n, dtype=np.int32)
+        with open(directory / "texts.json", encoding="utf-8") as f:
+            data = json.load(f)
+        store._ids = data["ids"]
+        store._texts = data["texts"]
+        store._id_set = set(store._ids)
+        store.sources = data.get("sources", {})
+        store._players = data.get("players", [""])
+        store._player_codes = {p: i for i, p in enumerate(store._players)}
+        if ann is not None and len(store) >= ann.min_memories:
+            store._index = _load_index(directory / "ann.npz", ann, len(store), store.dim)
+            store.build_index()
+        return store
+
+    @classmethod
+    def from_llama_index(cls, persist_dir: Path, ann: Optional[ANNOptions] = None) -> "MemoryStore":
+        """Convert an index directory persisted by LlamaIndex's SimpleVectorStore."""
+        from llama_index.core import StorageContext
+
+        storage_context = StorageContext.from_defaults(persist_dir=str(persist_dir))
+        embeddings = storage_context.vector_store.data.embedding_dict
+        store = cls(ann)
+        for node_id, node in storage_context.docstore.docs.items():
+            if node_id not in embeddings:
+                continue
+            metadata: dict[str, Any] = node.metadata
+            timestamp = datetime.fromisoformat(metadata["timestamp"]) if "timestamp" in metadata else datetime.utcnow()
+            store.add(node_id, node.text, timestamp, metadata.get("type", ""), embeddings[node_id])
+        store.build_index()
+        return store
+
+
+def _join(base: np.ndarray, tail: np.ndarray) -> np.ndarray:
+    """Both segments as one matrix; no copy when one of them is empty."""
+    if len(base) and len(tail):
+        return np.concatenate([base, tail])
+    return tail if len(tail) else base
+
+
+def _load_index(path: Path, ann: ANNOptions, size: int, dim: int) -> Optional[IVFIndex]:
+    """The persisted index, or None if it is missing or was built for other rows or settings."""
+    if not path.exists():
+        return None
+    arrays = np.load(path)
+    if str(arrays["backend"]) != ann.backend:
+        return None
+    index = ANN_BACKENDS[ann.backend].from_arrays(arrays, ann)
+    if len(index) != size or index.dim != dim or not index.matches(ann):
+        return None
+    return index
@@ -1,114 +1,486 @@
+import asyncio
+import contextvars
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
-
-from google import genai
-from llama_index.core import Document, Settings as LlamaSettings, StorageContext, VectorStoreIndex, load_index_from_storage
-from llama_index.core.base.embeddings.base import BaseEmbedding
-from llama_index.embeddings.gemini import GeminiEmbedding
+from functools import partial
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Optional, TypeVar
+from uuid import uuid4
 
 from backend.core.config import Settings
-from backend.core.models import ChatRequest, ChatResponse, GossipItem, Memory, NPC, WorldEvent, WorldState
+from backend.core.lru import LRUCache
+from backend.core.metrics import cache_result, record_usage, span, timed
+from backend.core.models import ChatRequest, ChatResponse, GossipItem, WorldEvent, WorldState
+from backend.core.records import Memory, NPCRecord
+from backend.services.ann_index import ANNOptions
+from backend.services.consolidation import select_for_consolidation, summary_prompt
+from backend.services.dialogue_stream import DialogueStreamParser
+from backend.services.embedding import EmbeddingCache, EmbeddingService
+from backend.services.memory_journal import MemoryJournal
+from backend.services.memory_store import MemoryStore, RetrievalOptions
+from backend.services.prompt_cache import PromptCache, prefix_key
 
+if TYPE_CHECKING:
+    from llama_index.core.base.embeddings.base import BaseEmbedding
 
-class NPCService:
-    def __init__(self, settings: Settings, embed_model: Optional[BaseEmbedding] = None):
-        self._client = genai.Client(api_key=settings.gemini_api_key)
+T = TypeVar("T")
+
+# Chats from callers that name no player are kept apart from shared memories
+# (and from every named player's); real player ids may not start with "~".
+ANONYMOUS_PLAYER = "~anonymous"
+
+
+def _embed_text(text: str, metadata: dict[str, str]) -> str:
+    # Same layout LlamaIndex used when embedding documents, minus the
+    # timestamp: that way the same event broadcast to many NPCs hashes to one
+    # cached embedding.
+    return f"type: {metadata['type']}\n\n{text}"
+
+
+def _parse_reply(text: str) -> tuple[str, list[str]]:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1].rsplit("```", 1)[0].strip()
+
+    try:
+        data = json.loads(text)
+        return data["dialogue"], data.get("choices", [])[:3]
+    except (json.JSONDecodeError, KeyError):
+        return text, []
+
+
+def world_event_memory(event: WorldEvent) -> Memory:
+    return Memory(content=f"World event: {event.description}", memory_type="world_event")
+
+
+def gossip_memory(gossip: GossipItem) -> Memory:
+    return Memory(content=f"Gossip from {gossip.from_npc}: {gossip.content}", memory_type="npc_gossip")
+
+
+def _apply(store: MemoryStore, records: list[dict[str, Any]]) -> None:
+    """Apply journal records to ``store``. Records it already has are skipped,
+    so replaying a segment twice is harmless."""
+    for r in records:
+        if r.get("op") == "archive":
+            store.remove(set(r["ids"]))
+            continue
+        metadata = r["metadata"]
+        store.add(
+            r["id"],
+            r["text"],
+            datetime.fromisoformat(metadata["timestamp"]),
+            metadata["type"],
+            r["embedding"],
+            sources=r.get("sources"),
+            player=metadata.get("player", ""),
+        )
+
+
+def _version(directory: Path) -> Optional[tuple[int, int]]:
+    """Identifies one save of a persisted store; every save replaces the directory."""
+    try:
+        stat = directory.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _memory_text(memory: Memory) -> tuple[str, dict[str, str]]:
+    text = f"[{memory.memory_type}] {memory.content}"
+    metadata = {"timestamp": memory.timestamp.isoformat(), "type": memory.memory_type}
+    if memory.player_id:
+        metadata["player"] = memory.player_id
+    return text, metadata
+
+
+@dataclass
+class NPCResources:
+    """The Gemini client, embedding service, I/O threads and memory-store cache.
+
+    A process hosting many worlds shares one set between all of their
+    NPCServices, so per-world cost is just the world's own warm stores.
+    """
+
+    client: Any
+    embeddings: EmbeddingService
+    executor: ThreadPoolExecutor
+    indexes: LRUCache[Path, MemoryStore]
+
+    @classmethod
+    def create(cls, settings: Settings, embed_model: Optional["BaseEmbedding"] = None) -> "NPCResources":
+        # Imported here: the Gemini SDK and LlamaIndex take over a second to
+        # import, which the server should not pay before its first request.
+        from google import genai
+        from llama_index.core import Settings as LlamaSettings
+        from llama_index.embeddings.gemini import GeminiEmbedding
+
+        # GeminiEmbedding embeds queries and documents with the same task type,
+        # so query lookups can share its document batch calls.
+        batch_queries = embed_model is None
         if embed_model is None:
             embed_model = GeminiEmbedding(
                 api_key=settings.gemini_api_key,
                 model_name="models/gemini-embedding-001",
             )
         LlamaSettings.embed_model = embed_model
+        # Not under a world's index_dir: these resources serve every world.
+        cache_name = "embedding_cache.db" if settings.shard_count <= 1 else f"embedding_cache-{settings.shard_index}.db"
+        cache_path = Path(settings.embedding_cache_path or Path(settings.data_dir) / cache_name)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Index loads, vector search, journal appends and embedding-cache
+        # lookups run here so they never block the event loop.
+        executor = ThreadPoolExecutor(max_workers=settings.io_max_workers, thread_name_prefix="npc-io")
+        return cls(
+            client=genai.Client(api_key=settings.gemini_api_key),
+            embeddings=EmbeddingService(
+                embed_model,
+                EmbeddingCache(cache_path, settings.embedding_cache_max_entries),
+                batch_window=settings.embedding_batch_window_ms / 1000,
+                batch_queries=batch_queries,
+                executor=executor,
+            ),
+            executor=executor,
+            indexes=LRUCache(settings.index_cache_max_bytes, lambda s: s.nbytes),
+        )
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+        self.embeddings.close()
+        self.indexes.clear()
+
+
+class NPCService:
+    def __init__(
+        self,
+        settings: Settings,
+        embed_model: Optional["BaseEmbedding"] = None,
+        resources: Optional[NPCResources] = None,
+    ):
+        self._owns_resources = resources is None
+        if resources is None:
+            resources = NPCResources.create(settings, embed_model)
+        self._resources = resources
+        self._client = resources.client
+        self._embeddings = resources.embeddings
+        self._executor = resources.executor
+        self._indexes = resources.indexes
+        self._scenario = settings.active_scenario
+        self.prompt_cache = PromptCache(
+            self._client,
+            "gemini-3-flash-preview",
+            ttl_seconds=settings.prompt_cache_ttl_seconds,
+            min_chars=settings.prompt_cache_min_chars,
+        )
         self._index_dir = Path(settings.index_dir)
         self._index_dir.mkdir(parents=True, exist_ok=True)
-        self._indexes: dict[str, VectorStoreIndex] = {}
-
-    def _get_index(self, npc_id: str) -> VectorStoreIndex:
-        if npc_id in self._indexes:
-            return self._indexes[npc_id]
-
-        persist_dir = str(self._index_dir / npc_id)
-        if Path(persist_dir).exists():
-            storage_context = StorageContext.from_defaults(persist_dir=persist_dir)
-            index = load_index_from_storage(storage_context)
-        else:
-            index = VectorStoreIndex([])
-            index.storage_context.persist(persist_dir=persist_dir)
-
-        self._indexes[npc_id] = index
-        return index
-
-    def _retrieve_memories(self, npc_id: str, query: str, top_k: int = 5) -> list[str]:
-        index = self._get_index(npc_id)
-        if not index.docstore.docs:
-            return []
-        retriever = index.as_retriever(similarity_top_k=top_k)
-        nodes = retriever.retrieve(query)
-        return [node.text for node in nodes]
-
-    def _store_memory(self, npc_id: str, memory: Memory) -> None:
-        index = self._get_index(npc_id)
-        doc = Document(
-            text=f"[{memory.memory_type}] {memory.content}",
-            metadata={"timestamp": memory.timestamp.isoformat(), "type": memory.memory_type},
+        self._mmap = settings.memory_store_mmap
+        self._ann = (
+            ANNOptions(
+                backend=settings.memory_ann_backend,
+                min_memories=settings.memory_ann_min_memories,
+                nlist=settings.memory_ann_nlist,
+                nprobe=settings.memory_ann_nprobe,
+            )
+            if settings.memory_ann_backend
+            else None
+        )
+        self._journal_fsync = settings.memory_journal_fsync
+        self._compact_threshold = settings.memory_journal_compact_threshold
+        self._journals: dict[str, MemoryJournal] = {}
+        # The persisted store each cached copy was loaded from (or last saved as).
+        self._store_versions: dict[str, Optional[tuple[int, int]]] = {}
+        self._cold_versions: dict[str, Optional[tuple[int, int]]] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._compacting: set[str] = set()
+        self._hot_limit = settings.hot_memory_limit
+        self._consolidation_min_age = timedelta(hours=settings.consolidation_min_age_hours)
+        self._consolidation_group_size = settings.consolidation_group_size
+        self._consolidation_max_groups = settings.consolidation_max_groups
+        self._cold_threshold = settings.cold_search_threshold
+        self._top_k = settings.retrieval_top_k
+        self._retrieval = RetrievalOptions(
+            memory_types=tuple(settings.retrieval_memory_types),
+            max_age_hours=settings.retrieval_max_age_hours,
+            recency_weight=settings.retrieval_recency_weight,
+            half_life_hours=settings.retrieval_half_life_hours,
+            mmr_lambda=settings.retrieval_mmr_lambda,
         )
-        index.insert(doc)
-        persist_dir = str(self._index_dir / npc_id)
-        index.storage_context.persist(persist_dir=persist_dir)
+        # Caps in-flight chats for this world so one busy world can't starve the others.
+        self._chat_slots = asyncio.Semaphore(settings.max_concurrent_chats)
 
-    async def chat(self, npc: NPC, world_state: WorldState, request: ChatRequest) -> ChatResponse:
-        memories = self._retrieve_memories(npc.id, request.player_message)
+    def clear_indexes(self) -> None:
+        for key in self._indexes:
+            if key.is_relative_to(self._index_dir):
+                self._indexes.pop(key)
 
-        memories_block = "\n".join(f"- {m}" for m in memories) if memories else "No prior memories of this player."
+    def close(self) -> None:
+        if self._owns_resources:
+            self._resources.close()
+        self.clear_indexes()
 
-        prompt = f"""You are {npc.personality.name}, a {npc.personality.role}.
+    async def _run_io(self, fn: Callable[..., T], *args: Any) -> T:
+        # Carry the caller's context so spans opened on the pool nest under its request.
+        ctx = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(ctx.run, fn, *args))
 
-BACKSTORY: {npc.personality.backstory}
+    def _lock(self, npc_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(npc_id, threading.Lock())
 
-YOUR GOALS: {', '.join(npc.personality.goals)}
+    def _journal(self, npc_id: str) -> MemoryJournal:
+        journal = self._journals.get(npc_id)
+        if journal is None:
+            with self._locks_guard:
+                journal = self._journals.get(npc_id)
+                if journal is None:
+                    journal = MemoryJournal(self._index_dir / npc_id / "journal.jsonl", fsync=self._journal_fsync)
+                    self._journals[npc_id] = journal
+        return journal
 
-CURRENT MOOD: {npc.current_mood}
+    def _get_index(self, npc_id: str) -> MemoryStore:
+        store = self._indexes.get(self._index_dir / npc_id)
+        fresh = store is not None and self._catch_up(npc_id, store)
+        cache_result("memory_index", fresh)
+        if fresh:
+            return store
 
-WORLD STATE: {world_state.description}
-RECENT EVENTS: {', '.join(world_state.recent_events) if world_state.recent_events else 'Nothing notable recently.'}
+        with span("memory.index_load", npc=npc_id), self._lock(npc_id):
+            # Another thread may have loaded it while this one waited for the lock.
+            store = self._indexes.get(self._index_dir / npc_id)
+            if store is not None and self._catch_up_locked(npc_id, store):
+                return store
 
-YOUR MEMORIES OF THIS PLAYER:
-{memories_block}
+            npc_dir = self._index_dir / npc_id
+            version = _version(npc_dir / "store")
+            store = MemoryStore.load(npc_dir / "store", mmap=self._mmap, ann=self._ann)
+            if store is None and (npc_dir / "docstore.json").exists():
+                store = MemoryStore.from_llama_index(npc_dir, ann=self._ann)
+            if store is None:
+                store = MemoryStore(self._ann)
 
-The player says: "{request.player_message}"
+            # Replay memories appended (and archived) since the last compaction.
+            _apply(store, self._journal(npc_id).replay())
+            self._store_versions[npc_id] = version
+            # Cached while still holding the lock, so no thread appends to a
+            # copy that is about to be replaced.
+            self._indexes.put(self._index_dir / npc_id, store)
+        return store
 
-Respond in character as {npc.personality.name}. Be concise (2-4 sentences). Reference your memories of this player if relevant. React to recent world events if they affect you. Stay in character.
+    def _catch_up(self, npc_id: str, store: MemoryStore) -> bool:
+        """Apply what other processes journaled for this NPC since the cached
+        copy last caught up. False if the copy is stale and must be reloaded:
+        another process compacted the journal into a newer persisted store."""
+        with self._lock(npc_id):
+            return self._catch_up_locked(npc_id, store)
 
-Respond in this EXACT JSON format (no markdown, no code blocks):
-{{"dialogue": "Your in-character response here", "choices": ["Short choice 1 (5-10 words)", "Short choice 2 (5-10 words)", "Short choice 3 (5-10 words)"]}}
+    def _catch_up_locked(self, npc_id: str, store: MemoryStore) -> bool:
+        if _version(self._index_dir / npc_id / "store") != self._store_versions.get(npc_id):
+            return False
+        records = self._journal(npc_id).read_new()
+        if records is None:
+            return False
+        _apply(store, records)
+        return True
 
-The choices should be things the player might say next. Make them drive the story forward."""
+    def _get_cold_index(self, npc_id: str) -> Optional[MemoryStore]:
+        """The NPC's archived raw memories, or None if nothing was consolidated yet."""
+        key = self._index_dir / npc_id / "cold"
+        store = self._indexes.get(key)
+        version = _version(key)
+        # Reloaded once another process has archived more since this copy was read.
+        if store is None or version != self._cold_versions.get(npc_id):
+            store = MemoryStore.load(key, mmap=self._mmap, ann=self._ann)
+            if store is None:
+                return None
+            self._cold_versions[npc_id] = version
+            self._indexes.put(key, store)
+        return store
 
-        response = self._client.models.generate_content(
-            model="gemini-3-flash-preview",
-            contents=prompt,
-        )
+    @timed("memory.search")
+    def _search(self, npc_id: str, query_embedding: list[float], top_k: int, player_id: str = "") -> list[str]:
+        # Shared memories plus the player's own; no caller sees another player's.
+        options = replace(self._retrieval, player=player_id or ANONYMOUS_PLAYER)
+        hits = self._get_index(npc_id).search(query_embedding, top_k, options)
+        # The cold tier is only consulted when nothing in the hot tier is a
+        # good match, so the common case stays bounded by the hot size.
+        if not hits or hits[0][1] < self._cold_threshold:
+            cold = self._get_cold_index(npc_id)
+            if cold is not None:
+                cold_hits = cold.search(query_embedding, top_k, options)
+                hits = sorted(hits + cold_hits, key=lambda h: -h[1])[:top_k]
+        return [text for text, _ in hits]
+
+    def _retrieve_memories(self, npc_id: str, query: str, top_k: Optional[int] = None, player_id: str = "") -> list[str]:
+        store = self._get_index(npc_id)
+        if not len(store):
+            return []
+        return self._search(npc_id, self._embeddings.embed_query(query), top_k or self._top_k, player_id)
+
+    @timed("memory.retrieve")
+    async def _aretrieve_memories(
+        self, npc_id: str, query: str, top_k: Optional[int] = None, player_id: str = ""
+    ) -> list[str]:
+        store = await self._run_io(self._get_index, npc_id)
+        if not len(store):
+            return []
+        with span("memory.embed_query"):
+            query_embedding = await self._embeddings.aembed_query(query)
+        return await self._run_io(self._search, npc_id, query_embedding, top_k or self._top_k, player_id)
+
+    def _store_memory(self, npc_id: str, memory: Memory) -> None:
+        texts = [_embed_text(*_memory_text(memory))]
+        self._append_memories(npc_id, [memory], self._embeddings.embed_texts(texts))
 
-        text = response.text.strip()
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1].rsplit("```", 1)[0].strip()
+    async def _astore_memory(self, npc_id: str, memory: Memory) -> None:
+        await self.add_memories(npc_id, [memory])
 
+    async def add_memories(self, npc_id: str, memories: list[Memory]) -> None:
+        """Embed all of an NPC's new memories in one call and journal them in one append."""
+        if not memories:
+            return
+        texts = [_embed_text(*_memory_text(m)) for m in memories]
+        with span("memory.embed", count=len(texts)):
+            embeddings = await self._embeddings.aembed_texts(texts)
+        await self._run_io(self._append_memories, npc_id, memories, embeddings)
+
+    @timed("memory.persist")
+    def _append_memories(self, npc_id: str, memories: list[Memory], embeddings: list[list[float]]) -> None:
+        store = self._get_index(npc_id)
+        records = []
+
+        with self._lock(npc_id):
+            for memory, embedding in zip(memories, embeddings):
+                text, metadata = _memory_text(memory)
+                memory_id = str(uuid4())
+                store.add(memory_id, text, memory.timestamp, memory.memory_type, embedding, player=memory.player_id)
+                records.append({"id": memory_id, "text": text, "metadata": metadata, "embedding": embedding})
+            self._journal(npc_id).append(records)
+        self._indexes.touch(self._index_dir / npc_id)
+
+        if len(self._journal(npc_id)) >= self._compact_threshold:
+            self._compact_in_background(npc_id)
+
+    def _compact_in_background(self, npc_id: str) -> None:
+        with self._locks_guard:
+            if npc_id in self._compacting:
+                return
+            self._compacting.add(npc_id)
+        threading.Thread(target=self.compact, args=(npc_id,), daemon=True).start()
+
+    def compact(self, npc_id: str) -> None:
+        """Fold the NPC's journal into its persisted store."""
         try:
-            data = json.loads(text)
-            npc_dialogue = data["dialogue"]
-            choices = data.get("choices", [])[:3]
-        except (json.JSONDecodeError, KeyError):
-            npc_dialogue = text
-            choices = []
-
-        self._store_memory(
-            npc.id,
-            Memory(
-                content=f"Player said: '{request.player_message}'. I responded: '{npc_dialogue}'",
-                memory_type="player_interaction",
-            ),
+            store = self._get_index(npc_id)
+            journal = self._journal(npc_id)
+            with self._lock(npc_id):
+                # The rotated segment is deleted once the store is saved, so
+                # the store must hold every record in it, including ones other
+                # processes appended that this copy has not read yet.
+                unread = journal.rotate()
+                if unread is None:
+                    return  # another process is compacting; this copy reloads on next use
+                _apply(store, unread)
+            store.save(self._index_dir / npc_id / "store")
+            self._store_versions[npc_id] = _version(self._index_dir / npc_id / "store")
+            journal.discard_rotated()
+        finally:
+            with self._locks_guard:
+                self._compacting.discard(npc_id)
+
+    async def consolidate_memories(self, npc_id: str) -> int:
+        """Fold old, rarely retrieved memories into summaries once the hot tier
+        outgrows ``hot_memory_limit``, moving the originals to the cold tier.
+        Returns the number of summaries written."""
+        store = await self._run_io(self._get_index, npc_id)
+        ids, timestamps, _, hits, owners = store.columns()
+        groups = select_for_consolidation(
+            ids,
+            timestamps,
+            hits,
+            owners,
+            self._hot_limit,
+            self._consolidation_min_age.total_seconds(),
+            self._consolidation_group_size,
+            self._consolidation_max_groups,
+            datetime.utcnow(),
         )
+        if not groups:
+            return 0
+
+        rows = {row[0]: row for row in store.export([m for g in groups for m in g])}
+        groups = [[rows[m] for m in g if m in rows] for g in groups]
+        groups = [g for g in groups if g]
+
+        async def summarize(group: list) -> Memory:
+            response = await self._client.aio.models.generate_content(
+                model="gemini-3-flash-preview",
+                contents=summary_prompt([row[1] for row in group]),
+            )
+            record_usage("consolidation", response)
+            return Memory(
+                content=response.text.strip(),
+                timestamp=max(row[2] for row in group),
+                memory_type="summary",
+                player_id=group[0][5],
+            )
+
+        summaries = await asyncio.gather(*(summarize(g) for g in groups))
+        embeddings = await self._embeddings.aembed_texts([_embed_text(*_memory_text(m)) for m in summaries])
+        await self._run_io(self._archive, npc_id, groups, summaries, embeddings)
+        return len(summaries)
+
+    def _archive(self, npc_id: str, groups: list[list], summaries: list[Memory], embeddings: list[list[float]]) -> None:
+        # Originals reach the cold tier on disk before they leave the hot
+        # one, so a crash in between duplicates memories instead of losing them.
+        with self._lock(npc_id):
+            cold = self._get_cold_index(npc_id) or MemoryStore(self._ann)
+            for group in groups:
+                for memory_id, text, timestamp, memory_type, embedding, player in group:
+                    cold.add(memory_id, text, timestamp, memory_type, embedding, player=player)
+            cold.save(self._index_dir / npc_id / "cold")
+            self._cold_versions[npc_id] = _version(self._index_dir / npc_id / "cold")
+            self._indexes.put(self._index_dir / npc_id / "cold", cold)
+
+        store = self._get_index(npc_id)
+        archived = [row[0] for group in groups for row in group]
+        records = []
+        with self._lock(npc_id):
+            for group, summary, embedding in zip(groups, summaries, embeddings):
+                text, metadata = _memory_text(summary)
+                memory_id = str(uuid4())
+                sources = [row[0] for row in group]
+                store.add(
+                    memory_id, text, summary.timestamp, summary.memory_type, embedding,
+                    sources=sources, player=summary.player_id,
+                )
+                records.append({"id": memory_id, "text": text, "metadata": metadata, "embedding": embedding, "sources": sources})
+            store.remove(set(archived))
+            records.append({"op": "archive", "ids": archived})
+            self._journal(npc_id).append(records)
+        # Re-measured, not re-put: a reload may already have replaced this copy.
+        self._indexes.touch(self._index_dir / npc_id)
+        self._compact_in_background(npc_id)
+
+    @timed("chat")
+    async def chat(self, npc: NPCRecord, world_state: WorldState, request: ChatRequest, player_id: str = "") -> ChatResponse:
+        with span("chat.queue"):
+            await self._chat_slots.acquire()
+        try:
+            memories = await self._aretrieve_memories(npc.id, request.player_message, player_id=player_id)
+            kwargs = await self._chat_request(npc, world_state, request, memories)
+            with span("chat.generate", npc=npc.id):
+                response = await self._client.aio.models.generate_content(model="gemini-3-flash-preview", **kwargs)
+            record_usage("chat", response)
+            with span("chat.parse"):
+                npc_dialogue, choices = _parse_reply(response.text)
+            await self.remember_chat(npc.id, request, npc_dialogue, player_id)
+        finally:
+            self._chat_slots.release()
 
         return ChatResponse(
             npc_id=npc.id,
@@ -117,20 +489,91 @@ The choices should be things the player might say next. Make them drive the stor
             choices=choices,
         )
 
-    def add_world_event_to_npc(self, npc_id: str, event: WorldEvent) -> None:
-        self._store_memory(
-            npc_id,
-            Memory(
-                content=f"World event: {event.description}",
-                memory_type="world_event",
-            ),
+    async def chat_stream(
+        self, npc: NPCRecord, world_state: WorldState, request: ChatRequest, player_id: str = ""
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """Yield ``("dialogue", text)`` deltas as Gemini streams the reply,
+        then ``("choices", ...)``, ``("memories_retrieved", ...)`` and a final
+        ``("done", ChatResponse)``. The caller stores the interaction with
+        ``remember_chat`` once the stream has been delivered."""
+        async with self._chat_slots:
+            memories = await self._aretrieve_memories(npc.id, request.player_message, player_id=player_id)
+            parser = DialogueStreamParser()
+            kwargs = await self._chat_request(npc, world_state, request, memories)
+            with span("chat.generate_stream", npc=npc.id) as generation:
+                stream = await self._client.aio.models.generate_content_stream(model="gemini-3-flash-preview", **kwargs)
+                last = None
+                async for chunk in stream:
+                    if last is None:
+                        generation.set("first_token_ms", (time.time_ns() - generation.start_ns) / 1e6)
+                    last = chunk
+                    delta = parser.feed(chunk.text or "")
+                    if delta:
+                        yield "dialogue", delta
+            # Gemini reports the stream's token totals on its final chunk.
+            record_usage("chat", last)
+
+        npc_dialogue, choices = _parse_reply(parser.text)
+        yield "choices", choices
+        yield "memories_retrieved", memories
+        yield "done", ChatResponse(
+            npc_id=npc.id,
+            npc_dialogue=npc_dialogue,
+            memories_retrieved=memories,
+            choices=choices,
         )
 
-    def add_gossip_to_npc(self, gossip: GossipItem) -> None:
-        self._store_memory(
-            gossip.to_npc,
+    @timed("chat.remember")
+    async def remember_chat(self, npc_id: str, request: ChatRequest, npc_dialogue: str, player_id: str = "") -> None:
+        await self._astore_memory(
+            npc_id,
             Memory(
-                content=f"Gossip from {gossip.from_npc}: {gossip.content}",
-                memory_type="npc_gossip",
+                content=f"Player said: '{request.player_message}'. I responded: '{npc_dialogue}'",
+                memory_type="player_interaction",
+                player_id=player_id or ANONYMOUS_PLAYER,
             ),
         )
+
+    @timed("chat.prompt")
+    async def _chat_request(self, npc: NPCRecord, world_state: WorldState, request: ChatRequest, memories: list[str]) -> dict[str, Any]:
+        prefix = self._chat_prefix(npc, world_state)
+        key = prefix_key(self._scenario, npc.id, prefix, world_state.version)
+        return await self.prompt_cache.request(key, prefix, self._chat_suffix(request, memories))
+
+    def _chat_prefix(self, npc: NPCRecord, world_state: WorldState) -> str:
+        # Everything here only changes with a world event or mood change, so
+        # it can be cached; per-turn content goes in _chat_suffix.
+        return f"""You are {npc.personality.name}, a {npc.personality.role}.
+
+BACKSTORY: {npc.personality.backstory}
+
+YOUR GOALS: {', '.join(npc.personality.goals)}
+
+CURRENT MOOD: {npc.current_mood}
+
+WORLD STATE: {world_state.description}
+RECENT EVENTS: {', '.join(world_state.recent_events) if world_state.recent_events else 'Nothing notable recently.'}
+
+Respond in character as {npc.personality.name}. Be concise (2-4 sentences). Reference your memories of this player if relevant. React to recent world events if they affect you. Stay in character.
+
+Respond in this EXACT JSON format (no markdown, no code blocks):
+{{"dialogue": "Your in-character response here", "choices": ["Short choice 1 (5-10 words)", "Short choice 2 (5-10 words)", "Short choice 3 (5-10 words)"]}}
+
+The choices should be things the player might say next. Make them drive the story forward.
+"""
+
+    def _chat_suffix(self, request: ChatRequest, memories: list[str]) -> str:
+        memories_block = "\n".join(f"- {m}" for m in memories) if memories else "No prior memories of this player."
+
+        return f"""
+YOUR MEMORIES OF THIS PLAYER:
+{memories_block}
+
+The player says: "{request.player_message}"
+"""
+
+    async def add_world_event_to_npc(self, npc_id: str, event: WorldEvent) -> None:
+        await self._astore_memory(npc_id, world_event_memory(event))
+
+    async def add_gossip_to_npc(self, gossip: GossipItem) -> None:
+        await self._astore_memory(gossip.to_npc, gossip_memory(gossip))
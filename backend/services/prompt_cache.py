@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Optional
+
+from backend.core.metrics import cache_result
+
+logger = logging.getLogger("lorekeeper")
+
+PrefixKey = tuple[str, str, str, int]
+
+
+def prefix_key(scenario: str, owner: str, prefix: str, version: int = 0) -> PrefixKey:
+    """(scenario, owner, prefix hash, world version) for one cacheable prompt prefix."""
+    return scenario, owner, hashlib.sha256(prefix.encode()).hexdigest()[:16], version
+
+
+class PromptCache:
+    """Registers stable prompt prefixes with Gemini context caching.
+
+    Each (scenario, owner) keeps at most one handle: when its persona hash or
+    world version changes the old cache is deleted and a new one created on
+    the next request. Prefixes shorter than ``min_chars`` (below Gemini's
+    minimum cacheable size) or that fail to register are sent inline; keeping
+    them first in the prompt still lets Gemini's implicit caching reuse them.
+    """
+
+    def __init__(self, client: Any, model: str, ttl_seconds: int = 3600, min_chars: int = 4000):
+        self._client = client
+        self._model = model
+        self._ttl = ttl_seconds
+        self._min_chars = min_chars
+        # (scenario, owner) -> (key, cache name or None for inline, expires at)
+        self._handles: dict[tuple[str, str], tuple[PrefixKey, Optional[str], float]] = {}
+        self._pending: dict[PrefixKey, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def request(self, key: PrefixKey, prefix: str, suffix: str) -> dict[str, Any]:
+        """Keyword arguments for ``generate_content`` / ``generate_content_stream``."""
+        name = await self._handle(key, prefix)
+        if name is None:
+            return {"contents": prefix + suffix}
+        from google.genai import types
+
+        return {"contents": suffix, "config": types.GenerateContentConfig(cached_content=name)}
+
+    async def _handle(self, key: PrefixKey, prefix: str) -> Optional[str]:
+        if len(prefix) < self._min_chars:
+            return None
+
+        owner = key[:2]
+        entry = self._handles.get(owner)
+        if entry is not None and entry[0] == key and entry[2] > time.monotonic():
+            self.hits += 1
+            cache_result("prompt_prefix", True)
+            return entry[1]
+
+        # Concurrent turns for the same NPC share one cache creation.
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            self.misses += 1
+            cache_result("prompt_prefix", False)
+            name = await self._create(key, prefix)
+            stale = self._handles.get(owner)
+            self._handles[owner] = (key, name, time.monotonic() + self._ttl * 0.9)
+            future.set_result(name)
+            if stale is not None and stale[1] is not None and stale[1] != name:
+                await self._delete(stale[1])
+            return name
+        except BaseException:
+            if not future.done():
+                future.set_result(None)  # waiters fall back to sending the prefix inline
+            raise
+        finally:
+            del self._pending[key]
+
+    async def _create(self, key: PrefixKey, prefix: str) -> Optional[str]:
+        from google.genai import types
+
+        try:
+            cached = await self._client.aio.caches.create(
+                model=self._model,
+                config=types.CreateCachedContentConfig(
+                    contents=[prefix],
+                    ttl=f"{self._ttl}s",
+                    display_name="-".join(str(part) for part in key),
+                ),
+            )
+            return cached.name
+        except Exception as e:
+            logger.warning(f"Context cache unavailable for {key[:2]}, sending prefix inline: {e}")
+            return None
+
+    async def _delete(self, name: str) -> None:
+        try:
+            await self._client.aio.caches.delete(name=name)
+        except Exception as e:
+            logger.warning(f"Failed to delete context cache {name}: {e}")
@@ -0,0 +1,75 @@
+import asyncio
+import hashlib
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+from pydantic_core import to_json
+
+from backend.core.config import Settings
+from backend.core.database import DatabasePools
+from backend.core.lru import LRUCache
+from backend.core.metrics import cache_result
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+
+
+class ReadCache:
+    """Serialized JSON for the polled read endpoints, per world.
+
+    Entries are tagged with the world's write generation (see
+    ``WorldStateCache.generation``), which the event, mood and seeding write
+    paths advance. A hit costs a dict lookup: no SQLite, no Pydantic.
+    Concurrent misses for the same entry share one load.
+    """
+
+    def __init__(self, db_pools: DatabasePools, max_bytes: int = 32 * 1024 * 1024):
+        self._db_pools = db_pools
+        self._entries: LRUCache[tuple[str, Hashable], tuple[int, CachedResponse]] = LRUCache(
+            max_bytes, lambda entry: len(entry[1].body) + 200
+        )
+        self._pending: dict[tuple[str, Hashable, int], asyncio.Task] = {}
+
+    async def get(
+        self, settings: Settings, key: Hashable, load: Callable[[sqlite3.Connection], Any]
+    ) -> CachedResponse | None:
+        """The cached response for ``key``, running ``load`` on a miss. ``load``
+        returning None (not found) is not cached."""
+        pool = self._db_pools.get(settings)
+        generation = pool.world_cache.generation
+        entry = self._entries.get((settings.db_path, key))
+        if entry is not None and entry[0] == generation:
+            cache_result("read", True)
+            return entry[1]
+        cache_result("read", False)
+
+        pending_key = (settings.db_path, key, generation)
+        task = self._pending.get(pending_key)
+        if task is None:
+            task = asyncio.create_task(asyncio.to_thread(self._load, settings, key, generation, load))
+            self._pending[pending_key] = task
+            task.add_done_callback(lambda _: self._pending.pop(pending_key, None))
+        return await asyncio.shield(task)
+
+    def _load(
+        self, settings: Settings, key: Hashable, generation: int, load: Callable[[sqlite3.Connection], Any]
+    ) -> CachedResponse | None:
+        with self._db_pools.get(settings).connection() as conn:
+            value = load(conn)
+        if value is None:
+            return None
+        body = to_json(value)
+        response = CachedResponse(body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"')
+        # Tagged with the generation read before loading: if a write landed
+        # meanwhile, the entry is already stale and the next request reloads.
+        self._entries.put((settings.db_path, key), (generation, response))
+        return response
+
+    def evict(self, settings: Settings) -> None:
+        for entry_key in list(self._entries):
+            if entry_key[0] == settings.db_path:
+                self._entries.pop(entry_key)
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+
+from backend.core.config import Settings
+from backend.core.database import DatabasePools, get_cached_recap, get_npcs, get_world_state, save_recap
+from backend.core.metrics import cache_result
+from backend.core.models import NarrativeRecap, WorldState
+from backend.core.records import NPCRecord
+from backend.services.world_service import WorldService
+
+logger = logging.getLogger("lorekeeper")
+
+
+class RecapService:
+    """Narrative recaps memoized per scenario on the world version.
+
+    Recaps are stored in the scenario database, so they survive restarts,
+    and concurrent requests for the same version share one Gemini call.
+    """
+
+    def __init__(self, db_pools: DatabasePools):
+        self._db_pools = db_pools
+        self._world_services: dict[str, WorldService] = {}
+        self._pending: dict[tuple[str, int], asyncio.Task] = {}
+        self._background: set[asyncio.Task] = set()
+
+    def _world_service(self, settings: Settings) -> WorldService:
+        # Called on a worker thread: creating the first one imports the Gemini SDK.
+        service = self._world_services.get(settings.db_path)
+        if service is None:
+            service = self._world_services.setdefault(settings.db_path, WorldService(settings))
+        return service
+
+    async def get(self, settings: Settings) -> NarrativeRecap:
+        world_state, cached, npcs = await asyncio.to_thread(self._lookup, settings)
+        cache_result("recap", cached is not None)
+        if cached is not None:
+            return cached
+
+        key = (settings.db_path, world_state.version)
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self._generate(settings, world_state, npcs))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    def _lookup(self, settings: Settings) -> tuple[WorldState, NarrativeRecap | None, list[NPCRecord]]:
+        with self._db_pools.get(settings).connection() as conn:
+            world_state = get_world_state(conn)
+            cached = get_cached_recap(conn, world_state.version)
+            return world_state, cached, [] if cached is not None else get_npcs(conn)
+
+    async def _generate(self, settings: Settings, world_state: WorldState, npcs: list[NPCRecord]) -> NarrativeRecap:
+        service = await asyncio.to_thread(self._world_service, settings)
+        recap = await service.generate_recap(world_state, npcs)
+        await asyncio.to_thread(self._save, settings, world_state.version, recap)
+        return recap
+
+    def _save(self, settings: Settings, version: int, recap: NarrativeRecap) -> None:
+        with self._db_pools.get(settings).connection() as conn:
+            save_recap(conn, version, recap)
+
+    def evict(self, settings: Settings) -> None:
+        self._world_services.pop(settings.db_path, None)
+
+    def refresh(self, settings: Settings) -> None:
+        """Regenerate the recap in the background, e.g. right after a simulation commits."""
+        task = asyncio.create_task(self._refresh(settings))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _refresh(self, settings: Settings) -> None:
+        try:
+            await self.get(settings)
+        except Exception as e:
+            logger.warning(f"Recap pre-generation failed for {settings.active_scenario}: {e}")
+
+    async def close(self) -> None:
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
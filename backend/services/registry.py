@@ -0,0 +1,48 @@
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from backend.core.config import Settings
+from backend.services.npc_service import NPCResources, NPCService
+
+if TYPE_CHECKING:
+    from llama_index.core.base.embeddings.base import BaseEmbedding
+
+
+class NPCServiceRegistry:
+    """Process-lifetime NPCService per world, so warm memory indexes survive
+    across requests. Every world shares one Gemini client, embedding
+    service, I/O pool and memory-store byte budget.
+
+    The first ``get`` imports the Gemini and LlamaIndex SDKs, so async
+    callers should make it from a worker thread."""
+
+    def __init__(self, embed_model: Optional["BaseEmbedding"] = None):
+        self._embed_model = embed_model
+        self._resources: Optional[NPCResources] = None
+        self._services: dict[str, NPCService] = {}
+        self._lock = threading.Lock()
+
+    def get(self, settings: Settings) -> NPCService:
+        service = self._services.get(settings.index_dir)
+        if service is None:
+            with self._lock:
+                service = self._services.get(settings.index_dir)
+                if service is None:
+                    if self._resources is None:
+                        self._resources = NPCResources.create(settings, self._embed_model)
+                    service = NPCService(settings, resources=self._resources)
+                    self._services[settings.index_dir] = service
+        return service
+
+    def invalidate(self, settings: Settings) -> None:
+        service = self._services.pop(settings.index_dir, None)
+        if service is not None:
+            service.close()
+
+    def clear(self) -> None:
+        for service in self._services.values():
+            service.close()
+        self._services.clear()
+        if self._resources is not None:
+            self._resources.close()
+            self._resources = None
@@ -0,0 +1,194 @@
+import asyncio
+import heapq
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from backend.core.config import Settings
+
+logger = logging.getLogger("lorekeeper")
+
+WorldKey = tuple[str, str]
+
+
+@dataclass
+class _WorldTicks:
+    settings: Settings
+    last_tick: float
+    last_active: float
+    due: float = 0.0
+    idle_streak: int = 0
+    running: bool = False
+
+
+class SimulationScheduler:
+    """Offline world simulation for every world players are using.
+
+    Worlds join the scheduler on their first request and sit in a heap keyed
+    by their next due tick. Due worlds are simulated with at most
+    ``simulation_concurrency`` runs in flight, and every reschedule adds up to
+    ``simulation_jitter`` of the interval so worlds opened together drift
+    apart instead of hitting Gemini and Temporal in lockstep.
+
+    A world whose players have been gone for ``simulation_player_idle_seconds``
+    is not simulated; its checks back off exponentially up to
+    ``simulation_max_backoff_seconds``. Ticks missed while a world was idle or
+    the server was down are coalesced into one simulation covering the whole
+    span (capped at ``simulation_max_catchup_ticks``).
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        simulate: Callable[[Settings, int], Awaitable[Any]],
+        last_tick: Callable[[Settings], Optional[float]],
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None,
+    ):
+        self._simulate = simulate
+        self._last_tick = last_tick
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._interval = settings.simulation_interval_seconds
+        self._hours_per_tick = settings.simulation_hours_per_tick
+        self._concurrency = max(1, settings.simulation_concurrency)
+        self._jitter = settings.simulation_jitter
+        self._active_window = settings.simulation_player_idle_seconds
+        self._max_backoff = settings.simulation_max_backoff_seconds
+        self._max_catchup = settings.simulation_max_catchup_ticks
+        self._worlds: dict[WorldKey, _WorldTicks] = {}
+        self._heap: list[tuple[float, WorldKey]] = []
+        self._lock = threading.Lock()  # touched from request threads
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._worlds)
+
+    def __contains__(self, key: WorldKey) -> bool:
+        return key in self._worlds
+
+    @staticmethod
+    def key(settings: Settings) -> WorldKey:
+        return settings.active_scenario, settings.world_id
+
+    def touch(self, settings: Settings) -> None:
+        """Record player activity in a world, scheduling it if it is new."""
+        key = self.key(settings)
+        now = self._clock()
+        with self._lock:
+            ticks = self._worlds.get(key)
+            if ticks is not None:
+                ticks.last_active = now
+                if ticks.idle_streak:
+                    # A returning player ends the back-off; missed ticks are caught up next run.
+                    ticks.idle_streak = 0
+                    if not ticks.running:
+                        self._push(key, ticks, min(ticks.due, max(now, ticks.last_tick + self._interval)))
+                return
+
+        last = self._last_tick(settings)
+        with self._lock:
+            if key in self._worlds:
+                return
+            ticks = self._worlds[key] = _WorldTicks(settings, now if last is None else last, now)
+            self._push(key, ticks, max(now, ticks.last_tick + self._interval) + self._spread())
+
+    def ticked(self, settings: Settings) -> None:
+        """Note a simulation that ran outside the scheduler, e.g. a manual one."""
+        with self._lock:
+            ticks = self._worlds.get(self.key(settings))
+            if ticks is not None and not ticks.running:
+                ticks.last_tick = self._clock()
+                self._push(self.key(settings), ticks, ticks.last_tick + self._interval + self._spread())
+
+    def forget(self, settings: Settings) -> None:
+        with self._lock:
+            self._worlds.pop(self.key(settings), None)
+
+    def _spread(self) -> float:
+        return self._rng.uniform(0, self._interval * self._jitter)
+
+    def _push(self, key: WorldKey, ticks: _WorldTicks, due: float) -> None:
+        # Superseded heap entries are skipped when popped, since their time no longer matches.
+        ticks.due = due
+        heapq.heappush(self._heap, (due, key))
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            while self._heap:
+                due, key = self._heap[0]
+                ticks = self._worlds.get(key)
+                if ticks is not None and ticks.due == due and not ticks.running:
+                    return due
+                heapq.heappop(self._heap)
+            return None
+
+    def run_due(self, now: Optional[float] = None) -> list[WorldKey]:
+        """Start simulations for every world due by ``now``. Returns the worlds started."""
+        now = self._clock() if now is None else now
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._concurrency)
+        started: list[tuple[WorldKey, _WorldTicks]] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due, key = heapq.heappop(self._heap)
+                ticks = self._worlds.get(key)
+                if ticks is None or ticks.due != due or ticks.running:
+                    continue
+                if now - ticks.last_active >= self._active_window:
+                    ticks.idle_streak += 1
+                    backoff = min(self._interval * 2 ** ticks.idle_streak, self._max_backoff)
+                    self._push(key, ticks, now + backoff + self._spread())
+                    continue
+                ticks.running = True
+                started.append((key, ticks))
+
+        for key, ticks in started:
+            task = asyncio.create_task(self._tick(key, ticks))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return [key for key, _ in started]
+
+    async def _tick(self, key: WorldKey, ticks: _WorldTicks) -> None:
+        try:
+            async with self._slots:
+                now = self._clock()
+                missed = int((now - ticks.last_tick) // self._interval)
+                count = min(max(1, missed), self._max_catchup)
+                await self._simulate(ticks.settings, count * self._hours_per_tick)
+                ticks.last_tick = now
+                if count > 1:
+                    logger.info(f"Caught up {count} ticks for {key[0]}/{key[1]} in one simulation")
+        except Exception as e:
+            logger.warning(f"Scheduled simulation failed for {key[0]}/{key[1]}: {e}")
+        finally:
+            with self._lock:
+                ticks.running = False
+                if self._worlds.get(key) is ticks:
+                    self._push(key, ticks, self._clock() + self._interval + self._spread())
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        while True:
+            self._wake.clear()
+            self.run_due()
+            due = self.next_due()
+            timeout = None if due is None else max(0.0, due - self._clock())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+
+from backend.core.config import Settings
+from backend.core.database import DatabasePools, get_npcs, get_world_version, read_world_state
+from backend.core.lru import LRUCache
+from backend.core.metrics import cache_result
+from backend.core.models import WorldState
+from backend.core.records import NPCRecord
+
+
+class StaleWorldError(Exception):
+    """The world moved past the version a simulation was started from."""
+
+
+@dataclass(frozen=True)
+class WorldSnapshot:
+    version: int
+    world_state: WorldState
+    npcs: list[NPCRecord]
+
+
+class SnapshotCache:
+    """World state and NPC rosters as of a world version, read from the world's database.
+
+    A version pins everything a simulation prompt is built from, so snapshots
+    never need invalidating: checking a cached one costs a single-row read.
+    """
+
+    def __init__(self, db_pools: DatabasePools, max_entries: int = 256):
+        self._db_pools = db_pools
+        self._snapshots: LRUCache[tuple[str, int], WorldSnapshot] = LRUCache(max_entries, sizeof=lambda _: 1)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, settings: Settings, version: int) -> WorldSnapshot:
+        key = (settings.db_path, version)
+        with self._db_pools.get(settings).connection() as conn:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and get_world_version(conn) == version:
+                self.hits += 1
+                cache_result("world_snapshot", True)
+                return snapshot
+            self.misses += 1
+            cache_result("world_snapshot", False)
+            # One read transaction, so the roster and state agree with each other.
+            with conn:
+                conn.execute("BEGIN")
+                world_state, npcs = read_world_state(conn), get_npcs(conn)
+        if world_state.version != version:
+            raise StaleWorldError(
+                f"{settings.active_scenario}/{settings.world_id} is at version {world_state.version}, not {version}"
+            )
+        snapshot = WorldSnapshot(version, world_state, npcs)
+        self._snapshots.put(key, snapshot)
+        return snapshot
@@ -1,14 +1,28 @@
 import json
-
-from google import genai
+from datetime import datetime, timedelta
+from typing import Optional
 
 from backend.core.config import Settings
-from backend.core.models import NPC, GossipItem, NarrativeRecap, SimulationResult, WorldEvent, WorldState
+from backend.core.models import GossipItem, NarrativeRecap, SimulationResult, SimulationTick, WorldEvent, WorldState
+from backend.core.metrics import record_usage, span, timed
+from backend.core.records import NPCRecord
+from backend.services.prompt_cache import PromptCache, prefix_key
 
 
 class WorldService:
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, prompt_cache: Optional[PromptCache] = None):
+        from google import genai
+
         self._client = genai.Client(api_key=settings.gemini_api_key)
+        self._scenario = settings.active_scenario
+        self._hours_per_tick = max(1, settings.simulation_hours_per_tick)
+        self._max_ticks = max(1, settings.simulation_max_catchup_ticks)
+        self.prompt_cache = prompt_cache or PromptCache(
+            self._client,
+            "gemini-3-flash-preview",
+            ttl_seconds=settings.prompt_cache_ttl_seconds,
+            min_chars=settings.prompt_cache_min_chars,
+        )
 
     def _clean_json(self, text: str) -> str:
         text = text.strip()
@@ -16,45 +30,58 @@ class WorldService:
             text = text.split("\n", 1)[1].rsplit("```", 1)[0].strip()
         return text
 
-    def generate_world_event(self, world_state: WorldState, npcs: list[NPC]) -> SimulationResult:
-        npc_descriptions = "\n".join(
-            f"- {n.personality.name} (id={n.id}, {n.personality.role}): mood={n.current_mood}, goals={', '.join(n.personality.goals)}"
-            for n in npcs
-        )
+    @timed("world.generate_world_event")
+    async def generate_world_event(self, world_state: WorldState, npcs: list[NPCRecord], hours: int = 6) -> SimulationResult:
+        """Simulate ``hours`` of world time in one generation, as one event per
+        tick (capped at ``simulation_max_catchup_ticks``)."""
         npc_ids = [n.id for n in npcs]
+        count = max(1, min(-(-hours // self._hours_per_tick), self._max_ticks))
+        prefix = self._simulation_prefix(npcs)
+        moods = "\n".join(f"- {n.id}: {n.current_mood}" for n in npcs)
 
-        prompt = f"""You are a game world simulator. Time is passing in a fantasy trading post world.
-
+        suffix = f"""
 CURRENT WORLD STATE: {world_state.description}
 
 RECENT EVENTS: {', '.join(world_state.recent_events) if world_state.recent_events else 'Nothing notable.'}
 
 HOURS PASSED SO FAR: {world_state.hours_passed}
 
-NPCs IN THE WORLD:
-{npc_descriptions}
-
-Generate ONE new world event AND gossip between NPCs. The event should:
-1. Be dramatic but grounded (bandits, weather, trade disputes, mysterious strangers)
-2. Directly affect at least one NPC
-3. Change the world state in a meaningful way
-
-Also generate 1-2 pieces of gossip — things NPCs told each other about recent events or about the player.
-
-Respond in this EXACT JSON format (no markdown, no code blocks):
-{{"event_description": "What happened in 2-3 sentences", "affected_npc_ids": ["npc_id1"], "npc_reactions": {{"npc_id1": "How this NPC reacted in 2-3 sentences"}}, "gossip": [{{"from_npc": "npc_id1", "to_npc": "npc_id2", "content": "What they told the other NPC"}}]}}
-
-Only use these NPC IDs: {npc_ids}"""
-
-        response = self._client.models.generate_content(
-            model="gemini-3-flash-preview",
-            contents=prompt,
+HOURS PASSING NOW: {hours}
+
+NPC MOODS:
+{moods}
+
+Generate exactly {count} event(s) in chronological order, each covering about {max(1, hours // count)} hours. Later events may follow from earlier ones.
+"""
+
+        kwargs = await self.prompt_cache.request(prefix_key(self._scenario, "world", prefix), prefix, suffix)
+        with span("world.generate", ticks=count):
+            response = await self._client.aio.models.generate_content(model="gemini-3-flash-preview", **kwargs)
+        record_usage("world", response)
+        with span("world.parse"):
+            data = json.loads(self._clean_json(response.text))
+            items = data.get("events", [data]) if isinstance(data, dict) else data
+            ticks = [self._tick(item, npc_ids) for item in items[:count] if isinstance(item, dict) and item.get("event_description")]
+        if not ticks:
+            raise ValueError("Simulation returned no events")
+
+        # Spread the simulated hours over the events actually returned, and
+        # keep their timestamps strictly ordered.
+        start = datetime.utcnow()
+        for i, tick in enumerate(ticks):
+            tick.hours = hours // len(ticks) + (1 if i < hours % len(ticks) else 0)
+            tick.event.timestamp = start + timedelta(microseconds=i)
+
+        *earlier, last = ticks
+        # Reuse the validated tick's parts rather than dumping and re-validating them.
+        return SimulationResult(
+            event=last.event, npc_reactions=last.npc_reactions, gossip=last.gossip, hours=last.hours, earlier=earlier
         )
-        data = json.loads(self._clean_json(response.text))
 
+    def _tick(self, data: dict, npc_ids: list[str]) -> SimulationTick:
         event = WorldEvent(
             description=data["event_description"],
-            affected_npc_ids=data["affected_npc_ids"],
+            affected_npc_ids=[i for i in data.get("affected_npc_ids", []) if i in npc_ids],
         )
 
         gossip = [
@@ -63,13 +90,41 @@ Only use these NPC IDs: {npc_ids}"""
             if g.get("from_npc") in npc_ids and g.get("to_npc") in npc_ids
         ]
 
-        return SimulationResult(
+        return SimulationTick(
             event=event,
-            npc_reactions=data.get("npc_reactions", {}),
+            npc_reactions={k: v for k, v in data.get("npc_reactions", {}).items() if k in npc_ids},
             gossip=gossip,
         )
 
-    def generate_recap(self, world_state: WorldState, npcs: list[NPC]) -> NarrativeRecap:
+    def _simulation_prefix(self, npcs: list[NPCRecord]) -> str:
+        # The roster and instructions are fixed for a scenario; moods, the
+        # world state and the span to simulate change every run and go in the suffix.
+        npc_descriptions = "\n".join(
+            f"- {n.personality.name} (id={n.id}, {n.personality.role}): goals={', '.join(n.personality.goals)}"
+            for n in npcs
+        )
+        npc_ids = [n.id for n in npcs]
+
+        return f"""You are a game world simulator. Time is passing in a fantasy trading post world.
+
+NPCs IN THE WORLD:
+{npc_descriptions}
+
+Generate the requested number of new world events, each with gossip between NPCs. Each event should:
+1. Be dramatic but grounded (bandits, weather, trade disputes, mysterious strangers)
+2. Directly affect at least one NPC
+3. Change the world state in a meaningful way
+
+With each event, also generate 1-2 pieces of gossip — things NPCs told each other about recent events or about the player.
+
+Respond in this EXACT JSON format (no markdown, no code blocks), with events oldest first:
+{{"events": [{{"event_description": "What happened in 2-3 sentences", "affected_npc_ids": ["npc_id1"], "npc_reactions": {{"npc_id1": "How this NPC reacted in 2-3 sentences"}}, "gossip": [{{"from_npc": "npc_id1", "to_npc": "npc_id2", "content": "What they told the other NPC"}}]}}]}}
+
+Only use these NPC IDs: {npc_ids}
+"""
+
+    @timed("world.generate_recap")
+    async def generate_recap(self, world_state: WorldState, npcs: list[NPCRecord]) -> NarrativeRecap:
         if not world_state.recent_events:
             return NarrativeRecap(summary="The trading post is quiet. Your story is just beginning.", key_moments=[])
 
@@ -88,10 +143,11 @@ RECENT EVENTS:
 Write a recap in this EXACT JSON format (no markdown, no code blocks):
 {{"summary": "A dramatic 3-4 sentence narrative recap of what has happened so far, written like a TV show narrator", "key_moments": ["moment 1 in one sentence", "moment 2 in one sentence", "moment 3 in one sentence"]}}"""
 
-        response = self._client.models.generate_content(
+        response = await self._client.aio.models.generate_content(
             model="gemini-3-flash-preview",
             contents=prompt,
         )
+        record_usage("recap", response)
         data = json.loads(self._clean_json(response.text))
 
         return NarrativeRecap(
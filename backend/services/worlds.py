@@ -0,0 +1,150 @@
+import logging
+import re
+import resource
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from backend.core.config import Settings
+from backend.core.database import DatabasePools
+from backend.core.scenarios import SCENARIOS
+from backend.core.seed import seed_world
+from backend.services.registry import NPCServiceRegistry
+
+logger = logging.getLogger("lorekeeper")
+
+_WORLD_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# Each open world holds SQLite's db, -wal and -shm files per pooled
+# connection; idle pools shrink to one, busy ones average about two.
+_FDS_PER_WORLD = 6
+_RESERVED_FDS = 256  # sockets, memory stores, logs
+_POOL_IDLE_SECONDS = 60
+
+
+def _world_limit() -> int:
+    """How many worlds fit in the process's open-file limit."""
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return 1 << 30
+    return max(1, (soft - _RESERVED_FDS) // _FDS_PER_WORLD)
+
+
+WorldKey = tuple[str, str]
+
+
+class WorldManager:
+    """Live world instances keyed by (scenario, world_id).
+
+    A world is seeded from its scenario on first use. Its pooled database
+    handles and warm NPC memory stores stay open while players use it and
+    are released once it has been idle for ``idle_seconds``, or when more
+    than ``max_worlds`` (capped by the open-file limit) are open, least
+    recently used first; pools of worlds not queried for a minute keep a
+    single connection. Released
+    worlds reopen transparently on their next request. The active scenario's
+    default world is never released: requests without world headers reach
+    it directly, so its idle time here says nothing about its use.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        db_pools: DatabasePools,
+        npc_services: NPCServiceRegistry,
+        on_evict: Optional[Callable[[Settings], None]] = None,
+    ):
+        self._settings = settings
+        self._db_pools = db_pools
+        self._npc_services = npc_services
+        self._on_evict = on_evict
+        self._idle_seconds = settings.world_idle_seconds
+        self._max_worlds = min(settings.max_worlds, _world_limit())
+        if self._max_worlds < settings.max_worlds:
+            logger.info(f"Keeping at most {self._max_worlds} worlds open to stay within the open-file limit")
+        self._worlds: OrderedDict[WorldKey, Settings] = OrderedDict()
+        self._last_used: dict[WorldKey, float] = {}
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()  # serializes seeding new worlds
+        self._seeded: set[str] = set()
+        self._default: Optional[str] = None  # db_path of the active default world
+
+    def __len__(self) -> int:
+        return len(self._worlds)
+
+    def __contains__(self, key: WorldKey) -> bool:
+        return key in self._worlds
+
+    def get(self, scenario_id: str, world_id: str = "default") -> Settings:
+        """Settings for the world, opening it if needed. Raises KeyError for an
+        unknown scenario and ValueError for a malformed world id."""
+        key = (scenario_id, world_id)
+        with self._lock:
+            scoped = self._worlds.get(key)
+            if scoped is not None:
+                self._worlds.move_to_end(key)
+                self._last_used[key] = time.monotonic()
+                return scoped
+
+        if not any(s["id"] == scenario_id for s in SCENARIOS):
+            raise KeyError(scenario_id)
+        if not _WORLD_ID.match(world_id):
+            raise ValueError(f"Invalid world id '{world_id}'")
+
+        with self._open_lock:
+            scoped = self._settings.for_scenario(scenario_id, world_id)
+            if key not in self._worlds:
+                self._seed(scoped)
+            with self._lock:
+                self._worlds[key] = scoped
+                self._last_used[key] = time.monotonic()
+                releasable = [k for k in self._worlds if self._worlds[k].db_path != self._default]
+                overflow = releasable[: max(0, len(self._worlds) - self._max_worlds)]
+        for old in overflow:
+            self.evict(old)
+        return scoped
+
+    def open_default(self, scoped: Settings) -> None:
+        """Make ``scoped`` the active scenario's default world, which requests
+        reach without ``get``: seed it the first time this process serves it
+        and keep it from being released."""
+        self._default = scoped.db_path
+        if scoped.db_path not in self._seeded:
+            with self._open_lock:
+                self._seed(scoped)
+
+    def _seed(self, scoped: Settings) -> None:
+        if scoped.db_path not in self._seeded:
+            seed_world(scoped)
+            # Reads cached before the seed must not outlive it.
+            self._db_pools.get(scoped).world_cache.invalidate()
+            self._seeded.add(scoped.db_path)
+
+    def evict(self, key: WorldKey) -> None:
+        with self._lock:
+            scoped = self._worlds.pop(key, None)
+            self._last_used.pop(key, None)
+        if scoped is None:
+            return
+        self._npc_services.invalidate(scoped)
+        self._db_pools.evict(scoped)
+        if self._on_evict is not None:
+            self._on_evict(scoped)
+
+    def evict_idle(self, now: Optional[float] = None) -> list[WorldKey]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [
+                k for k, t in self._last_used.items()
+                if now - t >= self._idle_seconds and self._worlds[k].db_path != self._default
+            ]
+        for key in idle:
+            self.evict(key)
+        self._db_pools.shrink(now - _POOL_IDLE_SECONDS)
+        if idle:
+            logger.info(f"Released {len(idle)} idle worlds, {len(self._worlds)} open")
+        return idle
+
+    def close(self) -> None:
+        for key in list(self._worlds):
+            self.evict(key)
@@ -0,0 +1,87 @@
+"""Run Lorekeeper as N sharded worker processes behind a world-affinity router.
+
+    python -m backend.supervisor --workers 4 --port 8000
+
+Each worker is a regular ``backend.main`` app started with SHARD_INDEX /
+SHARD_COUNT, so it only serves (and seeds) the worlds hashed to it. Workers
+that exit unexpectedly are restarted.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import uvicorn
+
+from backend.router import create_router
+
+logger = logging.getLogger("lorekeeper")
+
+
+class Supervisor:
+    def __init__(self, workers: int, host: str, base_port: int):
+        self.workers = workers
+        self.host = host
+        self.ports = [base_port + i for i in range(workers)]
+        self._procs: list[subprocess.Popen] = []
+        self._stopping = threading.Event()
+
+    @property
+    def shard_urls(self) -> list[str]:
+        return [f"http://{self.host}:{port}" for port in self.ports]
+
+    def _spawn(self, index: int) -> subprocess.Popen:
+        env = dict(os.environ, SHARD_INDEX=str(index), SHARD_COUNT=str(self.workers))
+        return subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", self.host, "--port", str(self.ports[index])],
+            env=env,
+        )
+
+    def start(self) -> None:
+        self._procs = [self._spawn(i) for i in range(self.workers)]
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(1.0):
+            for i, proc in enumerate(self._procs):
+                if proc.poll() is not None and not self._stopping.is_set():
+                    logger.warning(f"Shard {i} exited with {proc.returncode}, restarting")
+                    self._procs[i] = self._spawn(i)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        for proc in self._procs:
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGTERM)
+        deadline = time.monotonic() + 10
+        for proc in self._procs:
+            try:
+                proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--worker-base-port", type=int, default=None, help="default: port + 1")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    supervisor = Supervisor(args.workers, args.host, args.worker_base_port or args.port + 1)
+    supervisor.start()
+    try:
+        uvicorn.run(create_router(supervisor.shard_urls), host=args.host, port=args.port)
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
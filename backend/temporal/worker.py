@@ -4,26 +4,22 @@ from temporalio.client import Client
 from temporalio.worker import Worker
 
 from backend.core.config import Settings
-from backend.temporal.workflows import (
-    WorldSimulationWorkflow,
-    generate_world_event_activity,
-    update_npc_gossip_activity,
-    update_npc_memory_activity,
-)
+from backend.core.metrics import configure_tracing, serve_metrics
+from backend.temporal.workflows import WorldSimulationWorkflow
 
 TASK_QUEUE = "lorekeeper"
 
 
 async def run_worker():
     settings = Settings()
+    configure_tracing(settings.trace_file)
+    if settings.worker_metrics_port:
+        serve_metrics(settings.worker_metrics_port)
     client = await Client.connect(settings.temporal_host)
 
-    worker = Worker(
-        client,
-        task_queue=TASK_QUEUE,
-        workflows=[WorldSimulationWorkflow],
-        activities=[generate_world_event_activity, update_npc_memory_activity, update_npc_gossip_activity],
-    )
+    # Only the workflow runs here. Its activities run in the API process
+    # serving each world, which owns that world's NPC memory stores.
+    worker = Worker(client, task_queue=TASK_QUEUE, workflows=[WorldSimulationWorkflow])
 
     print(f"Temporal worker started on queue: {TASK_QUEUE}")
     await worker.run()
@@ -1,101 +1,228 @@
-import json
-from dataclasses import dataclass
+import asyncio
+from dataclasses import dataclass, field
 from datetime import timedelta
+from typing import Optional
+from uuid import uuid4
 
 from temporalio import activity, workflow
+from temporalio.exceptions import ApplicationError
 
 with workflow.unsafe.imports_passed_through():
     from backend.core.config import Settings
-    from backend.core.models import GossipItem, NPC, SimulationResult, WorldEvent, WorldState
+    from backend.core.lru import LRUCache
+    from backend.core.metrics import timed
+    from backend.core.models import SimulationResult
+    from backend.core.records import Memory
+
+
+# Workflow inputs and outputs only name a world, a version and a result id;
+# activities read everything else from the world's database, so history stays
+# small and never holds prompts or credentials.
+#
+# The workflow itself runs on the standalone worker, but its activities run
+# on ``activity_queue``, which only the API process serving the world polls:
+# memory writes and consolidation then go through the same cached NPC stores
+# as chats, instead of a second copy in another process.
 
 
 @dataclass
 class SimulateInput:
-    world_state_json: str
-    npcs_json: str
-    settings_json: str
+    scenario_id: str
+    world_id: str
+    world_version: int
+    fanout_limit: int = 8
+    hours: int = 6
+    activity_queue: str = ""  # empty runs activities on the workflow's own queue
+
+
+@dataclass
+class SimulationRef:
+    result_id: str
+    npc_ids: list[str] = field(default_factory=list)
 
 
 @dataclass
-class UpdateNPCInput:
+class NPCMemoriesInput:
+    scenario_id: str
+    world_id: str
+    result_id: str
     npc_id: str
-    event_json: str
-    settings_json: str
 
 
 @dataclass
-class GossipInput:
-    gossip_json: str
-    settings_json: str
+class ConsolidateInput:
+    scenario_id: str
+    world_id: str
+    npc_id: str
 
 
-@activity.defn
-async def generate_world_event_activity(input: SimulateInput) -> str:
+_settings: Optional[Settings] = None
+_db_pools = None
+_owns_pools = False
+_snapshots = None
+_results = LRUCache(64, sizeof=lambda _: 1)
+_npc_services = None
+_world_services: dict = {}
+
+
+def configure(settings: Optional[Settings], db_pools=None, npc_services=None) -> None:
+    """Set the base settings activities derive world paths from, and the
+    serving process's database pools and NPC services, which they share."""
+    global _settings, _db_pools, _owns_pools, _snapshots, _npc_services
+    if _db_pools is not None and _owns_pools:
+        _db_pools.close()
+    _settings, _db_pools, _owns_pools, _snapshots = settings, db_pools, False, None
+    _npc_services = npc_services
+    _world_services.clear()
+    _results.clear()
+
+
+def _world_settings(scenario_id: str, world_id: str) -> Settings:
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings.for_scenario(scenario_id, world_id)
+
+
+def _pools():
+    global _db_pools, _owns_pools, _snapshots
+    from backend.core.database import DatabasePools
+    from backend.services.snapshots import SnapshotCache
+
+    if _db_pools is None:
+        _db_pools = DatabasePools(
+            _settings.db_pool_size, _settings.db_cached_statements, _settings.db_acquire_timeout_seconds
+        )
+        _owns_pools = True
+    if _snapshots is None:
+        _snapshots = SnapshotCache(_db_pools)
+    return _db_pools
+
+
+def _npc_service(settings: Settings):
+    # Never a registry of our own: a second cached copy of an NPC's memories
+    # would diverge from the serving process's.
+    if _npc_services is None:
+        raise ApplicationError("NPC memory activities must run in the process that serves the world")
+    return _npc_services.get(settings)
+
+
+def _world_service(settings: Settings):
+    # Kept per world so its prompt cache handles outlive a single tick. Called
+    # on a worker thread: the first one imports the Gemini SDK.
     from backend.services.world_service import WorldService
 
-    settings = Settings(**json.loads(input.settings_json))
-    world_state = WorldState(**json.loads(input.world_state_json))
-    npcs = [NPC(**n) for n in json.loads(input.npcs_json)]
+    service = _world_services.get(settings.db_path)
+    if service is None:
+        service = _world_services.setdefault(settings.db_path, WorldService(settings))
+    return service
+
+
+def _load_result(settings: Settings, result_id: str) -> SimulationResult:
+    from backend.core.database import get_simulation_result
+
+    result = _results.get(result_id)
+    if result is None:
+        with _pools().get(settings).connection() as conn:
+            result = get_simulation_result(conn, result_id)
+        if result is None:
+            raise ApplicationError(f"Simulation result {result_id} not found", non_retryable=True)
+        _results.put(result_id, result)
+    return result
 
-    service = WorldService(settings)
-    result = service.generate_world_event(world_state, npcs)
-    return result.model_dump_json()
+
+def npc_memories(result: SimulationResult) -> dict[str, list[Memory]]:
+    """Each NPC's memory writes from a simulation, however many ticks it covered,
+    so every NPC gets one activity."""
+    from backend.services.npc_service import gossip_memory, world_event_memory
+
+    events: dict[str, list[Memory]] = {}
+    gossip: dict[str, list[Memory]] = {}
+    for tick in result.ticks:
+        for npc_id in tick.event.affected_npc_ids:
+            events.setdefault(npc_id, []).append(world_event_memory(tick.event))
+            gossip.setdefault(npc_id, [])
+        for item in tick.gossip:
+            events.setdefault(item.to_npc, [])
+            gossip.setdefault(item.to_npc, []).append(gossip_memory(item))
+    return {npc_id: events[npc_id] + gossip[npc_id] for npc_id in events}
 
 
 @activity.defn
-async def update_npc_memory_activity(input: UpdateNPCInput) -> None:
-    from backend.services.npc_service import NPCService
+@timed("activity.generate_world_event")
+async def generate_world_event_activity(input: SimulateInput) -> SimulationRef:
+    from backend.core.database import save_simulation_result
+    from backend.services.snapshots import StaleWorldError
+
+    settings = _world_settings(input.scenario_id, input.world_id)
+    _pools()
+    try:
+        snapshot = await asyncio.to_thread(_snapshots.get, settings, input.world_version)
+    except StaleWorldError as e:
+        raise ApplicationError(str(e), type="StaleWorld", non_retryable=True)
+
+    service = await asyncio.to_thread(_world_service, settings)
+    result = await service.generate_world_event(snapshot.world_state, snapshot.npcs, input.hours)
 
-    settings = Settings(**json.loads(input.settings_json))
-    event = WorldEvent(**json.loads(input.event_json))
+    result_id = str(uuid4())
 
-    service = NPCService(settings)
-    service.add_world_event_to_npc(input.npc_id, event)
+    def save() -> None:
+        with _pools().get(settings).connection() as conn:
+            save_simulation_result(conn, result_id, input.world_version, result)
+
+    await asyncio.to_thread(save)
+    _results.put(result_id, result)
+    return SimulationRef(result_id=result_id, npc_ids=list(npc_memories(result)))
 
 
 @activity.defn
-async def update_npc_gossip_activity(input: GossipInput) -> None:
-    from backend.services.npc_service import NPCService
+@timed("activity.update_npc_memories")
+async def update_npc_memories_activity(input: NPCMemoriesInput) -> None:
+    settings = _world_settings(input.scenario_id, input.world_id)
+    result = await asyncio.to_thread(_load_result, settings, input.result_id)
+    memories = npc_memories(result).get(input.npc_id, [])
+    service = await asyncio.to_thread(_npc_service, settings)
+    await service.add_memories(input.npc_id, memories)
 
-    settings = Settings(**json.loads(input.settings_json))
-    gossip = GossipItem(**json.loads(input.gossip_json))
 
-    service = NPCService(settings)
-    service.add_gossip_to_npc(gossip)
+@activity.defn
+@timed("activity.consolidate_npc_memories")
+async def consolidate_npc_memories_activity(input: ConsolidateInput) -> int:
+    settings = _world_settings(input.scenario_id, input.world_id)
+    service = await asyncio.to_thread(_npc_service, settings)
+    return await service.consolidate_memories(input.npc_id)
 
 
 @workflow.defn
 class WorldSimulationWorkflow:
     @workflow.run
     async def run(self, input: SimulateInput) -> str:
-        result_json = await workflow.execute_activity(
+        """Simulate the world and return the id of the stored SimulationResult."""
+        queue = input.activity_queue or None
+        ref = await workflow.execute_activity(
             generate_world_event_activity,
             input,
+            task_queue=queue,
             start_to_close_timeout=timedelta(seconds=30),
         )
-
-        result = SimulationResult(**json.loads(result_json))
-        settings_json = input.settings_json
-
-        for npc_id in result.event.affected_npc_ids:
-            await workflow.execute_activity(
-                update_npc_memory_activity,
-                UpdateNPCInput(
-                    npc_id=npc_id,
-                    event_json=result.event.model_dump_json(),
-                    settings_json=settings_json,
-                ),
-                start_to_close_timeout=timedelta(seconds=15),
-            )
-
-        for gossip in result.gossip:
-            await workflow.execute_activity(
-                update_npc_gossip_activity,
-                GossipInput(
-                    gossip_json=gossip.model_dump_json(),
-                    settings_json=settings_json,
-                ),
-                start_to_close_timeout=timedelta(seconds=15),
-            )
-
-        return result_json
+        slots = asyncio.Semaphore(max(1, input.fanout_limit))
+
+        async def update(npc_id: str) -> None:
+            async with slots:
+                await workflow.execute_activity(
+                    update_npc_memories_activity,
+                    NPCMemoriesInput(input.scenario_id, input.world_id, ref.result_id, npc_id),
+                    task_queue=queue,
+                    start_to_close_timeout=timedelta(seconds=30),
+                )
+                # A no-op until the NPC's hot tier outgrows its limit.
+                await workflow.execute_activity(
+                    consolidate_npc_memories_activity,
+                    ConsolidateInput(input.scenario_id, input.world_id, npc_id),
+                    task_queue=queue,
+                    start_to_close_timeout=timedelta(minutes=5),
+                )
+
+        await asyncio.gather(*(update(npc_id) for npc_id in ref.npc_ids))
+
+        return ref.result_id
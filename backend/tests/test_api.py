@@ -1,11 +1,13 @@
+import asyncio
 import json
 import os
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
-from backend.core.models import SimulationResult, WorldEvent
+from backend.core.models import NarrativeRecap, SimulationResult, WorldEvent
 
 
 @pytest.fixture
@@ -17,19 +19,20 @@ def client(tmp_path):
         gemini_api_key="fake-key",
         db_path=str(tmp_path / "test.db"),
         index_dir=str(tmp_path / "indexes"),
+        data_dir=str(tmp_path),
     )
 
     def mock_scoped():
         return test_settings
 
-    with patch("backend.main.Client") as mock_client_cls, \
-         patch("backend.services.npc_service.genai") as mock_genai, \
-         patch("backend.services.npc_service.GeminiEmbedding"), \
-         patch("backend.main._scoped", mock_scoped), \
-         patch("backend.main.seed_all"):
-        mock_genai.Client.return_value = MagicMock()
+    with patch("temporalio.client.Client") as mock_client_cls, \
+         patch("temporalio.worker.Worker") as mock_worker_cls, \
+         patch("google.genai.Client", return_value=MagicMock()), \
+         patch("llama_index.embeddings.gemini.GeminiEmbedding"), \
+         patch("backend.main._scoped", mock_scoped):
         mock_temporal = AsyncMock()
         mock_client_cls.connect = AsyncMock(return_value=mock_temporal)
+        mock_worker_cls.return_value.run = AsyncMock()
 
         # Seed the test DB manually
         from backend.core.database import get_db, init_db
@@ -53,9 +56,34 @@ def client(tmp_path):
 
         from backend.main import app
         with TestClient(app) as c:
+            from backend.services.worlds import WorldManager
+            app.state.worlds = WorldManager(test_settings, app.state.db_pools, app.state.npc_services)
+            # Temporal connects in the background.
+            while c.get("/ready").status_code != 200:
+                time.sleep(0.01)
             yield c, mock_temporal
 
 
+def _workflow_returning(result):
+    """A stand-in for the simulation workflow: stores the result in the world's DB and returns its id."""
+    from uuid import uuid4
+
+    from backend.core.database import save_simulation_result
+    import backend.main as main
+
+    async def run(workflow, input, **kwargs):
+        if input.world_id == "default":
+            scoped = main._scoped()
+        else:
+            scoped = main.app.state.worlds.get(input.scenario_id, input.world_id)
+        result_id = str(uuid4())
+        with main._db(scoped) as conn:
+            save_simulation_result(conn, result_id, input.world_version, result)
+        return result_id
+
+    return AsyncMock(side_effect=run)
+
+
 class TestWorldEndpoints:
     def test_get_world(self, client):
         c, _ = client
@@ -71,6 +99,73 @@ class TestWorldEndpoints:
         assert resp.status_code == 200
         assert resp.json() == []
 
+    def test_event_pages(self, client):
+        c, _ = client
+        import backend.main as main
+        from backend.core.database import save_world_event
+
+        events = [WorldEvent(description=f"Event {i}", affected_npc_ids=[]) for i in range(3)]
+        with main._db() as conn:
+            for event in events:
+                save_world_event(conn, event)
+
+        assert [e["id"] for e in c.get("/world/events?limit=2").json()] == [events[2].id, events[1].id]
+        assert [e["id"] for e in c.get(f"/world/events?before={events[1].id}").json()] == [events[0].id]
+        assert [e["id"] for e in c.get(f"/world/events?after={events[0].id}").json()] == [events[1].id, events[2].id]
+        assert c.get("/world/events?after=nope").status_code == 404
+        assert c.get(f"/world/events?after={events[0].id}&before={events[2].id}").status_code == 400
+
+    def test_event_stream_replays_then_pushes(self, client):
+        import backend.main as main
+        from backend.core.database import save_world_event
+
+        seen, missed, live = (WorldEvent(description=d, affected_npc_ids=[]) for d in ("Fog", "Rain", "Storm"))
+        with main._db() as conn:
+            save_world_event(conn, seen)
+            save_world_event(conn, missed)
+
+        async def run():
+            response = await main.stream_events(main._scoped(), after=None, last_event_id=seen.id)
+            body = response.body_iterator
+            replayed = await body.__anext__()
+            with main._db() as conn:
+                save_world_event(conn, live)
+            pushed = await body.__anext__()
+            await body.aclose()
+            return replayed, pushed
+
+        replayed, pushed = asyncio.run(run())
+        assert replayed.startswith(f"id: {missed.id}\nevent: world_event\n")
+        assert pushed.startswith(f"id: {live.id}\nevent: simulation\n")
+        assert json.loads(pushed.split("data: ", 1)[1])["event"]["description"] == "Storm"
+        assert len(main.app.state.db_pools.get(main._scoped()).feed) == 0
+
+    def test_unchanged_poll_is_not_modified(self, client):
+        c, mock_temporal = client
+        first = c.get("/world")
+        etag = first.headers["etag"]
+        again = c.get("/world", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+
+        mock_temporal.execute_workflow = _workflow_returning(SimulationResult(
+            event=WorldEvent(description="Storm", affected_npc_ids=[]), npc_reactions={},
+        ))
+        c.post("/world/simulate")
+        changed = c.get("/world", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert changed.json()["recent_events"] == ["Storm"]
+
+    def test_metrics(self, client):
+        c, _ = client
+        c.get("/world")
+        resp = c.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert 'lorekeeper_stage_seconds_count{stage="http.request"}' in resp.text
+        assert 'lorekeeper_stage_seconds_count{stage="db.get_world_state"}' in resp.text
+
 
 class TestNPCEndpoints:
     def test_list_npcs(self, client):
@@ -116,6 +211,68 @@ class TestNPCEndpoints:
             assert resp.json()["npc_dialogue"] == "Welcome!"
 
 
+    def test_chat_stream(self, client):
+        from backend.core.models import ChatResponse
+        final = ChatResponse(npc_id="aldric", npc_dialogue="Welcome!", memories_retrieved=[], choices=["Hi"])
+
+        async def fake_stream(npc, world_state, request, player_id):
+            yield "dialogue", "Wel"
+            yield "dialogue", "come!"
+            yield "choices", ["Hi"]
+            yield "memories_retrieved", []
+            yield "done", final
+
+        with patch("backend.main._npc_service") as mock_fn:
+            mock_svc = MagicMock()
+            mock_svc.chat_stream = fake_stream
+            mock_svc.remember_chat = AsyncMock()
+            mock_fn.return_value = mock_svc
+            c, _ = client
+            resp = c.post("/npc/aldric/chat/stream", json={"player_message": "Hello"})
+
+            assert resp.status_code == 200
+            assert resp.headers["content-type"].startswith("text/event-stream")
+            assert 'event: dialogue\ndata: "Wel"' in resp.text
+            assert "event: done" in resp.text
+            mock_svc.remember_chat.assert_awaited_once()
+            assert mock_svc.remember_chat.call_args[0][2] == "Welcome!"
+
+    def test_chat_stream_not_found(self, client):
+        c, _ = client
+        resp = c.post("/npc/nobody/chat/stream", json={"player_message": "Hello"})
+        assert resp.status_code == 404
+
+    def test_chat_with_busy_database_is_503(self, client):
+        import backend.main as main
+
+        c, _ = client
+        pool = main.app.state.db_pools.get(main._scoped())
+        pool._acquire_timeout = 0.05
+        held = [pool._acquire() for _ in range(main.settings.db_pool_size)]
+        try:
+            resp = c.post("/npc/aldric/chat", json={"player_message": "Hello"})
+        finally:
+            for conn in held:
+                pool._idle.put(conn)
+        assert resp.status_code == 503
+
+
+class TestStartup:
+    def test_ready_waits_for_temporal(self, client):
+        c, _ = client
+        from backend.main import app
+        connected, app.state.temporal_client = app.state.temporal_client, None
+        try:
+            assert c.get("/").status_code == 200
+            resp = c.get("/ready")
+            assert resp.status_code == 503
+            assert resp.json()["temporal"] is False
+            assert c.post("/world/simulate").status_code == 503
+        finally:
+            app.state.temporal_client = connected
+        assert c.get("/ready").json() == {"status": "ready", "temporal": True}
+
+
 class TestScenarios:
     def test_list_scenarios(self, client):
         c, _ = client
@@ -136,10 +293,152 @@ class TestSimulate:
         c, mock_temporal = client
         event = WorldEvent(description="Storm hit", affected_npc_ids=["aldric"])
         result = SimulationResult(event=event, npc_reactions={"aldric": "worried"})
-        mock_temporal.execute_workflow = AsyncMock(return_value=result.model_dump_json())
+        mock_temporal.execute_workflow = _workflow_returning(result)
 
         resp = c.post("/world/simulate")
         assert resp.status_code == 200
         data = resp.json()
         assert data["event"]["description"] == "Storm hit"
         assert "aldric" in data["npc_reactions"]
+        sent = mock_temporal.execute_workflow.call_args[0][1]
+        assert (sent.scenario_id, sent.world_id, sent.world_version) == ("ashwood", "default", 0)
+        # Memory activities run here, next to the NPC stores chats use.
+        assert sent.activity_queue == "lorekeeper-worlds-0"
+
+    def test_simulate_span_of_hours(self, client):
+        from backend.core.models import SimulationTick
+        c, mock_temporal = client
+        earlier = SimulationTick(event=WorldEvent(description="Fog", affected_npc_ids=[]), npc_reactions={}, hours=36)
+        result = SimulationResult(event=WorldEvent(description="Storm hit", affected_npc_ids=[]), npc_reactions={}, hours=36, earlier=[earlier])
+        mock_temporal.execute_workflow = _workflow_returning(result)
+
+        resp = c.post("/world/simulate?hours=72")
+        assert resp.status_code == 200
+        assert mock_temporal.execute_workflow.call_args[0][1].hours == 72
+        assert [e["event"]["description"] for e in resp.json()["earlier"]] == ["Fog"]
+        world = c.get("/world").json()
+        assert world["hours_passed"] == 72
+        assert world["recent_events"][:2] == ["Storm hit", "Fog"]
+        assert c.post("/world/simulate?hours=0").status_code == 422
+
+    def test_stale_world_is_a_conflict(self, client):
+        from temporalio.client import WorkflowFailureError
+        from temporalio.exceptions import ActivityError, ApplicationError
+
+        c, mock_temporal = client
+        activity_error = ActivityError(
+            "activity failed", scheduled_event_id=1, started_event_id=2, identity="worker",
+            activity_type="generate_world_event_activity", activity_id="1", retry_state=None,
+        )
+        activity_error.__cause__ = ApplicationError("world moved on", type="StaleWorld", non_retryable=True)
+        failure = WorkflowFailureError(cause=activity_error)
+        failure.__cause__ = activity_error
+        mock_temporal.execute_workflow = AsyncMock(side_effect=failure)
+
+        assert c.post("/world/simulate").status_code == 409
+
+
+class TestRecap:
+    def test_recap_cached_until_world_changes(self, client):
+        c, mock_temporal = client
+        recap = NarrativeRecap(summary="Storms gathered.", key_moments=["A storm came."])
+        with patch("backend.services.world_service.WorldService.generate_recap", AsyncMock(return_value=recap)) as generate:
+            assert c.get("/world/recap").json()["summary"] == "Storms gathered."
+            c.get("/world/recap")
+            assert generate.call_count == 1
+
+            event = WorldEvent(description="Storm hit", affected_npc_ids=["aldric"])
+            result = SimulationResult(event=event, npc_reactions={"aldric": "worried"})
+            mock_temporal.execute_workflow = _workflow_returning(result)
+            c.post("/world/simulate")
+            c.get("/world/recap")
+
+            # Regenerated once for the new version, eagerly or on demand.
+            assert generate.call_count == 2
+            assert generate.call_args[0][0].recent_events == ["Storm hit"]
+
+
+class TestWorlds:
+    def test_worlds_are_isolated(self, client):
+        c, mock_temporal = client
+        event = WorldEvent(description="Storm hit", affected_npc_ids=["aldric"])
+        result = SimulationResult(event=event, npc_reactions={"aldric": "worried"})
+        mock_temporal.execute_workflow = _workflow_returning(result)
+
+        headers = {"X-Scenario-Id": "ashwood", "X-World-Id": "party-1"}
+        assert c.post("/world/simulate", headers=headers).status_code == 200
+
+        assert c.get("/world/events", headers=headers).json()[0]["description"] == "Storm hit"
+        assert c.get("/world/events", headers={"X-Scenario-Id": "ashwood", "X-World-Id": "party-2"}).json() == []
+        assert c.get("/world/events").json() == []
+
+    def test_path_prefix_routes_to_world(self, client):
+        c, _ = client
+        npcs = c.get("/worlds/starfall/crew-7/npcs").json()
+        assert {n["id"] for n in npcs} == {"reyes", "lian"}
+        assert c.get("/worlds/starfall/crew-7/world").json()["description"].startswith("A remote research station")
+
+    def test_unknown_scenario_and_bad_world_id(self, client):
+        c, _ = client
+        assert c.get("/npcs", headers={"X-Scenario-Id": "atlantis"}).status_code == 404
+        assert c.get("/npcs", headers={"X-World-Id": "../etc"}).status_code == 400
+
+    def test_player_header_scopes_chat_memory(self, client):
+        with patch("backend.main._npc_service") as mock_fn:
+            mock_svc = MagicMock()
+            mock_svc.chat = AsyncMock(return_value={"npc_id": "aldric", "npc_dialogue": "Hi", "memories_retrieved": []})
+            mock_fn.return_value = mock_svc
+            c, _ = client
+            c.post("/npc/aldric/chat", json={"player_message": "Hello"}, headers={"X-Player-Id": "ana"})
+
+        assert mock_svc.chat.call_args[0][3] == "ana"
+
+    def test_first_chat_loads_sdks_off_the_event_loop(self, client):
+        on_loop = []
+
+        def create(*args):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return MagicMock()
+
+        service = MagicMock()
+        service.chat = AsyncMock(return_value={"npc_id": "aldric", "npc_dialogue": "Hi", "memories_retrieved": []})
+        with patch("backend.services.registry.NPCResources.create", side_effect=create), \
+             patch("backend.services.registry.NPCService", return_value=service):
+            c, _ = client
+            assert c.post("/npc/aldric/chat", json={"player_message": "Hello"}).status_code == 200
+
+        assert on_loop == [False]
+
+    def test_reserved_player_ids_rejected(self, client):
+        c, _ = client
+        resp = c.post("/npc/aldric/chat", json={"player_message": "Hello"}, headers={"X-Player-Id": "~anonymous"})
+        assert resp.status_code == 400
+
+    def test_other_shards_world_is_misdirected(self, client):
+        from backend.core.config import Settings
+        from backend.core.sharding import shard_for
+        c, _ = client
+        mine = shard_for("ashwood", "party-1", 2)
+        sharded = Settings(gemini_api_key="fake-key", shard_index=mine, shard_count=2)
+        with patch("backend.main.settings", sharded):
+            assert c.get("/npcs", headers={"X-Scenario-Id": "ashwood", "X-World-Id": "party-1"}).status_code == 200
+            other = next(w for w in (f"w{i}" for i in range(20)) if shard_for("ashwood", w, 2) != mine)
+            assert c.get("/npcs", headers={"X-Scenario-Id": "ashwood", "X-World-Id": other}).status_code == 421
+
+    def test_simulation_activities_run_on_the_owning_shard(self, client):
+        from backend.core.config import Settings
+        from backend.core.sharding import shard_for
+        c, mock_temporal = client
+        mock_temporal.execute_workflow = _workflow_returning(
+            SimulationResult(event=WorldEvent(description="Fog", affected_npc_ids=[]), npc_reactions={})
+        )
+        mine = shard_for("ashwood", "party-1", 3)
+        sharded = Settings(gemini_api_key="fake-key", shard_index=mine, shard_count=3)
+        with patch("backend.main.settings", sharded):
+            headers = {"X-Scenario-Id": "ashwood", "X-World-Id": "party-1"}
+            assert c.post("/world/simulate", headers=headers).status_code == 200
+        assert mock_temporal.execute_workflow.call_args[0][1].activity_queue == f"lorekeeper-worlds-{mine}"
@@ -0,0 +1,52 @@
+import json
+
+from backend.benchmarks import bench_alloc, bench_ann, bench_chat, bench_memory, bench_startup
+from backend.benchmarks.fakes import FakeEmbedding, fake_reply
+
+
+class TestFakes:
+    def test_embedding_deterministic(self):
+        model = FakeEmbedding(embed_dim=8)
+        assert model.get_text_embedding("storm") == model.get_text_embedding("storm")
+        assert model.get_text_embedding("storm") != model.get_text_embedding("calm")
+
+    def test_world_reply_uses_given_npc_ids(self):
+        data = json.loads(fake_reply("You are a game world simulator ... Only use these NPC IDs: ['aldric', 'mira']"))
+        assert set(data["events"][0]["affected_npc_ids"]) <= {"aldric", "mira"}
+
+    def test_world_reply_event_count(self):
+        data = json.loads(fake_reply("You are a game world simulator ... Generate exactly 3 event(s) in chronological order"))
+        assert len(data["events"]) == 3
+
+    def test_chat_reply_envelope(self):
+        assert "dialogue" in json.loads(fake_reply("You are Aldric, a merchant."))
+
+
+class TestBenchmarksSmoke:
+    def test_memory(self):
+        [result] = bench_memory.run([20], iterations=3, embed_dim=8)
+        assert result["memories"] == 20
+        assert {"p50_ms", "p95_ms", "p99_ms"} <= set(result["retrieve"])
+        assert result["peak_rss_mb"] > 0
+
+    def test_chat(self):
+        [result] = bench_chat.run([2], npc_count=2, memories_per_npc=10, requests_per_client=2,
+                                  llm_latency=0, embed_latency=0, embed_dim=8)
+        assert result["count"] == 4
+        assert result["throughput_rps"] > 0
+
+    def test_startup(self):
+        [result] = bench_startup.run(("lazy",), repeats=1)
+        assert result["mode"] == "lazy"
+        assert result["first_world"]["count"] == 1
+
+    def test_alloc(self):
+        results = {r["record"]: r for r in bench_alloc.run(npc_count=3, iterations=2, resident_count=30)}
+        assert results["get_npcs[3]"]["per_call_bytes"] > 0
+        assert results["memory"]["resident_bytes"] > 0
+
+    def test_ann(self):
+        [result] = bench_ann.run([400], nprobes=(1, 100), queries=5, embed_dim=8, topics=10)
+        assert result["exact"]["count"] == 5
+        assert [r["nprobe"] for r in result["approximate"]] == [1, 100]
+        assert result["approximate"][-1]["recall_at_k"] == 1.0
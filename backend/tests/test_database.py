@@ -1,16 +1,32 @@
+import asyncio
 import sqlite3
+import time
 
 import pytest
 
+from backend.core.config import Settings
 from backend.core.database import (
+    _MIGRATIONS,
+    ConnectionPool,
+    DatabasePools,
+    PoolTimeoutError,
+    SIMULATION_RESULTS_KEPT,
+    apply_simulation_result,
+    get_cached_recap,
+    get_last_event_time,
     get_npc,
+    get_npc_event_ids,
     get_npcs,
+    get_simulation_result,
+    get_world_events,
     get_world_state,
     init_db,
+    save_recap,
+    save_simulation_result,
     save_world_event,
     update_npc_mood,
 )
-from backend.core.models import WorldEvent
+from backend.core.models import NarrativeRecap, SimulationResult, SimulationTick, WorldEvent
 
 
 @pytest.fixture
@@ -44,6 +60,31 @@ class TestInitDb:
         assert "world_state" in names
         assert "world_events" in names
         assert "npcs" in names
+        assert "event_npcs" in names
+
+    def test_timestamp_index(self, conn):
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT description FROM world_events ORDER BY timestamp DESC LIMIT 10"
+        ).fetchall()
+        assert any("idx_world_events_timestamp" in row["detail"] for row in plan)
+
+    def test_migrates_existing_events(self):
+        c = sqlite3.connect(":memory:")
+        c.row_factory = sqlite3.Row
+        c.executescript("""
+            CREATE TABLE world_events (id TEXT PRIMARY KEY, description TEXT NOT NULL,
+                                       timestamp TEXT NOT NULL, affected_npc_ids TEXT NOT NULL);
+            INSERT INTO world_events VALUES ('e1', 'Raid', '2025-01-01T00:00:00', '["aldric", "mira"]');
+            INSERT INTO world_events VALUES ('e0', 'Fog', '2024-12-31T00:00:00', '[]');
+        """)
+        init_db(c)
+        init_db(c)
+
+        assert c.execute("PRAGMA user_version").fetchone()[0] == len(_MIGRATIONS)
+        assert get_npc_event_ids(c, "mira") == ["e1"]
+        assert [(r["id"], r["seq"]) for r in c.execute("SELECT id, seq FROM world_events ORDER BY seq")] == [
+            ("e0", 1), ("e1", 2),
+        ]
 
 
 class TestWorldState:
@@ -64,6 +105,144 @@ class TestWorldState:
         assert "Bandits attacked" in ws.recent_events
 
 
+    def test_event_npcs_written(self, seeded_conn):
+        event = WorldEvent(description="Bandits attacked", affected_npc_ids=["aldric"])
+        save_world_event(seeded_conn, event)
+        assert get_npc_event_ids(seeded_conn, "aldric") == [event.id]
+
+
+class TestEventPages:
+    @pytest.fixture
+    def events(self, seeded_conn):
+        events = [WorldEvent(description=f"Event {i}", affected_npc_ids=[]) for i in range(5)]
+        for event in events:
+            save_world_event(seeded_conn, event)
+        return events
+
+    def test_latest_first(self, seeded_conn, events):
+        page = get_world_events(seeded_conn, limit=2)
+        assert [e.id for e in page] == [events[4].id, events[3].id]
+
+    def test_pages_back_and_forward(self, seeded_conn, events):
+        assert [e.id for e in get_world_events(seeded_conn, before=events[3].id, limit=2)] == [events[2].id, events[1].id]
+        assert [e.id for e in get_world_events(seeded_conn, after=events[1].id, limit=2)] == [events[2].id, events[3].id]
+        assert get_world_events(seeded_conn, after=events[4].id) == []
+
+    def test_unknown_cursor(self, seeded_conn, events):
+        assert get_world_events(seeded_conn, after="nope") is None
+
+    def test_uses_seq_index(self, conn):
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM world_events WHERE seq > 3 ORDER BY seq LIMIT 20").fetchall()
+        assert any("idx_world_events_seq" in row["detail"] for row in plan)
+
+    def test_commits_are_published(self, tmp_path):
+        pool = ConnectionPool(str(tmp_path / "pool.db"), size=1)
+        with pool.connection() as c:
+            init_db(c)
+
+        async def run():
+            subscription = pool.feed.subscribe()
+            with pool.connection() as c:
+                save_world_event(c, WorldEvent(description="Storm", affected_npc_ids=[]))
+            result = await subscription.get()
+            pool.close()
+            return result, await subscription.get()
+
+        published, closed = asyncio.run(run())
+        assert published.event.description == "Storm"
+        assert closed is None
+
+
+class TestWorldStateCache:
+    @pytest.fixture
+    def pool(self, tmp_path):
+        p = ConnectionPool(str(tmp_path / "pool.db"), size=1)
+        with p.connection() as c:
+            init_db(c)
+            c.execute("INSERT INTO world_state (id, description, hours_passed) VALUES (1, 'A quiet village', 0)")
+            c.commit()
+        yield p
+        p.close()
+
+    def test_chat_path_skips_events_table(self, pool):
+        with pool.connection() as c:
+            get_world_state(c)
+            statements = []
+            c.set_trace_callback(statements.append)
+            get_world_state(c)
+            c.set_trace_callback(None)
+        assert statements == []
+
+    def test_updated_incrementally(self, pool):
+        with pool.connection() as c:
+            get_world_state(c)
+            for i in range(12):
+                save_world_event(c, WorldEvent(description=f"Event {i}", affected_npc_ids=[]))
+            cached = get_world_state(c)
+
+        pool.world_cache.invalidate()
+        with pool.connection() as c:
+            fresh = get_world_state(c)
+
+        assert cached == fresh
+        assert cached.recent_events[0] == "Event 11"
+        assert len(cached.recent_events) == 10
+        assert cached.hours_passed == 72
+
+    def test_version_bumped_by_events_and_moods(self, pool):
+        with pool.connection() as c:
+            c.execute("INSERT INTO npcs (id, name, role, backstory, goals) VALUES ('aldric', 'Aldric', 'merchant', '', '[]')")
+            c.commit()
+            assert get_world_state(c).version == 0
+            save_world_event(c, WorldEvent(description="Raid", affected_npc_ids=["aldric"]))
+            update_npc_mood(c, "aldric", "worried")
+            cached = get_world_state(c)
+
+        pool.world_cache.invalidate()
+        with pool.connection() as c:
+            assert cached.version == get_world_state(c).version == 2
+
+    def test_unseeded_world_not_cached(self, tmp_path):
+        p = ConnectionPool(str(tmp_path / "empty.db"), size=1)
+        with p.connection() as c:
+            init_db(c)
+            assert get_world_state(c).description == "Unknown world"
+            c.execute("INSERT INTO world_state (id, description, hours_passed) VALUES (1, 'Seeded', 0)")
+            c.commit()
+            assert get_world_state(c).description == "Seeded"
+        p.close()
+
+
+class TestRecap:
+    def test_keyed_on_version(self, conn):
+        save_recap(conn, 3, NarrativeRecap(summary="Three", key_moments=["a"]))
+
+        assert get_cached_recap(conn, 3) == NarrativeRecap(summary="Three", key_moments=["a"])
+        assert get_cached_recap(conn, 4) is None
+
+    def test_older_version_never_overwrites(self, conn):
+        save_recap(conn, 3, NarrativeRecap(summary="Three", key_moments=[]))
+        save_recap(conn, 2, NarrativeRecap(summary="Two", key_moments=[]))
+
+        assert get_cached_recap(conn, 3).summary == "Three"
+
+
+class TestSimulationResults:
+    def test_round_trip_by_id(self, conn):
+        result = SimulationResult(event=WorldEvent(description="Storm", affected_npc_ids=[]), npc_reactions={})
+        save_simulation_result(conn, "r1", 0, result)
+        assert get_simulation_result(conn, "r1") == result
+        assert get_simulation_result(conn, "missing") is None
+
+    def test_keeps_only_recent_results(self, conn):
+        result = SimulationResult(event=WorldEvent(description="Storm", affected_npc_ids=[]), npc_reactions={})
+        for i in range(SIMULATION_RESULTS_KEPT + 5):
+            save_simulation_result(conn, f"r{i}", i, result)
+        assert conn.execute("SELECT COUNT(*) FROM simulation_results").fetchone()[0] == SIMULATION_RESULTS_KEPT
+        assert get_simulation_result(conn, "r0") is None
+        assert get_simulation_result(conn, f"r{SIMULATION_RESULTS_KEPT + 4}") is not None
+
+
 class TestNPCs:
     def test_get_npcs(self, seeded_conn):
         npcs = get_npcs(seeded_conn)
@@ -83,3 +262,107 @@ class TestNPCs:
         update_npc_mood(seeded_conn, "aldric", "worried")
         npc = get_npc(seeded_conn, "aldric")
         assert npc.current_mood == "worried"
+
+
+class TestConnectionPool:
+    @pytest.fixture
+    def pool(self, tmp_path):
+        p = ConnectionPool(str(tmp_path / "pool.db"), size=2)
+        with p.connection() as c:
+            init_db(c)
+        yield p
+        p.close()
+
+    def test_wal_mode(self, pool):
+        with pool.connection() as c:
+            assert c.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_reuses_connections(self, pool):
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            assert second is first
+
+    def test_uncommitted_work_rolled_back_on_release(self, pool):
+        with pool.connection() as c:
+            c.execute("INSERT INTO world_state (id, description, hours_passed) VALUES (1, 'x', 0)")
+        with pool.connection() as c:
+            assert c.execute("SELECT COUNT(*) FROM world_state").fetchone()[0] == 0
+
+    def test_acquire_times_out(self, tmp_path):
+        p = ConnectionPool(str(tmp_path / "pool.db"), size=1, acquire_timeout=0.01)
+        with p.connection():
+            with pytest.raises(PoolTimeoutError):
+                with p.connection():
+                    pass
+        with p.connection():
+            pass
+        p.close()
+
+    def test_close_spares_connections_in_use(self, tmp_path):
+        p = ConnectionPool(str(tmp_path / "pool.db"), size=2)
+        with p.connection() as busy:
+            with p.connection() as idle:
+                pass
+            p.close()
+            assert busy.execute("SELECT 1").fetchone()[0] == 1
+        with pytest.raises(sqlite3.ProgrammingError):
+            busy.execute("SELECT 1")
+        with pytest.raises(sqlite3.ProgrammingError):
+            idle.execute("SELECT 1")
+
+    def test_idle_pool_shrinks_to_one_connection(self, tmp_path):
+        p = ConnectionPool(str(tmp_path / "pool.db"), size=3)
+        with p.connection() as a, p.connection() as b, p.connection():
+            pass
+        p.shrink(idle_since=0)
+        assert len(p._all) == 3  # used since then
+        p.shrink(idle_since=time.monotonic())
+        assert len(p._all) == 1
+        with p.connection(), p.connection():
+            assert len(p._all) == 2
+        p.close()
+
+    def test_pools_keyed_by_db_path(self, tmp_path):
+        pools = DatabasePools(size=1)
+        a = Settings(gemini_api_key="k", db_path=str(tmp_path / "a.db"))
+        b = Settings(gemini_api_key="k", db_path=str(tmp_path / "b.db"))
+        assert pools.get(a) is pools.get(a)
+        assert pools.get(a) is not pools.get(b)
+        pools.close()
+
+
+class TestApplySimulationResult:
+    def test_saves_event_and_moods_together(self, seeded_conn):
+        event = WorldEvent(description="Storm hit", affected_npc_ids=["aldric"])
+        apply_simulation_result(seeded_conn, SimulationResult(event=event, npc_reactions={"aldric": "worried"}))
+
+        assert "Storm hit" in get_world_state(seeded_conn).recent_events
+        assert get_npc(seeded_conn, "aldric").current_mood == "affected"
+
+    def test_rolls_back_on_failure(self, seeded_conn):
+        event = WorldEvent(description="Storm hit", affected_npc_ids=["aldric"])
+        apply_simulation_result(seeded_conn, SimulationResult(event=event, npc_reactions={}))
+        with pytest.raises(sqlite3.IntegrityError):
+            apply_simulation_result(seeded_conn, SimulationResult(event=event, npc_reactions={"aldric": "worried"}))
+
+        assert get_npc(seeded_conn, "aldric").current_mood == "neutral"
+        assert get_world_state(seeded_conn).hours_passed == 6
+
+    def test_advances_by_simulated_hours(self, seeded_conn):
+        event = WorldEvent(description="Three quiet days", affected_npc_ids=[])
+        apply_simulation_result(seeded_conn, SimulationResult(event=event, npc_reactions={}, hours=72))
+        assert get_world_state(seeded_conn).hours_passed == 72
+        assert get_last_event_time(seeded_conn) == event.timestamp
+
+    def test_applies_every_tick_in_order(self, seeded_conn):
+        first = SimulationTick(event=WorldEvent(description="Bandits", affected_npc_ids=["aldric"]), npc_reactions={"aldric": "afraid"})
+        last = WorldEvent(description="Rain", affected_npc_ids=[])
+        version = get_world_state(seeded_conn).version
+        apply_simulation_result(seeded_conn, SimulationResult(event=last, npc_reactions={}, hours=12, earlier=[first]))
+
+        state = get_world_state(seeded_conn)
+        assert state.recent_events[:2] == ["Rain", "Bandits"]
+        assert state.hours_passed == 18
+        assert state.version == version + 2
+        assert get_npc(seeded_conn, "aldric").current_mood == "affected"
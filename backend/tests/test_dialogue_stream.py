@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from backend.services.dialogue_stream import DialogueStreamParser
+
+
+def _feed_all(chunks: list[str]) -> str:
+    parser = DialogueStreamParser()
+    return "".join(parser.feed(c) for c in chunks)
+
+
+class TestDialogueStreamParser:
+    @pytest.mark.parametrize("dialogue", [
+        "Welcome, traveler.",
+        'She said "run" and\nleft.',
+        "Back\\slash and tab\there",
+        "Dragons 🐉 and café",
+    ])
+    def test_char_by_char_matches_full_decode(self, dialogue):
+        reply = json.dumps({"dialogue": dialogue, "choices": ["a", "b"]})
+        assert _feed_all(list(reply)) == dialogue
+
+    def test_ascii_escaped_unicode(self):
+        reply = json.dumps({"dialogue": "Dragons 🐉 and café"}, ensure_ascii=True)
+        assert _feed_all(list(reply)) == "Dragons 🐉 and café"
+
+    def test_stops_at_end_of_dialogue(self):
+        parser = DialogueStreamParser()
+        assert parser.feed('{"dialogue": "Hi"') == "Hi"
+        assert parser.feed(', "choices": ["x"]}') == ""
+
+    def test_code_fence_prefix(self):
+        assert _feed_all(["```js", 'on\n{"dia', 'logue": "Hi"}\n```']) == "Hi"
+
+    def test_plain_text_passthrough(self):
+        assert _feed_all(["Well, ", "hello there."]) == "Well, hello there."
+
+    def test_keeps_full_text(self):
+        parser = DialogueStreamParser()
+        parser.feed('{"dialogue": ')
+        parser.feed('"Hi"}')
+        assert parser.text == '{"dialogue": "Hi"}'
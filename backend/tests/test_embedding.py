@@ -0,0 +1,142 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+from llama_index.core.embeddings import MockEmbedding
+
+from backend.services.embedding import EmbeddingCache, EmbeddingService
+
+
+class CountingEmbedding(MockEmbedding):
+    batch_calls: list[list[str]] = []
+    query_calls: list[str] = []
+
+    def _get_text_embeddings(self, texts):
+        self.batch_calls.append(list(texts))
+        return [[float(len(t))] * self.embed_dim for t in texts]
+
+    def _get_text_embedding(self, text):
+        return self._get_text_embeddings([text])[0]
+
+    def _get_query_embedding(self, query):
+        self.query_calls.append(query)
+        return [float(len(query))] * self.embed_dim
+
+    async def _aget_text_embeddings(self, texts):
+        return self._get_text_embeddings(texts)
+
+    async def _aget_query_embedding(self, query):
+        return self._get_query_embedding(query)
+
+
+@pytest.fixture
+def model():
+    m = CountingEmbedding(embed_dim=4)
+    m.batch_calls = []
+    m.query_calls = []
+    return m
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = EmbeddingCache(tmp_path / "cache.db", max_entries=100)
+    yield c
+    c.close()
+
+
+class TestEmbeddingCache:
+    def test_roundtrip(self, cache):
+        cache.put_many({"a": [1.0, 2.0]})
+        assert cache.get_many(["a", "b"]) == {"a": [1.0, 2.0]}
+
+    def test_persists_across_instances(self, tmp_path):
+        first = EmbeddingCache(tmp_path / "cache.db")
+        first.put_many({"a": [1.0]})
+        first.close()
+        second = EmbeddingCache(tmp_path / "cache.db")
+        assert second.get_many(["a"]) == {"a": [1.0]}
+        assert len(second) == 1
+        second.close()
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = EmbeddingCache(tmp_path / "cache.db", max_entries=2)
+        cache.put_many({"a": [1.0]})
+        cache.put_many({"b": [2.0]})
+        cache.get_many(["a"])
+        cache.put_many({"c": [3.0]})
+        assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+        cache.close()
+
+    def test_hits_write_recency_in_batches(self, tmp_path):
+        cache = EmbeddingCache(tmp_path / "cache.db")
+        cache.put_many({"a": [1.0]})
+        reader = sqlite3.connect(str(tmp_path / "cache.db"))
+
+        def last_used():
+            return reader.execute("SELECT last_used FROM embeddings WHERE key = 'a'").fetchone()[0]
+
+        stored = last_used()
+        cache.get_many(["a"])
+        assert last_used() == stored
+        cache.close()
+        assert last_used() > stored
+        reader.close()
+
+
+class TestEmbeddingService:
+    def test_duplicate_texts_embedded_once(self, model, cache):
+        service = EmbeddingService(model, cache)
+        service.embed_texts(["storm", "storm"])
+        service.embed_texts(["storm"])
+        assert model.batch_calls == [["storm"]]
+        assert service.hits == 1
+
+    def test_concurrent_requests_coalesce(self, model, cache):
+        service = EmbeddingService(model, cache, batch_window=0.01)
+
+        async def run():
+            return await asyncio.gather(*(service.aembed_texts([t]) for t in ["a", "bb", "a", "ccc"]))
+
+        results = asyncio.run(run())
+        assert model.batch_calls == [["a", "bb", "ccc"]]
+        assert results[0] == results[2]
+
+    def test_queries_cached(self, model, cache):
+        service = EmbeddingService(model, cache)
+        asyncio.run(service.aembed_query("Hello"))
+        asyncio.run(service.aembed_query("Hello"))
+        assert model.query_calls == ["Hello"]
+
+    def test_queries_batched_when_model_allows(self, model, cache):
+        service = EmbeddingService(model, cache, batch_window=0.01, batch_queries=True)
+
+        async def run():
+            await asyncio.gather(service.aembed_query("a"), service.aembed_query("bb"))
+
+        asyncio.run(run())
+        assert model.batch_calls == [["a", "bb"]]
+        assert model.query_calls == []
+
+    def test_failure_propagates_to_all_waiters(self, cache):
+        class Broken(MockEmbedding):
+            async def _aget_text_embeddings(self, texts):
+                raise RuntimeError("quota")
+
+        service = EmbeddingService(Broken(embed_dim=4), cache)
+
+        async def run():
+            return await asyncio.gather(service.aembed_texts(["a"]), service.aembed_texts(["b"]), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+    def test_async_cache_access_stays_off_the_event_loop(self, model, cache):
+        threads = []
+        get_many, put_many = cache.get_many, cache.put_many
+        cache.get_many = lambda keys: threads.append(threading.get_ident()) or get_many(keys)
+        cache.put_many = lambda items: threads.append(threading.get_ident()) or put_many(items)
+        service = EmbeddingService(model, cache)
+
+        asyncio.run(service.aembed_texts(["storm"]))
+        assert len(threads) == 2
+        assert threading.get_ident() not in threads
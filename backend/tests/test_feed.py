@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+from backend.core.feed import WorldFeed
+from backend.core.models import SimulationResult, WorldEvent
+
+
+def _result(description: str) -> SimulationResult:
+    return SimulationResult(event=WorldEvent(description=description, affected_npc_ids=[]), npc_reactions={})
+
+
+class TestWorldFeed:
+    def test_fans_out_from_another_thread(self):
+        feed = WorldFeed()
+
+        async def run():
+            a, b = feed.subscribe(), feed.subscribe()
+            thread = threading.Thread(target=feed.publish, args=(_result("Storm"),))
+            thread.start()
+            thread.join()
+            return await a.get(), await b.get()
+
+        a, b = asyncio.run(run())
+        assert a.event.description == b.event.description == "Storm"
+
+    def test_slow_subscriber_is_dropped(self):
+        feed = WorldFeed(max_pending=2)
+
+        async def run():
+            queue = feed.subscribe()
+            for i in range(4):
+                feed.publish(_result(f"Event {i}"))
+            await asyncio.sleep(0)
+            return [await queue.get() for _ in range(3)]
+
+        received = asyncio.run(run())
+        assert [r.event.description for r in received[:2]] == ["Event 0", "Event 1"]
+        assert received[2] is None
+        assert len(feed) == 0
+
+    def test_unsubscribed_queue_gets_nothing(self):
+        feed = WorldFeed()
+
+        async def run():
+            queue = feed.subscribe()
+            feed.unsubscribe(queue)
+            feed.publish(_result("Storm"))
+            await asyncio.sleep(0)
+            return queue.qsize()
+
+        assert asyncio.run(run()) == 0
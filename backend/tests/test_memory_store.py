@@ -0,0 +1,253 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backend.services.ann_index import ANNOptions
+from backend.services.memory_store import MemoryStore, RetrievalOptions
+
+
+def _vec(*values: float) -> list[float]:
+    return list(values)
+
+
+@pytest.fixture
+def store():
+    s = MemoryStore()
+    s.add("a", "north road", datetime(2025, 1, 1), "world_event", _vec(1, 0, 0))
+    s.add("b", "east market", datetime(2025, 1, 2), "player_interaction", _vec(0, 1, 0))
+    s.add("c", "north-east tower", datetime(2025, 1, 3), "npc_gossip", _vec(1, 1, 0))
+    return s
+
+
+class TestMemoryStore:
+    def test_search_orders_by_cosine(self, store):
+        hits = store.search(_vec(1, 0.1, 0), top_k=2)
+        assert [text for text, _ in hits] == ["north road", "north-east tower"]
+
+    def test_top_k_larger_than_store(self, store):
+        assert len(store.search(_vec(0, 0, 1), top_k=10)) == 3
+
+    def test_empty_store(self):
+        assert MemoryStore().search(_vec(1, 0), top_k=5) == []
+
+    def test_duplicate_ids_ignored(self, store):
+        store.add("a", "north road", datetime(2025, 1, 1), "world_event", _vec(1, 0, 0))
+        assert len(store) == 3
+
+    def test_grows_past_initial_capacity(self):
+        s = MemoryStore()
+        for i in range(200):
+            s.add(str(i), f"memory {i}", datetime(2025, 1, 1), "world_event", _vec(1, i, 0))
+        assert len(s) == 200
+        assert s.search(_vec(0, 1, 0), top_k=1)[0][0] == "memory 199"
+
+    @pytest.mark.parametrize("mmap", [False, True])
+    def test_save_and_load(self, store, tmp_path, mmap):
+        store.save(tmp_path / "store")
+        loaded = MemoryStore.load(tmp_path / "store", mmap=mmap)
+
+        assert len(loaded) == 3
+        assert isinstance(loaded._base, np.memmap) == mmap
+        loaded.add("d", "south gate", datetime(2025, 1, 4), "world_event", _vec(0, 0, 1))
+        assert loaded.search(_vec(0, 0, 1), top_k=1)[0][0] == "south gate"
+        assert loaded.search(_vec(1, 0, 0), top_k=1)[0][0] == "north road"
+
+    def test_search_counts_hits(self, store):
+        store.search(_vec(1, 0, 0), top_k=1)
+        store.search(_vec(1, 0, 0), top_k=1)
+        ids, _, _, hits, _ = store.columns()
+        assert dict(zip(ids, hits.tolist())) == {"a": 2, "b": 0, "c": 0}
+
+    def test_remove(self, store):
+        store.remove({"a", "c"})
+
+        assert len(store) == 1
+        assert "a" not in store
+        assert store.search(_vec(1, 0, 0), top_k=5) == [("east market", 0.0)]
+        store.add("d", "south gate", datetime(2025, 1, 4), "world_event", _vec(0, 0, 1))
+        assert store.search(_vec(0, 0, 1), top_k=1)[0][0] == "south gate"
+
+    def test_export(self, store):
+        [(memory_id, text, timestamp, memory_type, embedding, player)] = store.export(["b", "missing"])
+        assert (memory_id, text, timestamp, memory_type) == ("b", "east market", datetime(2025, 1, 2), "player_interaction")
+        assert player == ""
+        assert np.allclose(embedding, [0, 1, 0])
+
+    def test_sources_and_hits_persist(self, store, tmp_path):
+        store.add("s", "summary", datetime(2025, 1, 5), "summary", _vec(0, 0, 1), sources=["a", "b"])
+        store.search(_vec(0, 0, 1), top_k=1)
+        store.save(tmp_path / "store")
+        loaded = MemoryStore.load(tmp_path / "store")
+
+        assert loaded.sources == {"s": ["a", "b"]}
+        assert loaded.columns()[3].tolist() == [0, 0, 0, 1]
+
+    def test_load_missing(self, tmp_path):
+        assert MemoryStore.load(tmp_path / "store") is None
+
+
+class TestRetrievalOptions:
+    def test_player_sees_own_and_shared_memories(self, store, tmp_path):
+        store.add("p1", "ana's secret", datetime(2025, 1, 4), "player_interaction", _vec(1, 0, 0), player="ana")
+        store.add("p2", "ben's secret", datetime(2025, 1, 4), "player_interaction", _vec(1, 0, 0), player="ben")
+        store.save(tmp_path / "store")
+        loaded = MemoryStore.load(tmp_path / "store")
+
+        for s in (store, loaded):
+            texts = [t for t, _ in s.search(_vec(1, 0, 0), top_k=10, options=RetrievalOptions(player="ana"))]
+            assert "ana's secret" in texts and "ben's secret" not in texts
+            assert "north road" in texts
+            assert len(s.search(_vec(1, 0, 0), top_k=10, options=RetrievalOptions(player="carl"))) == 3
+
+    def test_broad_filter_scores_without_gathering_rows(self):
+        rng = np.random.default_rng(0)
+        store = MemoryStore()
+        for i, row in enumerate(rng.standard_normal((200, 8))):
+            store.add(str(i), str(i), datetime(2025, 1, 1), "world_event", row.tolist(), player="ana" if i % 2 else "")
+        query = rng.standard_normal(8).tolist()
+        exact = [t for t, _ in store.search(query, top_k=10) if int(t) % 2 == 0]
+
+        def gathered(indices):
+            raise AssertionError("rows gathered for a filter that keeps most of them")
+
+        store._rows = gathered
+        for player in ("ana", "ben"):
+            hits = store.search(query, top_k=10, options=RetrievalOptions(player=player))
+            assert len(hits) == 10
+        texts = [t for t, _ in store.search(query, top_k=len(exact), options=RetrievalOptions(player="ben"))]
+        assert texts == exact
+
+    def test_filters_by_type(self, store):
+        hits = store.search(_vec(1, 0, 0), top_k=5, options=RetrievalOptions(memory_types=("player_interaction",)))
+        assert [text for text, _ in hits] == ["east market"]
+
+    def test_filters_by_age(self, store):
+        options = RetrievalOptions(max_age_hours=36)
+        hits = store.search(_vec(1, 0, 0), top_k=5, options=options, now=datetime(2025, 1, 3, 12))
+        assert [text for text, _ in hits] == ["north-east tower", "east market"]
+
+    def test_filters_persisted_base(self, store, tmp_path):
+        store.save(tmp_path / "store")
+        loaded = MemoryStore.load(tmp_path / "store")
+        loaded.add("d", "south gate", datetime(2025, 1, 4), "world_event", _vec(0, 0, 1))
+
+        hits = loaded.search(_vec(1, 0, 0), top_k=5, options=RetrievalOptions(memory_types=("world_event",)))
+        assert [text for text, _ in hits] == ["north road", "south gate"]
+
+    def test_recency_breaks_near_ties(self):
+        s = MemoryStore()
+        s.add("old", "old raid", datetime(2025, 1, 1), "world_event", _vec(1, 0.01, 0))
+        s.add("new", "new raid", datetime(2025, 1, 10), "world_event", _vec(1, 0, 0.01))
+
+        options = RetrievalOptions(recency_weight=0.2, half_life_hours=24)
+        hits = s.search(_vec(1, 0, 0), top_k=1, options=options, now=datetime(2025, 1, 10))
+        assert hits[0][0] == "new raid"
+
+    def test_mmr_drops_near_duplicates(self):
+        s = MemoryStore()
+        s.add("a", "raid at dawn", datetime(2025, 1, 1), "world_event", _vec(1, 0.1, 0))
+        s.add("b", "raid at dawn again", datetime(2025, 1, 1), "world_event", _vec(1, 0.11, 0))
+        s.add("c", "storm at dusk", datetime(2025, 1, 1), "world_event", _vec(1, 0, 0.8))
+
+        plain = s.search(_vec(1, 0, 0), top_k=2)
+        diverse = s.search(_vec(1, 0, 0), top_k=2, options=RetrievalOptions(mmr_lambda=0.5))
+        assert [text for text, _ in plain] == ["raid at dawn", "raid at dawn again"]
+        assert [text for text, _ in diverse] == ["raid at dawn", "storm at dusk"]
+
+
+def _clustered(count: int, dim: int = 16, clusters: int = 20, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    return (centers[rng.integers(0, clusters, count)] + 0.2 * rng.standard_normal((count, dim))).astype(np.float32)
+
+
+def _fill(store: MemoryStore, rows: np.ndarray, start: int = 0) -> None:
+    for i, row in enumerate(rows, start=start):
+        store.add(str(i), f"memory {i}", datetime(2025, 1, 1), "world_event", row.tolist(), player="ana" if i % 2 else "")
+
+
+class TestApproximateIndex:
+    ann = ANNOptions(min_memories=500, nprobe=4)
+
+    def test_small_store_stays_exact(self):
+        s = MemoryStore(self.ann)
+        _fill(s, _clustered(100))
+        s.build_index()
+        assert s._index is None
+
+    def test_recall_matches_exact_search(self):
+        rows = _clustered(2000)
+        exact, approximate = MemoryStore(), MemoryStore(self.ann)
+        _fill(exact, rows)
+        _fill(approximate, rows)
+        approximate.build_index()
+
+        assert approximate._index is not None
+        found = 0
+        for query in _clustered(20, seed=1):
+            truth = {text for text, _ in exact.search(query.tolist(), top_k=10)}
+            found += len(truth & {text for text, _ in approximate.search(query.tolist(), top_k=10)})
+        assert found / 200 >= 0.9
+
+    def test_incremental_add_is_searchable(self):
+        s = MemoryStore(self.ann)
+        _fill(s, _clustered(600))
+        s.build_index()
+        s.add("new", "a brand new memory", datetime(2025, 1, 2), "world_event", [0] * 15 + [1])
+
+        assert len(s._index) == 601
+        assert s.search([0] * 15 + [1], top_k=1)[0][0] == "a brand new memory"
+
+    def test_filters_apply_to_candidates(self):
+        s = MemoryStore(self.ann)
+        _fill(s, _clustered(600))
+        s.build_index()
+        query = _clustered(1, seed=1)[0].tolist()
+
+        hits = s.search(query, top_k=5, options=RetrievalOptions(player="ben"))
+        assert len(hits) == 5
+        assert all(int(text.split()[1]) % 2 == 0 for text, _ in hits)
+
+    def test_remove_remaps_or_drops_index(self):
+        s = MemoryStore(self.ann)
+        _fill(s, _clustered(600))
+        s.build_index()
+        s.remove({str(i) for i in range(50)})
+        assert len(s._index) == 550
+        assert s.search(_clustered(600)[100].tolist(), top_k=1)[0][0] == "memory 100"
+
+        s.remove({str(i) for i in range(50, 101)})
+        assert s._index is None
+
+    @pytest.mark.parametrize("mmap", [False, True])
+    def test_persists_with_store(self, tmp_path, mmap):
+        s = MemoryStore(self.ann)
+        _fill(s, _clustered(600))
+        s.save(tmp_path / "store")
+        assert (tmp_path / "store" / "ann.npz").exists()
+
+        loaded = MemoryStore.load(tmp_path / "store", mmap=mmap, ann=self.ann)
+        assert np.array_equal(loaded._index.centroids, s._index.centroids)
+        query = _clustered(1, seed=1)[0].tolist()
+        assert loaded.search(query, top_k=5) == s.search(query, top_k=5)
+
+    def test_load_retrains_for_changed_nlist(self, tmp_path):
+        s = MemoryStore(self.ann)
+        _fill(s, _clustered(600))
+        s.save(tmp_path / "store")
+
+        loaded = MemoryStore.load(tmp_path / "store", ann=ANNOptions(min_memories=500, nlist=8))
+        assert len(loaded._index.centroids) == 8
+
+    def test_retrains_after_growth(self):
+        s = MemoryStore(self.ann)
+        _fill(s, _clustered(600))
+        s.build_index()
+        _fill(s, _clustered(600, seed=2), start=600)
+        s.build_index()
+        assert s._index.trained_size == 1200
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            ANNOptions(backend="hnsw")
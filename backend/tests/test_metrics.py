@@ -0,0 +1,77 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from backend.core import metrics
+from backend.core.metrics import Counter, Histogram, configure_tracing, current_span, record_usage, span, timed
+
+
+class TestMetrics:
+    def test_histogram_render_is_cumulative(self):
+        h = Histogram("t_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+        h.observe(0.05, "a")
+        h.observe(0.5, "a")
+        h.observe(5.0, "a")
+        lines = h.render()
+        assert 't_seconds_bucket{stage="a",le="0.1"} 1' in lines
+        assert 't_seconds_bucket{stage="a",le="1"} 2' in lines
+        assert 't_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+        assert 't_seconds_count{stage="a"} 3' in lines
+
+    def test_counter_escapes_labels(self):
+        c = Counter("t_total", "Test.", ("cache",))
+        c.inc('a"b', amount=2)
+        assert 't_total{cache="a\\"b"} 2' in c.render()
+
+    def test_record_usage(self):
+        response = SimpleNamespace(usage_metadata=SimpleNamespace(
+            prompt_token_count=120, cached_content_token_count=100, candidates_token_count=None,
+        ))
+        before = metrics.GEMINI_TOKENS.value("test", "prompt")
+        record_usage("test", response)
+        record_usage("test", SimpleNamespace())
+        assert metrics.GEMINI_TOKENS.value("test", "prompt") == before + 120
+        assert metrics.GEMINI_TOKENS.value("test", "output") == 0
+
+
+class TestTracing:
+    def test_spans_nest_and_export(self, tmp_path):
+        path = tmp_path / "spans.jsonl"
+        configure_tracing(str(path))
+        try:
+            with span("outer", world="ashwood") as outer:
+                with span("inner"):
+                    assert current_span().parent_id == outer.span_id
+            assert current_span() is None
+        finally:
+            configure_tracing("")
+
+        inner, outer = [json.loads(line) for line in path.read_text().splitlines()]
+        assert inner["parentSpanId"] == outer["spanId"]
+        assert inner["traceId"] == outer["traceId"]
+        assert outer["attributes"] == {"world": "ashwood"}
+        assert outer["endTimeUnixNano"] >= inner["endTimeUnixNano"]
+
+    def test_error_status(self):
+        try:
+            with span("failing") as s:
+                raise KeyError("x")
+        except KeyError:
+            pass
+        assert s.status == "ERROR"
+        assert s.attributes["exception.type"] == "KeyError"
+
+    def test_timed_sync_and_async(self):
+        @timed("test.sync")
+        def f(x):
+            return x + 1
+
+        @timed("test.async")
+        async def g(x):
+            return current_span().name
+
+        before = metrics.STAGE_SECONDS.count("test.sync")
+        assert f(1) == 2
+        assert asyncio.run(g(1)) == "test.async"
+        assert metrics.STAGE_SECONDS.count("test.sync") == before + 1
+        assert metrics.STAGE_SECONDS.count("test.async") >= 1
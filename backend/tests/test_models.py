@@ -6,7 +6,6 @@ from pydantic import ValidationError
 from backend.core.models import (
     ChatRequest,
     ChatResponse,
-    Memory,
     NPC,
     NPCPersonality,
     SimulationResult,
@@ -33,17 +32,6 @@ class TestNPC:
         assert npc.current_mood == "neutral"
 
 
-class TestMemory:
-    def test_valid_types(self):
-        m = Memory(content="Player said hello", memory_type="player_interaction")
-        assert m.memory_type == "player_interaction"
-        assert isinstance(m.timestamp, datetime)
-
-    def test_invalid_type(self):
-        with pytest.raises(ValidationError):
-            Memory(content="test", memory_type="invalid")
-
-
 class TestWorldEvent:
     def test_auto_fields(self):
         e = WorldEvent(description="Bandits attacked", affected_npc_ids=["aldric"])
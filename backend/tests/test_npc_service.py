@@ -1,11 +1,21 @@
 import asyncio
-from unittest.mock import MagicMock, patch
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
 import pytest
 from llama_index.core.embeddings import MockEmbedding
 
 from backend.core.config import Settings
 from backend.core.models import ChatRequest, NPC, NPCPersonality, WorldEvent, WorldState
+from backend.core.records import Memory
+from backend.services.consolidation import select_for_consolidation
+from backend.services.memory_journal import MemoryJournal
+from backend.services.memory_store import MemoryStore
 from backend.services.npc_service import NPCService
 
 
@@ -15,6 +25,7 @@ def settings(tmp_path):
         gemini_api_key="fake-key",
         db_path=str(tmp_path / "test.db"),
         index_dir=str(tmp_path / "indexes"),
+        data_dir=str(tmp_path),
     )
 
 
@@ -38,12 +49,12 @@ def world_state():
 
 @pytest.fixture
 def mock_service(settings):
-    with patch("backend.services.npc_service.genai") as mock_genai:
+    with patch("google.genai.Client") as mock_client_cls:
         mock_client = MagicMock()
         mock_response = MagicMock()
         mock_response.text = "Welcome, traveler."
-        mock_client.models.generate_content.return_value = mock_response
-        mock_genai.Client.return_value = mock_client
+        mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
+        mock_client_cls.return_value = mock_client
 
         service = NPCService(settings, embed_model=MockEmbedding(embed_dim=8))
         yield service, mock_client
@@ -57,13 +68,13 @@ class TestNPCService:
         assert result.npc_id == "aldric"
         assert result.npc_dialogue == "Welcome, traveler."
         assert isinstance(result.memories_retrieved, list)
-        mock_client.models.generate_content.assert_called_once()
+        mock_client.aio.models.generate_content.assert_awaited_once()
 
     def test_chat_prompt_includes_context(self, mock_service, npc, world_state):
         service, mock_client = mock_service
         asyncio.run(service.chat(npc, world_state, ChatRequest(player_message="Tell me about the dragon")))
 
-        call_kwargs = mock_client.models.generate_content.call_args[1]
+        call_kwargs = mock_client.aio.models.generate_content.call_args[1]
         assert "Tell me about the dragon" in call_kwargs["contents"]
         assert "Aldric" in call_kwargs["contents"]
         assert "merchant" in call_kwargs["contents"]
@@ -75,11 +86,357 @@ class TestNPCService:
 
         assert len(result.memories_retrieved) > 0
 
+    def test_anonymous_chat_sees_no_private_memories(self, mock_service, npc, world_state):
+        service, _ = mock_service
+        asyncio.run(service.chat(npc, world_state, ChatRequest(player_message="My vault code is 1234"), "ana"))
+        asyncio.run(service.add_world_event_to_npc("aldric", WorldEvent(description="Storm", affected_npc_ids=[])))
+
+        result = asyncio.run(service.chat(npc, world_state, ChatRequest(player_message="What is the code?")))
+        assert not any("1234" in m for m in result.memories_retrieved)
+        assert any("Storm" in m for m in result.memories_retrieved)
+        # ...and what anonymous callers say stays out of everyone else's memories.
+        result = asyncio.run(service.chat(npc, world_state, ChatRequest(player_message="Hi again"), "ben"))
+        assert not any("code" in m for m in result.memories_retrieved)
+
     def test_add_world_event(self, mock_service):
         service, _ = mock_service
         event = WorldEvent(description="Bandits raided the market", affected_npc_ids=["aldric"])
-        service.add_world_event_to_npc("aldric", event)
+        asyncio.run(service.add_world_event_to_npc("aldric", event))
 
         memories = service._retrieve_memories("aldric", "bandits")
         assert len(memories) > 0
         assert any("Bandits" in m for m in memories)
+
+    def test_add_memories_single_journal_append(self, mock_service):
+        service, _ = mock_service
+        memories = [
+            Memory(content="World event: Storm", memory_type="world_event"),
+            Memory(content="Gossip from mira: the roads are closed", memory_type="npc_gossip"),
+        ]
+        with patch.object(MemoryJournal, "append", autospec=True) as append:
+            asyncio.run(service.add_memories("aldric", memories))
+
+        append.assert_called_once()
+        assert len(append.call_args[0][1]) == 2
+        assert len(service._retrieve_memories("aldric", "storm", top_k=5)) == 2
+
+
+class TestMemoryJournal:
+    def test_store_appends_without_persisting_index(self, mock_service, settings):
+        service, _ = mock_service
+        service._store_memory("aldric", Memory(content="Met a knight", memory_type="player_interaction"))
+
+        npc_dir = Path(settings.index_dir) / "aldric"
+        assert (npc_dir / "journal.jsonl").exists()
+        assert not (npc_dir / "store").exists()
+
+    def test_journal_replayed_on_load(self, mock_service, settings):
+        service, _ = mock_service
+        service._store_memory("aldric", Memory(content="Met a knight", memory_type="player_interaction"))
+        service.clear_indexes()
+
+        memories = service._retrieve_memories("aldric", "knight")
+        assert any("knight" in m for m in memories)
+
+    def test_compact_folds_journal_into_index(self, mock_service, settings):
+        service, _ = mock_service
+        service._store_memory("aldric", Memory(content="Met a knight", memory_type="player_interaction"))
+        service.compact("aldric")
+        service.clear_indexes()
+
+        npc_dir = Path(settings.index_dir) / "aldric"
+        assert (npc_dir / "store" / "embeddings.npy").exists()
+        assert not (npc_dir / "journal.jsonl").exists()
+        assert any("knight" in m for m in service._retrieve_memories("aldric", "knight"))
+
+    def test_compact_builds_ann_index(self, settings):
+        with patch("google.genai.Client"):
+            service = NPCService(
+                settings.model_copy(update={"memory_ann_backend": "ivf", "memory_ann_min_memories": 4}),
+                embed_model=MockEmbedding(embed_dim=8),
+            )
+        asyncio.run(service.add_memories("aldric", [
+            Memory(content=f"Met knight {i}", memory_type="player_interaction") for i in range(5)
+        ]))
+        service.compact("aldric")
+        service.clear_indexes()
+
+        assert (Path(settings.index_dir) / "aldric" / "store" / "ann.npz").exists()
+        assert service._get_index("aldric")._index is not None
+        assert len(service._retrieve_memories("aldric", "knight")) == settings.retrieval_top_k
+
+    def test_cached_copy_sees_other_process_writes(self, mock_service, settings):
+        service, _ = mock_service
+        with patch("google.genai.Client"):
+            worker = NPCService(settings, embed_model=MockEmbedding(embed_dim=8))
+        service._store_memory("aldric", Memory(content="Met a knight", memory_type="player_interaction"))
+        worker._store_memory("aldric", Memory(content="DRAGON ATTACK", memory_type="world_event"))
+        service._store_memory("aldric", Memory(content="Sold a sword", memory_type="player_interaction"))
+
+        assert len(service._get_index("aldric")) == 3
+        service.compact("aldric")
+        with patch("google.genai.Client"):
+            fresh = NPCService(settings, embed_model=MockEmbedding(embed_dim=8))
+        texts = set(fresh._get_index("aldric").columns()[0])
+        assert len(texts) == 3
+
+    def test_cached_copy_reloads_after_other_process_compacts(self, mock_service, settings):
+        service, _ = mock_service
+        with patch("google.genai.Client"):
+            worker = NPCService(settings, embed_model=MockEmbedding(embed_dim=8))
+        service._store_memory("aldric", Memory(content="Met a knight", memory_type="player_interaction"))
+        worker._store_memory("aldric", Memory(content="DRAGON ATTACK", memory_type="world_event"))
+        worker.compact("aldric")
+        worker._store_memory("aldric", Memory(content="The bridge fell", memory_type="world_event"))
+
+        assert len(service._get_index("aldric")) == 3
+
+    def test_reads_legacy_llama_index_directory(self, mock_service, settings):
+        from llama_index.core import Document, VectorStoreIndex
+
+        service, _ = mock_service
+        legacy = VectorStoreIndex([], embed_model=MockEmbedding(embed_dim=8))
+        legacy.insert(Document(
+            text="[world_event] World event: The bridge collapsed",
+            metadata={"timestamp": "2025-01-01T00:00:00", "type": "world_event"},
+        ))
+        legacy.storage_context.persist(persist_dir=str(Path(settings.index_dir) / "aldric"))
+
+        assert service._retrieve_memories("aldric", "bridge") == ["[world_event] World event: The bridge collapsed"]
+
+    def test_legacy_llama_index_migration_keeps_ann_options(self, settings):
+        from llama_index.core import Document, VectorStoreIndex
+
+        legacy = VectorStoreIndex([], embed_model=MockEmbedding(embed_dim=8))
+        for i in range(4):
+            legacy.insert(Document(text=f"Met knight {i}", metadata={"type": "player_interaction"}))
+        legacy.storage_context.persist(persist_dir=str(Path(settings.index_dir) / "aldric"))
+        with patch("google.genai.Client"):
+            service = NPCService(
+                settings.model_copy(update={"memory_ann_backend": "ivf", "memory_ann_min_memories": 4}),
+                embed_model=MockEmbedding(embed_dim=8),
+            )
+
+        assert service._get_index("aldric")._index is not None
+
+    def test_concurrent_loads_share_one_copy(self, mock_service, settings):
+        service, _ = mock_service
+        service._store_memory("aldric", Memory(content="Met a knight", memory_type="player_interaction"))
+        service.clear_indexes()
+        load = MemoryStore.load
+
+        def slow_load(*args, **kwargs):
+            time.sleep(0.05)
+            return load(*args, **kwargs)
+
+        with patch("backend.services.npc_service.MemoryStore.load", side_effect=slow_load):
+            with ThreadPoolExecutor(2) as pool:
+                first, second = pool.map(lambda _: service._get_index("aldric"), range(2))
+        assert first is second
+
+    def test_rotate_returns_records_the_copy_has_not_read(self, tmp_path):
+        mine, theirs = MemoryJournal(tmp_path / "journal.jsonl"), MemoryJournal(tmp_path / "journal.jsonl")
+        mine.append([{"id": "a"}])
+        mine.replay()
+        theirs.replay()
+        theirs.append([{"id": "b"}])
+
+        assert [r["id"] for r in mine.rotate()] == ["b"]
+        assert theirs.rotate() is None
+        assert [r["id"] for r in theirs.replay()] == ["a", "b"]
+
+    def test_torn_final_line_is_ignored(self, tmp_path):
+        journal = MemoryJournal(tmp_path / "journal.jsonl")
+        journal.append([{"id": "a"}, {"id": "b"}])
+        with open(journal.path, "a") as f:
+            f.write('{"id": "c", "te')
+
+        assert [r["id"] for r in journal.replay()] == ["a", "b"]
+
+
+class TestRetrievalConfig:
+    def test_scenario_overrides_defaults(self, settings):
+        scoped = settings.for_scenario("byte-brew")
+        assert scoped.retrieval_half_life_hours == 12
+        assert scoped.retrieval_recency_weight == 0.3
+        assert settings.for_scenario("ashwood").retrieval_half_life_hours == settings.retrieval_half_life_hours
+
+    def test_retrieval_uses_configured_filters(self, settings):
+        with patch("google.genai.Client"):
+            service = NPCService(
+                settings.model_copy(update={"retrieval_memory_types": ["world_event"], "retrieval_top_k": 2}),
+                embed_model=MockEmbedding(embed_dim=8),
+            )
+        asyncio.run(service.add_memories("aldric", [
+            Memory(content="Storm", memory_type="world_event"),
+            Memory(content="Flood", memory_type="world_event"),
+            Memory(content="Fire", memory_type="world_event"),
+            Memory(content="Hello", memory_type="player_interaction"),
+        ]))
+
+        memories = service._retrieve_memories("aldric", "weather")
+        assert len(memories) == 2
+        assert all(m.startswith("[world_event]") for m in memories)
+
+
+class TestConsolidation:
+    @pytest.fixture
+    def consolidating(self, settings):
+        return settings.model_copy(update={
+            "hot_memory_limit": 4,
+            "consolidation_group_size": 2,
+            "consolidation_min_age_hours": 1,
+            "cold_search_threshold": 1.1,
+        })
+
+    @pytest.fixture
+    def service(self, consolidating):
+        with patch("google.genai.Client") as mock_client_cls:
+            mock_response = MagicMock()
+            mock_response.text = "I traded with many travellers."
+            mock_client_cls.return_value.aio.models.generate_content = AsyncMock(return_value=mock_response)
+            yield NPCService(consolidating, embed_model=MockEmbedding(embed_dim=8))
+
+    def _add(self, service, count, timestamp):
+        memories = [Memory(content=f"Trade {i}", timestamp=timestamp, memory_type="player_interaction") for i in range(count)]
+        asyncio.run(service.add_memories("aldric", memories))
+
+    def test_below_limit_is_noop(self, service):
+        self._add(service, 4, datetime(2025, 1, 1))
+        assert asyncio.run(service.consolidate_memories("aldric")) == 0
+
+    def test_recent_memories_kept(self, service):
+        self._add(service, 6, datetime.utcnow())
+        assert asyncio.run(service.consolidate_memories("aldric")) == 0
+
+    def test_moves_originals_to_cold_tier(self, service, settings):
+        self._add(service, 6, datetime(2025, 1, 1))
+
+        assert asyncio.run(service.consolidate_memories("aldric")) == 2
+        store = service._get_index("aldric")
+        assert len(store) == 4
+        assert sorted(len(s) for s in store.sources.values()) == [2, 2]
+        assert len(service._get_cold_index("aldric")) == 4
+
+        service.clear_indexes()
+        assert len(service._get_index("aldric")) == 4
+        assert (Path(settings.index_dir) / "aldric" / "cold" / "embeddings.npy").exists()
+
+    def test_cold_tier_searched_on_weak_hot_match(self, service):
+        self._add(service, 6, datetime(2025, 1, 1))
+        asyncio.run(service.consolidate_memories("aldric"))
+
+        memories = service._retrieve_memories("aldric", "trade", top_k=10)
+        assert len(memories) == 8
+        assert sum(m.startswith("[summary]") for m in memories) == 2
+
+    def test_consolidation_reaches_another_processs_copy(self, service, consolidating):
+        with patch("google.genai.Client"):
+            other = NPCService(consolidating, embed_model=MockEmbedding(embed_dim=8))
+        self._add(service, 6, datetime(2025, 1, 1))
+        assert len(other._get_index("aldric")) == 6
+
+        asyncio.run(service.consolidate_memories("aldric"))
+        assert len(other._get_cold_index("aldric")) == 4
+        self._add(service, 4, datetime(2025, 1, 1))
+        asyncio.run(service.consolidate_memories("aldric"))
+        while service._compacting:
+            time.sleep(0.01)
+
+        # The other copy picks up the summaries and the archive, and saving
+        # it does not bring the archived originals back.
+        texts = other._get_index("aldric").columns()[0]
+        assert sorted(texts) == sorted(service._get_index("aldric").columns()[0])
+        assert len(other._get_cold_index("aldric")) == len(service._get_cold_index("aldric")) > 4
+        other.compact("aldric")
+        service.clear_indexes()
+        assert sorted(service._get_index("aldric").columns()[0]) == sorted(texts)
+
+    def test_selection_prefers_unretrieved_memories(self):
+        ids = ["a", "b", "c", "d", "e"]
+        timestamps = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+        hits = np.array([0, 5, 0, 0, 0])
+
+        groups = select_for_consolidation(ids, timestamps, hits, np.zeros(5), 4, 0, 2, 10, datetime.utcnow())
+        assert groups == [["a", "c"]]
+
+    def test_selection_never_mixes_players(self):
+        ids = ["a", "b", "c", "d", "e", "f"]
+        timestamps = np.arange(6, dtype=float)
+        owners = np.array([1, 2, 1, 2, 0, 0])
+
+        groups = select_for_consolidation(ids, timestamps, np.zeros(6), owners, 2, 0, 2, 10, datetime.utcnow())
+        assert sorted(groups) == [["a", "c"], ["b", "d"], ["e", "f"]]
+
+
+class TestConcurrency:
+    def test_chats_limited_per_scenario(self, settings, npc, world_state):
+        in_flight = 0
+        peak = 0
+
+        async def slow_generate(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            response = MagicMock()
+            response.text = "Hmm."
+            return response
+
+        with patch("google.genai.Client") as mock_client_cls:
+            mock_client_cls.return_value.aio.models.generate_content = slow_generate
+            service = NPCService(
+                settings.model_copy(update={"max_concurrent_chats": 2}),
+                embed_model=MockEmbedding(embed_dim=8),
+            )
+
+            async def run_all():
+                await asyncio.gather(*(
+                    service.chat(npc, world_state, ChatRequest(player_message=f"Hello {i}"))
+                    for i in range(5)
+                ))
+
+            asyncio.run(run_all())
+
+        assert peak == 2
+
+
+class TestChatStream:
+    def test_streams_dialogue_then_metadata(self, mock_service, npc, world_state):
+        service, mock_client = mock_service
+        reply = json.dumps({"dialogue": "Welcome, traveler.", "choices": ["Buy", "Sell"]})
+
+        async def stream():
+            for i in range(0, len(reply), 7):
+                chunk = MagicMock()
+                chunk.text = reply[i:i + 7]
+                yield chunk
+
+        mock_client.aio.models.generate_content_stream = AsyncMock(return_value=stream())
+
+        async def collect():
+            return [e async for e in service.chat_stream(npc, world_state, ChatRequest(player_message="Hi"))]
+
+        events = asyncio.run(collect())
+        names = [name for name, _ in events]
+        assert names[-3:] == ["choices", "memories_retrieved", "done"]
+        assert "".join(data for name, data in events if name == "dialogue") == "Welcome, traveler."
+        assert events[-1][1].choices == ["Buy", "Sell"]
+
+    def test_stream_does_not_store_memory(self, mock_service, npc, world_state):
+        service, mock_client = mock_service
+
+        async def stream():
+            chunk = MagicMock()
+            chunk.text = '{"dialogue": "Hi"}'
+            yield chunk
+
+        mock_client.aio.models.generate_content_stream = AsyncMock(return_value=stream())
+
+        async def drain():
+            async for _ in service.chat_stream(npc, world_state, ChatRequest(player_message="Hi")):
+                pass
+
+        asyncio.run(drain())
+        assert service._retrieve_memories("aldric", "Hi") == []
@@ -0,0 +1,54 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from backend.benchmarks.fakes import FakeGenAIClient
+from backend.services.prompt_cache import PromptCache, prefix_key
+
+PREFIX = "You are Aldric, a merchant. " * 10
+
+
+@pytest.fixture
+def client():
+    return FakeGenAIClient()
+
+
+class TestPromptCache:
+    def test_short_prefix_sent_inline(self, client):
+        cache = PromptCache(client, "model", min_chars=10_000)
+        args = asyncio.run(cache.request(prefix_key("ashwood", "aldric", PREFIX), PREFIX, "Hello"))
+
+        assert args == {"contents": PREFIX + "Hello"}
+        assert client.aio.caches.prefixes == {}
+
+    def test_prefix_registered_once(self, client):
+        cache = PromptCache(client, "model", min_chars=10)
+        key = prefix_key("ashwood", "aldric", PREFIX, 3)
+
+        async def run():
+            return await asyncio.gather(*(cache.request(key, PREFIX, f"turn {i}") for i in range(5)))
+
+        results = asyncio.run(run())
+        assert list(client.aio.caches.prefixes.values()) == [PREFIX]
+        assert {r["config"].cached_content for r in results} == set(client.aio.caches.prefixes)
+        assert results[0]["contents"] == "turn 0"
+        assert cache.misses == 1
+
+    def test_new_world_version_replaces_handle(self, client):
+        cache = PromptCache(client, "model", min_chars=10)
+        asyncio.run(cache.request(prefix_key("ashwood", "aldric", PREFIX, 1), PREFIX, ""))
+        changed = PREFIX + "CURRENT MOOD: worried"
+        asyncio.run(cache.request(prefix_key("ashwood", "aldric", changed, 2), changed, ""))
+
+        assert list(client.aio.caches.prefixes.values()) == [changed]
+
+    def test_falls_back_inline_when_caching_fails(self):
+        client = MagicMock()
+        client.aio.caches.create = AsyncMock(side_effect=RuntimeError("too small"))
+        cache = PromptCache(client, "model", min_chars=10)
+        key = prefix_key("ashwood", "aldric", PREFIX)
+
+        assert asyncio.run(cache.request(key, PREFIX, "Hi")) == {"contents": PREFIX + "Hi"}
+        asyncio.run(cache.request(key, PREFIX, "Hi"))
+        assert client.aio.caches.create.call_count == 1
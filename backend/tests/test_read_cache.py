@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from backend.core.config import Settings
+from backend.core.database import DatabasePools, get_npc, get_npcs, save_world_event, update_npc_mood
+from backend.core.models import WorldEvent
+from backend.core.seed import seed_scenario
+from backend.services.read_cache import ReadCache
+
+
+@pytest.fixture
+def world(tmp_path):
+    settings = Settings(gemini_api_key="fake-key", data_dir=str(tmp_path))
+    seed_scenario(settings, "ashwood")
+    pools = DatabasePools(size=2)
+    yield settings.for_scenario("ashwood"), pools
+    pools.close()
+
+
+class _CountingLoad:
+    def __init__(self, load):
+        self.load = load
+        self.calls = 0
+
+    def __call__(self, conn):
+        self.calls += 1
+        return self.load(conn)
+
+
+class TestReadCache:
+    def test_hits_until_a_write(self, world):
+        scoped, pools = world
+        cache = ReadCache(pools)
+        load = _CountingLoad(get_npcs)
+
+        first = asyncio.run(cache.get(scoped, "npcs", load))
+        assert asyncio.run(cache.get(scoped, "npcs", load)) is first
+        assert load.calls == 1
+
+        with pools.get(scoped).connection() as conn:
+            update_npc_mood(conn, "aldric", "angry")
+        changed = asyncio.run(cache.get(scoped, "npcs", load))
+        assert load.calls == 2
+        assert changed.etag != first.etag
+        assert b'"angry"' in changed.body
+
+    def test_event_writes_invalidate(self, world):
+        scoped, pools = world
+        cache = ReadCache(pools)
+        load = _CountingLoad(get_npcs)
+        asyncio.run(cache.get(scoped, "npcs", load))
+        with pools.get(scoped).connection() as conn:
+            save_world_event(conn, WorldEvent(description="Storm", affected_npc_ids=[]))
+        asyncio.run(cache.get(scoped, "npcs", load))
+        assert load.calls == 2
+
+    def test_concurrent_misses_share_one_load(self, world):
+        scoped, pools = world
+        cache = ReadCache(pools)
+        load = _CountingLoad(get_npcs)
+
+        async def run():
+            return await asyncio.gather(*(cache.get(scoped, "npcs", load) for _ in range(10)))
+
+        responses = asyncio.run(run())
+        assert load.calls == 1
+        assert len({id(r) for r in responses}) == 1
+
+    def test_not_found_is_not_cached(self, world):
+        scoped, pools = world
+        cache = ReadCache(pools)
+        load = _CountingLoad(lambda conn: get_npc(conn, "ghost"))
+        assert asyncio.run(cache.get(scoped, ("npc", "ghost"), load)) is None
+        assert asyncio.run(cache.get(scoped, ("npc", "ghost"), load)) is None
+        assert load.calls == 2
+
+    def test_reopened_world_does_not_serve_old_entries(self, world):
+        scoped, pools = world
+        cache = ReadCache(pools)
+        load = _CountingLoad(get_npcs)
+        asyncio.run(cache.get(scoped, "npcs", load))
+        pools.evict(scoped)
+        asyncio.run(cache.get(scoped, "npcs", load))
+        assert load.calls == 2
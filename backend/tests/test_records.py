@@ -0,0 +1,31 @@
+from datetime import datetime
+
+import pytest
+from pydantic_core import to_json
+
+from backend.core.models import NPC, NPCPersonality
+from backend.core.records import Memory, NPCRecord, PersonalityRecord
+
+
+class TestMemory:
+    def test_valid_types(self):
+        m = Memory(content="Player said hello", memory_type="player_interaction")
+        assert m.memory_type == "player_interaction"
+        assert isinstance(m.timestamp, datetime)
+        assert not hasattr(m, "__dict__")
+
+    def test_invalid_type(self):
+        with pytest.raises(ValueError):
+            Memory(content="test", memory_type="invalid")
+
+
+class TestNPCRecord:
+    def test_serializes_like_the_model(self):
+        record = NPCRecord("aldric", PersonalityRecord("Aldric", "merchant", "Old trader", ["survive"]), "wary")
+        model = NPC(
+            id="aldric",
+            personality=NPCPersonality(name="Aldric", role="merchant", backstory="Old trader", goals=["survive"]),
+            current_mood="wary",
+        )
+        assert to_json(record) == model.model_dump_json().encode()
+        assert NPC.model_validate(record, from_attributes=True) == model
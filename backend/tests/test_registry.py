@@ -0,0 +1,161 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from llama_index.core.embeddings import MockEmbedding
+
+from backend.core.config import Settings
+from backend.core.database import DatabasePools, get_npcs
+from backend.core.lru import LRUCache
+from backend.core.records import Memory
+from backend.services.registry import NPCServiceRegistry
+from backend.services.worlds import WorldManager
+
+
+@pytest.fixture
+def settings(tmp_path):
+    return Settings(
+        gemini_api_key="fake-key",
+        db_path=str(tmp_path / "test.db"),
+        index_dir=str(tmp_path / "indexes"),
+        data_dir=str(tmp_path),
+    )
+
+
+@pytest.fixture
+def registry():
+    with patch("google.genai.Client"):
+        reg = NPCServiceRegistry(embed_model=MockEmbedding(embed_dim=8))
+        yield reg
+        reg.clear()
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_bytes=10, sizeof=len)
+        cache.put("a", "xxxx")
+        cache.put("b", "xxxx")
+        cache.get("a")
+        cache.put("c", "xxxx")
+        assert "a" in cache
+        assert "b" not in cache
+        assert cache.nbytes == 8
+
+    def test_touch_remeasures(self):
+        cache = LRUCache(max_bytes=10, sizeof=len)
+        items = ["x"]
+        cache.put("a", items)
+        items.extend(["x"] * 4)
+        cache.touch("a")
+        assert cache.nbytes == 5
+
+    def test_keeps_oversized_single_entry(self):
+        cache = LRUCache(max_bytes=1, sizeof=len)
+        cache.put("a", "xxxx")
+        assert cache.get("a") == "xxxx"
+
+
+class TestNPCServiceRegistry:
+    def test_reuses_service_per_scenario(self, registry, settings):
+        assert registry.get(settings) is registry.get(settings)
+
+    def test_separate_service_per_scenario(self, registry, settings, tmp_path):
+        other = settings.model_copy(update={"index_dir": str(tmp_path / "other")})
+        assert registry.get(settings) is not registry.get(other)
+
+    def test_keeps_index_warm(self, registry, settings):
+        service = registry.get(settings)
+        service._store_memory("aldric", Memory(content="Saw a dragon", memory_type="world_event"))
+        with patch("backend.services.npc_service.MemoryStore.load") as load:
+            assert registry.get(settings)._retrieve_memories("aldric", "dragon")
+            load.assert_not_called()
+
+    def test_invalidate_drops_service(self, registry, settings):
+        service = registry.get(settings)
+        registry.invalidate(settings)
+        assert registry.get(settings) is not service
+
+    def test_worlds_share_resources_but_not_indexes(self, registry, settings, tmp_path):
+        a = registry.get(settings)
+        b = registry.get(settings.model_copy(update={"index_dir": str(tmp_path / "other")}))
+        assert a._executor is b._executor and a._indexes is b._indexes
+
+        a._store_memory("aldric", Memory(content="Saw a dragon", memory_type="world_event"))
+        assert b._retrieve_memories("aldric", "dragon") == []
+        b.clear_indexes()
+        assert (a._index_dir / "aldric") in a._indexes
+
+    def test_embedding_cache_lives_in_data_dir(self, registry, settings, tmp_path):
+        registry.get(settings.for_scenario("ashwood", "w1"))
+        assert (tmp_path / "embedding_cache.db").exists()
+        assert not list((tmp_path / "worlds").rglob("embedding_cache.db"))
+
+    def test_player_memories_stay_private(self, registry, settings):
+        service = registry.get(settings)
+        service._store_memory("aldric", Memory(content="Ana owes me gold", memory_type="player_interaction", player_id="ana"))
+        service._store_memory("aldric", Memory(content="Bandits on the road", memory_type="world_event"))
+
+        assert len(service._retrieve_memories("aldric", "gold", player_id="ana")) == 2
+        assert service._retrieve_memories("aldric", "gold", player_id="ben") == ["[world_event] Bandits on the road"]
+
+
+class TestWorldManager:
+    @pytest.fixture
+    def worlds(self, registry, settings):
+        pools = DatabasePools(size=1)
+        yield WorldManager(settings.model_copy(update={"world_idle_seconds": 60, "max_worlds": 2}), pools, registry)
+        pools.close()
+
+    def test_seeds_world_on_first_use(self, worlds, settings):
+        scoped = worlds.get("ashwood", "w1")
+        assert scoped.world_id == "w1"
+        assert scoped.db_path.startswith(settings.data_dir)
+        with worlds._db_pools.get(scoped).connection() as conn:
+            assert {n.id for n in get_npcs(conn)} == {"aldric", "mira"}
+
+    def test_default_world_seeded_once(self, worlds, settings):
+        scoped = settings.for_scenario("ashwood")
+        assert not os.path.exists(scoped.db_path)
+        worlds.open_default(scoped)
+        with worlds._db_pools.get(scoped).connection() as conn:
+            conn.execute("DELETE FROM npcs")
+            conn.commit()
+        worlds.open_default(scoped)
+        with worlds._db_pools.get(scoped).connection() as conn:
+            assert get_npcs(conn) == []
+
+    def test_active_default_world_never_released(self, worlds, settings):
+        worlds.get("ashwood", "default")
+        worlds.open_default(settings.for_scenario("ashwood"))
+        worlds.get("ashwood", "w1")
+        worlds.get("byte-brew", "w2")  # over max_worlds: w1 goes, not the default
+
+        assert ("ashwood", "w1") not in worlds
+        assert worlds.evict_idle(now=10**9) == [("byte-brew", "w2")]
+        assert ("ashwood", "default") in worlds
+
+    def test_world_limit_fits_open_file_limit(self, registry, settings):
+        with patch("backend.services.worlds.resource.getrlimit", return_value=(1024, 4096)):
+            worlds = WorldManager(settings, DatabasePools(size=1), registry)
+        assert worlds._max_worlds * 6 + 256 <= 1024
+
+    def test_idle_worlds_released(self, worlds):
+        worlds.get("ashwood", "w1")
+        assert worlds.evict_idle(now=0) == []
+        assert worlds.evict_idle(now=10**9) == [("ashwood", "w1")]
+        assert len(worlds) == 0
+        assert worlds.get("ashwood", "w1").world_id == "w1"
+
+    def test_least_recently_used_world_released_over_limit(self, worlds):
+        worlds.get("ashwood", "w1")
+        worlds.get("ashwood", "w2")
+        worlds.get("ashwood", "w1")
+        worlds.get("ashwood", "w3")
+        assert ("ashwood", "w2") not in worlds
+        assert ("ashwood", "w1") in worlds
+
+    def test_rejects_unknown_scenario_and_bad_ids(self, worlds):
+        with pytest.raises(KeyError):
+            worlds.get("atlantis")
+        with pytest.raises(ValueError):
+            worlds.get("ashwood", "../escape")
@@ -0,0 +1,98 @@
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from backend.core.config import Settings
+from backend.core.sharding import owns, shard_for
+from backend.router import create_router
+
+SHARDS = ["http://shard0", "http://shard1", "http://shard2"]
+
+
+class _Shards(httpx.AsyncBaseTransport):
+    """Like httpx.MockTransport, but leaves the response body unread so it streams like a real upstream."""
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = self.handler(request)
+
+        async def body():
+            yield response.content
+
+        return httpx.Response(response.status_code, headers=response.headers, content=body())
+
+
+def _router(seen: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.url.path.endswith("/stream"):
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=b"event: token\ndata: \"hi\"\n\n")
+        return httpx.Response(200, json={"host": request.url.host, "path": request.url.path})
+
+    return TestClient(create_router(SHARDS, transport=_Shards(handler)))
+
+
+def _shard_url(scenario: str, world: str) -> str:
+    return SHARDS[shard_for(scenario, world, len(SHARDS))]
+
+
+class TestSharding:
+    def test_stable_and_in_range(self):
+        shards = {shard_for("ashwood", f"w{i}", 4) for i in range(100)}
+        assert shards == {0, 1, 2, 3}
+        assert shard_for("ashwood", "w1", 4) == shard_for("ashwood", "w1", 4)
+
+    def test_every_world_has_one_owner(self):
+        owners = [i for i in range(3) if owns(Settings(gemini_api_key="k", shard_index=i, shard_count=3), "ashwood", "w7")]
+        assert owners == [shard_for("ashwood", "w7", 3)]
+
+    def test_unsharded_owns_everything(self):
+        assert owns(Settings(gemini_api_key="k"), "ashwood", "anything")
+
+
+class TestRouter:
+    def test_routes_by_world_headers(self):
+        seen = []
+        with _router(seen) as client:
+            for i in range(10):
+                client.get("/npcs", headers={"X-Scenario-Id": "byte-brew", "X-World-Id": f"w{i}"})
+        for i, request in enumerate(seen):
+            assert f"http://{request.url.host}" == _shard_url("byte-brew", f"w{i}")
+            assert request.headers["x-world-id"] == f"w{i}"
+
+    def test_routes_world_path_prefix(self):
+        seen = []
+        with _router(seen) as client:
+            resp = client.post("/worlds/ashwood/party-9/npc/elena/chat", json={"message": "hi"})
+        assert resp.json()["path"] == "/npc/elena/chat"
+        assert f"http://{seen[0].url.host}" == _shard_url("ashwood", "party-9")
+        assert seen[0].headers["x-scenario-id"] == "ashwood"
+        assert seen[0].headers["x-world-id"] == "party-9"
+        assert json.loads(seen[0].content) == {"message": "hi"}
+
+    def test_headerless_requests_follow_activated_scenario(self):
+        seen = []
+        with _router(seen) as client:
+            client.get("/world")
+            client.post("/scenarios/byte-brew/activate")
+            client.get("/world")
+        assert seen[0].headers["x-scenario-id"] == "ashwood"
+        assert f"http://{seen[1].url.host}" == _shard_url("byte-brew", "default")
+        assert seen[2].headers["x-scenario-id"] == "byte-brew"
+        assert f"http://{seen[2].url.host}" == _shard_url("byte-brew", "default")
+
+    def test_streams_sse_through(self):
+        with _router([]) as client:
+            resp = client.post("/npc/elena/chat/stream", json={"message": "hi"})
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        assert resp.text == "event: token\ndata: \"hi\"\n\n"
+
+    def test_unreachable_shard_is_503(self):
+        def handler(request):
+            raise httpx.ConnectError("down", request=request)
+
+        with TestClient(create_router(SHARDS, transport=httpx.MockTransport(handler))) as client:
+            assert client.get("/world").status_code == 503
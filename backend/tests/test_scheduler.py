@@ -0,0 +1,165 @@
+import asyncio
+import random
+
+import pytest
+
+from backend.core.config import Settings
+from backend.services.scheduler import SimulationScheduler
+
+INTERVAL = 100
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 10_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _world(world_id: str) -> Settings:
+    return Settings(gemini_api_key="fake-key", world_id=world_id)
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+def _scheduler(clock, runs, last_tick=None, **overrides):
+    options = dict(
+        simulation_interval_seconds=INTERVAL,
+        simulation_jitter=0.0,
+        simulation_player_idle_seconds=300,
+        simulation_max_backoff_seconds=800,
+    )
+    settings = Settings(gemini_api_key="fake-key", **{**options, **overrides})
+
+    async def simulate(scoped, hours):
+        runs.append((scoped.world_id, hours))
+        await asyncio.sleep(0)
+
+    return SimulationScheduler(settings, simulate, last_tick or (lambda s: None), clock=clock, rng=random.Random(0))
+
+
+async def _drain(scheduler):
+    while scheduler._tasks:
+        await asyncio.gather(*scheduler._tasks)
+
+
+class TestSimulationScheduler:
+    def test_runs_worlds_when_due(self, clock):
+        async def run():
+            runs = []
+            scheduler = _scheduler(clock, runs)
+            scheduler.touch(_world("a"))
+            assert scheduler.run_due() == []
+
+            clock.now += INTERVAL
+            assert scheduler.run_due() == [("ashwood", "a")]
+            await _drain(scheduler)
+            assert runs == [("a", 6)]
+            assert scheduler.next_due() == clock.now + INTERVAL
+
+        asyncio.run(run())
+
+    def test_bounded_concurrency(self, clock):
+        async def run():
+            in_flight, peak = [], []
+            settings = Settings(gemini_api_key="fake-key", simulation_interval_seconds=INTERVAL, simulation_concurrency=2)
+
+            async def simulate(scoped, hours):
+                in_flight.append(scoped.world_id)
+                peak.append(len(in_flight))
+                await asyncio.sleep(0.01)
+                in_flight.remove(scoped.world_id)
+
+            scheduler = SimulationScheduler(settings, simulate, lambda s: None, clock=clock)
+            for i in range(6):
+                scheduler.touch(_world(f"w{i}"))
+            clock.now += 2 * INTERVAL
+            assert len(scheduler.run_due()) == 6
+            await _drain(scheduler)
+            assert max(peak) == 2
+
+        asyncio.run(run())
+
+    def test_jitter_spreads_due_times(self, clock):
+        scheduler = _scheduler(clock, [], simulation_jitter=0.5)
+        for i in range(20):
+            scheduler.touch(_world(f"w{i}"))
+        dues = {ticks.due for ticks in scheduler._worlds.values()}
+        assert len(dues) == 20
+        assert all(clock.now + INTERVAL <= d <= clock.now + 1.5 * INTERVAL for d in dues)
+
+    def test_idle_worlds_back_off_and_resume(self, clock):
+        async def run():
+            runs = []
+            scheduler = _scheduler(clock, runs)
+            scheduler.touch(_world("a"))
+
+            clock.now += 400  # players left 400s ago
+            assert scheduler.run_due() == []
+            assert scheduler.next_due() == clock.now + 2 * INTERVAL
+            clock.now += 2 * INTERVAL
+            scheduler.run_due()
+            assert scheduler.next_due() == clock.now + 4 * INTERVAL
+            assert runs == []
+
+            scheduler.touch(_world("a"))  # a player returns
+            assert scheduler.next_due() == clock.now
+            scheduler.run_due()
+            await _drain(scheduler)
+            # Six intervals passed since the last tick; they run as one simulation.
+            assert runs == [("a", 36)]
+
+        asyncio.run(run())
+
+    def test_catches_up_after_downtime(self, clock):
+        async def run():
+            runs = []
+            scheduler = _scheduler(clock, runs, last_tick=lambda s: clock.now - 3.5 * INTERVAL)
+            scheduler.touch(_world("a"))
+            assert scheduler.next_due() == clock.now
+
+            scheduler.run_due()
+            await _drain(scheduler)
+            assert runs == [("a", 18)]
+
+        asyncio.run(run())
+
+    def test_catch_up_is_capped(self, clock):
+        async def run():
+            runs = []
+            scheduler = _scheduler(clock, runs, last_tick=lambda s: clock.now - 1000 * INTERVAL, simulation_max_catchup_ticks=4)
+            scheduler.touch(_world("a"))
+            scheduler.run_due()
+            await _drain(scheduler)
+            assert runs == [("a", 24)]
+
+        asyncio.run(run())
+
+    def test_failed_run_is_retried_next_interval(self, clock):
+        async def run():
+            settings = Settings(gemini_api_key="fake-key", simulation_interval_seconds=INTERVAL, simulation_jitter=0.0)
+
+            async def simulate(scoped, hours):
+                raise RuntimeError("gemini down")
+
+            scheduler = SimulationScheduler(settings, simulate, lambda s: None, clock=clock)
+            scheduler.touch(_world("a"))
+            clock.now += INTERVAL
+            scheduler.run_due()
+            await _drain(scheduler)
+            assert scheduler.next_due() == clock.now + INTERVAL
+
+        asyncio.run(run())
+
+    def test_forgotten_worlds_are_not_run(self, clock):
+        runs = []
+        scheduler = _scheduler(clock, runs)
+        scheduler.touch(_world("a"))
+        scheduler.forget(_world("a"))
+        clock.now += INTERVAL
+        assert scheduler.run_due() == []
+        assert ("ashwood", "a") not in scheduler
@@ -0,0 +1,226 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from temporalio import activity
+from temporalio.testing import ActivityEnvironment, WorkflowEnvironment
+from temporalio.worker import Worker
+
+from temporalio.exceptions import ApplicationError
+
+from backend.core.config import Settings
+from backend.core.database import DatabasePools, get_db, get_simulation_result, save_simulation_result, save_world_event
+from backend.core.models import GossipItem, SimulationResult, SimulationTick, WorldEvent
+from backend.core.seed import seed_scenario
+from backend.services.registry import NPCServiceRegistry
+from backend.services.snapshots import SnapshotCache, StaleWorldError
+from backend.temporal import workflows
+from backend.temporal.workflows import (
+    ConsolidateInput,
+    NPCMemoriesInput,
+    SimulateInput,
+    SimulationRef,
+    WorldSimulationWorkflow,
+    npc_memories,
+    update_npc_memories_activity,
+)
+
+
+@pytest.fixture
+def result():
+    return SimulationResult(
+        event=WorldEvent(description="Bandits raided the market", affected_npc_ids=["aldric", "mira"]),
+        npc_reactions={"aldric": "afraid"},
+        gossip=[
+            GossipItem(from_npc="mira", to_npc="aldric", content="They came from the north"),
+            GossipItem(from_npc="aldric", to_npc="tobin", content="Lock your doors"),
+        ],
+    )
+
+
+class TestNPCMemories:
+    def test_one_entry_per_npc(self, result):
+        memories = npc_memories(result)
+
+        assert set(memories) == {"aldric", "mira", "tobin"}
+        assert [m.memory_type for m in memories["aldric"]] == ["world_event", "npc_gossip"]
+        assert [m.memory_type for m in memories["tobin"]] == ["npc_gossip"]
+
+    def test_multi_tick_runs_still_batch_per_npc(self, result):
+        earlier = SimulationTick(
+            event=WorldEvent(description="A fog rolled in", affected_npc_ids=["aldric"]),
+            npc_reactions={},
+            gossip=[GossipItem(from_npc="mira", to_npc="aldric", content="Can't see a thing")],
+        )
+        memories = npc_memories(result.model_copy(update={"earlier": [earlier]}))
+
+        assert len(memories) == 3
+        assert [m.memory_type for m in memories["aldric"]] == ["world_event", "world_event", "npc_gossip", "npc_gossip"]
+        assert "A fog rolled in" in memories["aldric"][0].content
+
+
+@pytest.fixture
+def world(tmp_path):
+    """A seeded default ashwood world that the worker module resolves by id."""
+    base = Settings(gemini_api_key="fake-key", data_dir=str(tmp_path), memory_journal_fsync=False)
+    seed_scenario(base, "ashwood")
+    workflows.configure(base)
+    yield base.for_scenario("ashwood")
+    workflows.configure(None)
+
+
+class TestActivities:
+    def test_snapshot_is_read_from_the_world_db(self, world):
+        captured = {}
+
+        async def generate(world_state, npcs, hours):
+            captured.update(world_state=world_state, npcs=npcs, hours=hours)
+            return SimulationResult(
+                event=WorldEvent(description="Bandits", affected_npc_ids=["aldric"]),
+                npc_reactions={},
+                gossip=[GossipItem(from_npc="aldric", to_npc="mira", content="Run")],
+            )
+
+        service = MagicMock(generate_world_event=generate)
+        with patch.dict(workflows._world_services, {world.db_path: service}):
+            ref = asyncio.run(ActivityEnvironment().run(
+                workflows.generate_world_event_activity, SimulateInput("ashwood", "default", world_version=0, hours=12)
+            ))
+
+        assert captured["hours"] == 12
+        assert {n.id for n in captured["npcs"]} >= {"aldric", "mira"}
+        assert sorted(ref.npc_ids) == ["aldric", "mira"]
+        with get_db(world) as conn:
+            assert get_simulation_result(conn, ref.result_id).event.description == "Bandits"
+
+    def test_stale_version_fails_without_retry(self, world):
+        with pytest.raises(ApplicationError) as e:
+            asyncio.run(ActivityEnvironment().run(
+                workflows.generate_world_event_activity, SimulateInput("ashwood", "default", world_version=7)
+            ))
+        assert e.value.type == "StaleWorld"
+        assert e.value.non_retryable
+
+    def test_snapshots_cached_per_version(self, world):
+        pools = DatabasePools()
+        snapshots = SnapshotCache(pools)
+        first = snapshots.get(world, 0)
+        assert snapshots.get(world, 0) is first
+        with get_db(world) as conn:
+            save_world_event(conn, WorldEvent(description="Storm", affected_npc_ids=[]))
+        with pytest.raises(StaleWorldError):
+            snapshots.get(world, 0)
+        assert snapshots.get(world, 1).world_state.recent_events == ["Storm"]
+        assert (snapshots.hits, snapshots.misses) == (1, 3)
+        pools.close()
+
+    def test_memories_loaded_by_result_id(self, world, result):
+        with get_db(world) as conn:
+            save_simulation_result(conn, "r1", 0, result)
+        service = MagicMock()
+        service.add_memories = AsyncMock()
+
+        with patch("backend.temporal.workflows._npc_service", return_value=service):
+            asyncio.run(ActivityEnvironment().run(
+                update_npc_memories_activity, NPCMemoriesInput("ashwood", "default", "r1", "aldric")
+            ))
+
+        npc_id, memories = service.add_memories.call_args[0]
+        assert npc_id == "aldric"
+        assert [m.memory_type for m in memories] == ["world_event", "npc_gossip"]
+
+    def test_npc_services_are_the_serving_processes(self, world):
+        with pytest.raises(ApplicationError):
+            workflows._npc_service(world)
+
+        pools, services = DatabasePools(2), NPCServiceRegistry()
+        workflows.configure(Settings(gemini_api_key="fake-key", data_dir=world.data_dir), pools, services)
+        assert workflows._npc_service(world) is services.get(world)
+        assert workflows._pools() is pools
+        workflows.configure(None)
+        # Borrowed pools are left open for their owner.
+        with pools.get(world).connection() as conn:
+            conn.execute("SELECT 1")
+        services.clear()
+        pools.close()
+
+
+class TestWorldSimulationWorkflow:
+    def test_fans_out_concurrently(self, result):
+        in_flight = 0
+        peak = 0
+
+        @activity.defn(name="generate_world_event_activity")
+        async def fake_generate(input: SimulateInput) -> SimulationRef:
+            return SimulationRef(result_id="r1", npc_ids=list(npc_memories(result)))
+
+        @activity.defn(name="update_npc_memories_activity")
+        async def fake_update(input: NPCMemoriesInput) -> None:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+
+        @activity.defn(name="consolidate_npc_memories_activity")
+        async def fake_consolidate(input: ConsolidateInput) -> int:
+            return 0
+
+        async def run():
+            try:
+                env = await WorkflowEnvironment.start_time_skipping()
+            except RuntimeError as e:
+                pytest.skip(f"Temporal test server unavailable: {e}")
+            async with env:
+                async with Worker(
+                    env.client,
+                    task_queue="test",
+                    workflows=[WorldSimulationWorkflow],
+                    activities=[fake_generate, fake_update, fake_consolidate],
+                ):
+                    return await env.client.execute_workflow(
+                        WorldSimulationWorkflow.run,
+                        SimulateInput("ashwood", "default", world_version=0, fanout_limit=2),
+                        id=f"test-{uuid.uuid4()}",
+                        task_queue="test",
+                    )
+
+        assert asyncio.run(run()) == "r1"
+        assert peak == 2
+
+    def test_activities_run_on_the_worlds_queue(self, result):
+        ran = []
+
+        @activity.defn(name="generate_world_event_activity")
+        async def fake_generate(input: SimulateInput) -> SimulationRef:
+            ran.append(activity.info().task_queue)
+            return SimulationRef(result_id="r1", npc_ids=["aldric"])
+
+        @activity.defn(name="update_npc_memories_activity")
+        async def fake_update(input: NPCMemoriesInput) -> None:
+            ran.append(activity.info().task_queue)
+
+        @activity.defn(name="consolidate_npc_memories_activity")
+        async def fake_consolidate(input: ConsolidateInput) -> int:
+            ran.append(activity.info().task_queue)
+            return 0
+
+        async def run():
+            try:
+                env = await WorkflowEnvironment.start_time_skipping()
+            except RuntimeError as e:
+                pytest.skip(f"Temporal test server unavailable: {e}")
+            async with env:
+                async with Worker(env.client, task_queue="test", workflows=[WorldSimulationWorkflow]), Worker(
+                    env.client, task_queue="test-worlds", activities=[fake_generate, fake_update, fake_consolidate]
+                ):
+                    return await env.client.execute_workflow(
+                        WorldSimulationWorkflow.run,
+                        SimulateInput("ashwood", "default", world_version=0, activity_queue="test-worlds"),
+                        id=f"test-{uuid.uuid4()}",
+                        task_queue="test",
+                    )
+
+        assert asyncio.run(run()) == "r1"
+        assert ran == ["test-worlds"] * 3
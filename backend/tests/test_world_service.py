@@ -0,0 +1,71 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from backend.benchmarks.fakes import FakeGenAIClient, FakeResponse
+from backend.core.config import Settings
+from backend.core.models import NPC, NPCPersonality, WorldState
+from backend.services.world_service import WorldService
+
+
+@pytest.fixture
+def npcs():
+    return [
+        NPC(id=i, personality=NPCPersonality(name=i.title(), role="merchant", backstory="", goals=["trade"]))
+        for i in ("aldric", "mira")
+    ]
+
+
+@pytest.fixture
+def service():
+    with patch("google.genai.Client", return_value=FakeGenAIClient()):
+        yield WorldService(Settings(gemini_api_key="fake-key", simulation_max_catchup_ticks=8))
+
+
+def _state():
+    return WorldState(description="A trading post", hours_passed=12)
+
+
+class TestGenerateWorldEvent:
+    def test_single_tick(self, service, npcs):
+        result = asyncio.run(service.generate_world_event(_state(), npcs))
+        assert result.earlier == []
+        assert result.hours == 6
+        assert result.event.affected_npc_ids == ["aldric"]
+
+    def test_span_is_one_call_with_ordered_ticks(self, service, npcs):
+        result = asyncio.run(service.generate_world_event(_state(), npcs, hours=72))
+
+        assert service._client.aio.models.calls == 1
+        assert len(result.ticks) == 8  # capped at simulation_max_catchup_ticks
+        assert sum(t.hours for t in result.ticks) == 72
+        stamps = [t.event.timestamp for t in result.ticks]
+        assert stamps == sorted(stamps) and len(set(stamps)) == 8
+
+    def test_drops_unknown_npcs_and_extra_events(self, service, npcs):
+        reply = {"events": [
+            {"event_description": f"Event {i}", "affected_npc_ids": ["aldric", "ghost"],
+             "npc_reactions": {"ghost": "boo", "mira": "calm"}, "gossip": [{"from_npc": "ghost", "to_npc": "mira", "content": "hi"}]}
+            for i in range(5)
+        ]}
+        service._client.aio.models.generate_content = AsyncMock(return_value=FakeResponse(json.dumps(reply)))
+        result = asyncio.run(service.generate_world_event(_state(), npcs, hours=12))
+
+        assert [t.event.description for t in result.ticks] == ["Event 0", "Event 1"]
+        assert result.event.affected_npc_ids == ["aldric"]
+        assert result.npc_reactions == {"mira": "calm"}
+        assert result.gossip == []
+
+    def test_short_reply_keeps_all_hours(self, service, npcs):
+        reply = {"events": [{"event_description": "One long storm", "affected_npc_ids": ["mira"]}]}
+        service._client.aio.models.generate_content = AsyncMock(return_value=FakeResponse(json.dumps(reply)))
+        result = asyncio.run(service.generate_world_event(_state(), npcs, hours=18))
+        assert result.ticks == [result]
+        assert result.hours == 18
+
+    def test_no_events_is_an_error(self, service, npcs):
+        service._client.aio.models.generate_content = AsyncMock(return_value=FakeResponse('{"events": []}'))
+        with pytest.raises(ValueError):
+            asyncio.run(service.generate_world_event(_state(), npcs))
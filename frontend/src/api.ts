@@ -1,5 +1,15 @@
 const BASE = "http://localhost:8000";
 
+// NPCs keep each player's conversations private; the id lives in this browser.
+const PLAYER_ID = (() => {
+  let id = localStorage.getItem("lorekeeper-player-id");
+  if (!id) {
+    id = crypto.randomUUID();
+    localStorage.setItem("lorekeeper-player-id", id);
+  }
+  return id;
+})();
+
 export interface NPCPersonality {
   name: string;
   role: string;
@@ -17,6 +27,7 @@ export interface WorldState {
   description: string;
   recent_events: string[];
   hours_passed: number;
+  version: number;
 }
 
 export interface ChatResponse {
@@ -39,10 +50,15 @@ export interface GossipItem {
   content: string;
 }
 
-export interface SimulationResult {
+export interface SimulationTick {
   event: WorldEvent;
   npc_reactions: Record<string, string>;
   gossip: GossipItem[];
+  hours: number;
+}
+
+export interface SimulationResult extends SimulationTick {
+  earlier: SimulationTick[];
 }
 
 export interface NarrativeRecap {
@@ -66,22 +82,91 @@ export async function chatWithNPC(
 ): Promise<ChatResponse> {
   const res = await fetch(`${BASE}/npc/${npcId}/chat`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: { "Content-Type": "application/json", "X-Player-Id": PLAYER_ID },
     body: JSON.stringify({ player_message: message }),
   });
   return res.json();
 }
 
-export async function simulateWorld(): Promise<SimulationResult> {
-  const res = await fetch(`${BASE}/world/simulate`, { method: "POST" });
+export async function chatWithNPCStream(
+  npcId: string,
+  message: string,
+  onDialogue: (text: string) => void
+): Promise<ChatResponse> {
+  const res = await fetch(`${BASE}/npc/${npcId}/chat/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", "X-Player-Id": PLAYER_ID },
+    body: JSON.stringify({ player_message: message }),
+  });
+  if (!res.ok || !res.body) throw new Error(`chat stream failed: ${res.status}`);
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let dialogue = "";
+  let final: ChatResponse | null = null;
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      const event = frame.match(/^event: (.*)$/m)?.[1];
+      const data = frame.match(/^data: (.*)$/m)?.[1];
+      if (!event || data === undefined) continue;
+
+      if (event === "dialogue") {
+        dialogue += JSON.parse(data);
+        onDialogue(dialogue);
+      } else if (event === "done") {
+        final = JSON.parse(data);
+      }
+    }
+  }
+
+  if (!final) throw new Error("chat stream ended early");
+  return final;
+}
+
+export async function simulateWorld(hours?: number): Promise<SimulationResult> {
+  const query = hours ? `?hours=${hours}` : "";
+  const res = await fetch(`${BASE}/world/simulate${query}`, { method: "POST" });
   return res.json();
 }
 
-export async function getEvents(): Promise<WorldEvent[]> {
-  const res = await fetch(`${BASE}/world/events`);
+export interface EventPage {
+  after?: string;
+  before?: string;
+  limit?: number;
+}
+
+// Latest events newest first; `before` pages back, `after` fetches newer events oldest first.
+export async function getEvents(page: EventPage = {}): Promise<WorldEvent[]> {
+  const params = new URLSearchParams();
+  if (page.after) params.set("after", page.after);
+  if (page.before) params.set("before", page.before);
+  if (page.limit) params.set("limit", String(page.limit));
+  const query = params.toString();
+  const res = await fetch(`${BASE}/world/events${query ? `?${query}` : ""}`);
   return res.json();
 }
 
+// Pushes each simulation result as it commits. EventSource reconnects on its
+// own and resumes from the last event it saw. Returns an unsubscribe function.
+export function subscribeToWorld(
+  onResult: (result: SimulationResult) => void,
+  onEvent?: (event: WorldEvent) => void,
+): () => void {
+  const source = new EventSource(`${BASE}/world/events/stream`);
+  source.addEventListener("simulation", (e) => onResult(JSON.parse((e as MessageEvent).data)));
+  source.addEventListener("world_event", (e) => onEvent?.(JSON.parse((e as MessageEvent).data)));
+  return () => source.close();
+}
+
 export async function getNPC(npcId: string): Promise<NPC> {
   const res = await fetch(`${BASE}/npc/${npcId}`);
   return res.json();
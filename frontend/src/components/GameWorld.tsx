@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { motion, AnimatePresence } from "motion/react";
 import { Card, Button } from "pixel-retroui";
 import {
@@ -13,8 +13,9 @@ import {
   getRecap,
   getStarters,
   activateScenario,
-  chatWithNPC,
+  chatWithNPCStream,
   simulateWorld,
+  subscribeToWorld,
 } from "../api";
 import DialogueBox from "./DialogueBox";
 import CinematicOverlay from "./CinematicOverlay";
@@ -44,11 +45,15 @@ export default function GameWorld({ onBack, onHome }: GameWorldProps) {
   const [latestResult, setLatestResult] = useState<SimulationResult | null>(null);
   const [latestRecap, setLatestRecap] = useState<NarrativeRecap | null>(null);
   const [starters, setStarters] = useState<Record<string, string[]>>({});
+  // Our own simulations arrive on the world stream too; the overlay announces those.
+  const simulatingRef = useRef(false);
 
   const npcNames: Record<string, string> = {};
   npcs.forEach((n) => { npcNames[n.id] = n.personality.name; });
 
   useEffect(() => {
+    let unsubscribe = () => {};
+    let cancelled = false;
     const init = async () => {
       const savedScenario = localStorage.getItem("lk_scenario");
       if (savedScenario) {
@@ -63,21 +68,13 @@ export default function GameWorld({ onBack, onHome }: GameWorldProps) {
         speaker: "narrator",
         text: `You arrive. ${w.description}`,
       }]);
-    };
-    init();
+      if (cancelled) return;
 
-    // Poll for auto-simulated world changes every 30s
-    let lastHours = -1;
-    const poll = setInterval(async () => {
-      try {
-        const w = await getWorld();
-        if (lastHours === -1) {
-          lastHours = w.hours_passed;
-          return;
-        }
-        if (w.hours_passed !== lastHours) {
-          lastHours = w.hours_passed;
-          const [n, e] = await Promise.all([getNPCs(), getEvents()]);
+      // Background simulations are pushed as they commit, instead of polled for.
+      unsubscribe = subscribeToWorld(async () => {
+        if (simulatingRef.current) return;
+        try {
+          const [w, n, e] = await Promise.all([getWorld(), getNPCs(), getEvents()]);
           setWorld(w);
           setNpcs(n);
           setEvents(e);
@@ -85,11 +82,15 @@ export default function GameWorld({ onBack, onHome }: GameWorldProps) {
             ...prev,
             { speaker: "narrator", text: "The world has shifted while you were here..." },
           ]);
-        }
-      } catch { /* ignore poll errors */ }
-    }, 30000);
+        } catch { /* the next push refreshes again */ }
+      });
+    };
+    init();
 
-    return () => clearInterval(poll);
+    return () => {
+      cancelled = true;
+      unsubscribe();
+    };
   }, []);
 
   const handleTalkToNPC = (npc: NPC) => {
@@ -107,17 +108,22 @@ export default function GameWorld({ onBack, onHome }: GameWorldProps) {
     setDialogue((prev) => [...prev, { speaker: "player", text: msg }]);
     setLoading(true);
 
+    const speaker = selectedNpc.personality.name;
+    let started = false;
+    const showDialogue = (entry: DialogueEntry) => {
+      const replace = started;
+      started = true;
+      setDialogue((prev) => (replace ? [...prev.slice(0, -1), entry] : [...prev, entry]));
+    };
+
     try {
-      const res = await chatWithNPC(selectedNpc.id, msg);
-      setDialogue((prev) => [
-        ...prev,
-        {
-          speaker: selectedNpc.personality.name,
-          text: res.npc_dialogue,
-          memories: res.memories_retrieved,
-          choices: res.choices,
-        },
-      ]);
+      const res = await chatWithNPCStream(selectedNpc.id, msg, (text) => showDialogue({ speaker, text }));
+      showDialogue({
+        speaker,
+        text: res.npc_dialogue,
+        memories: res.memories_retrieved,
+        choices: res.choices,
+      });
     } catch {
       setDialogue((prev) => [...prev, { speaker: "narrator", text: "The NPC doesn't respond..." }]);
     }
@@ -127,6 +133,7 @@ export default function GameWorld({ onBack, onHome }: GameWorldProps) {
   const handlePassTime = async () => {
     if (simulating) return;
     setSimulating(true);
+    simulatingRef.current = true;
 
     try {
       const result = await simulateWorld();
@@ -145,6 +152,7 @@ export default function GameWorld({ onBack, onHome }: GameWorldProps) {
         { speaker: "narrator", text: "The world remains still... (Is the Temporal worker running?)" },
       ]);
       setSimulating(false);
+      simulatingRef.current = false;
     }
   };
 
@@ -161,6 +169,7 @@ export default function GameWorld({ onBack, onHome }: GameWorldProps) {
     setNpcs(n);
     setEvents(e);
     setSimulating(false);
+    simulatingRef.current = false;
   };
 
   const handleBack = () => {